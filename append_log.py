@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+追記専用のJSON Linesログ
+1行1レコードで追記し、オフセット索引（.idx）を併せて持つことで
+「最新N件」「時刻T以降」を全件パースせずに読み出せるようにする
+直近N件だけを使う処理向けに、小さなリングバッファファイル（RecentWindow）も提供する
+"""
+
+import json
+import os
+import struct
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from state_files import save_json_state
+
+# 索引の1エントリ: (データファイル内のオフセット, UNIX時刻)
+INDEX_ENTRY = struct.Struct("<Qd")
+
+def timestamp_of(record: Dict[str, Any], field: str = "timestamp") -> float:
+    """レコードのISO形式タイムスタンプをUNIX時刻に変換（なければ0）"""
+    value = record.get(field)
+    if not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+class AppendOnlyLog:
+    """オフセット索引付きの追記専用JSON Linesログ"""
+
+    def __init__(self, path, timestamp_field: str = "timestamp"):
+        self.path = Path(path)
+        self.index_path = self.path.with_suffix(self.path.suffix + ".idx")
+        self.timestamp_field = timestamp_field
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._recover()
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def __len__(self) -> int:
+        if not self.index_path.exists():
+            return 0
+        return self.index_path.stat().st_size // INDEX_ENTRY.size
+
+    def _recover(self):
+        """書き込み途中で止まった場合に、データと索引の整合性を取り戻す"""
+        if not self.path.exists():
+            if self.index_path.exists():
+                self.index_path.unlink()
+            return
+
+        data_size = self.path.stat().st_size
+        index_size = self.index_path.stat().st_size if self.index_path.exists() else 0
+
+        # 中途半端な索引エントリは切り捨てる
+        if index_size % INDEX_ENTRY.size:
+            with open(self.index_path, "r+b") as f:
+                f.truncate(index_size - index_size % INDEX_ENTRY.size)
+
+        # 末尾の改行で終わっていない（書きかけの）行は切り捨てる
+        if data_size:
+            with open(self.path, "r+b") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.seek(0)
+                    content = f.read()
+                    f.truncate(content.rfind(b"\n") + 1)
+            data_size = self.path.stat().st_size
+
+        # 索引がデータより先に進んでいたら巻き戻し、遅れていたら追いつかせる
+        count = len(self)
+        while count and self._entry(count - 1)[0] >= data_size:
+            count -= 1
+        with open(self.index_path, "a+b") as f:
+            f.truncate(count * INDEX_ENTRY.size)
+
+        scan_from = 0
+        if count:
+            with open(self.path, "rb") as f:
+                f.seek(self._entry(count - 1)[0])
+                f.readline()
+                scan_from = f.tell()
+
+        if scan_from < data_size:
+            entries = []
+            with open(self.path, "rb") as f:
+                f.seek(scan_from)
+                while True:
+                    offset = f.tell()
+                    line = f.readline()
+                    if not line:
+                        break
+                    entries.append(INDEX_ENTRY.pack(offset, timestamp_of(json.loads(line), self.timestamp_field)))
+            with open(self.index_path, "ab") as f:
+                f.write(b"".join(entries))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _entry(self, position: int):
+        """索引のposition番目のエントリ"""
+        with open(self.index_path, "rb") as f:
+            f.seek(position * INDEX_ENTRY.size)
+            return INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))
+
+    def append(self, record: Dict[str, Any]):
+        """1件追記"""
+        self.append_many([record])
+
+    def append_many(self, records: Iterable[Dict[str, Any]]):
+        """まとめて追記（データ→索引の順にfsyncする）"""
+        records = list(records)
+        if not records:
+            return
+
+        lines = [
+            (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+            for record in records
+        ]
+
+        entries = []
+        with open(self.path, "ab") as f:
+            offset = f.tell()
+            for record, line in zip(records, lines):
+                entries.append(INDEX_ENTRY.pack(offset, timestamp_of(record, self.timestamp_field)))
+                offset += len(line)
+            f.write(b"".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+
+        with open(self.index_path, "ab") as f:
+            f.write(b"".join(entries))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def iter_from(self, position: int) -> Iterator[Dict[str, Any]]:
+        """position番目以降のレコードを1件ずつ読む"""
+        if position >= len(self):
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._entry(position)[0])
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def read_from(self, position: int) -> List[Dict[str, Any]]:
+        """position番目以降のレコードを読む"""
+        return list(self.iter_from(position))
+
+    def tail(self, n: int) -> List[Dict[str, Any]]:
+        """最新n件（古い順）"""
+        if n <= 0:
+            return []
+        return self.read_from(max(0, len(self) - n))
+
+    def since(self, when) -> List[Dict[str, Any]]:
+        """時刻when以降のレコード（索引の時刻で二分探索）"""
+        threshold = when.timestamp() if isinstance(when, datetime) else float(when)
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry(middle)[1] < threshold:
+                low = middle + 1
+            else:
+                high = middle
+        return self.read_from(low)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """全レコードを先頭から1件ずつ読む"""
+        if not self.path.exists():
+            return
+        with open(self.path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def last(self) -> Optional[Dict[str, Any]]:
+        """最新1件"""
+        records = self.tail(1)
+        return records[0] if records else None
+
+class RecentWindow:
+    """ログの直近N件を保持する小さなリングバッファファイル（ログから作り直せる）"""
+
+    def __init__(self, path, log: AppendOnlyLog, size: int = 10):
+        self.path = Path(path)
+        self.log = log
+        self.size = size
+        self.records: deque = deque(maxlen=size)
+        self.load()
+
+    def load(self):
+        """保存済みの直近分を読み込む（ログの件数と合わなければ末尾から作り直す）"""
+        state = None
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                state = None
+
+        if state is None or state.get("size") != self.size or state.get("log_count") != len(self.log):
+            self.records = deque(self.log.tail(self.size), maxlen=self.size)
+            self.save()
+        else:
+            self.records = deque(state.get("records", []), maxlen=self.size)
+
+    def save(self):
+        """一時ファイルに書いてから置き換える"""
+        save_json_state(self.path, {
+            "size": self.size,
+            "log_count": len(self.log),
+            "records": list(self.records)
+        })
+
+    def append(self, record: Dict[str, Any]):
+        """ログに追記し、直近分を更新"""
+        self.log.append(record)
+        self.records.append(record)
+        self.save()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """直近分（古い順）"""
+        return list(self.records)
@@ -6,38 +6,230 @@
 
 import json
 import re
+import hashlib
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Any, Tuple
 import asyncio
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import article_features
+import keyword_matcher
+import prose_analysis
+from append_log import AppendOnlyLog
+from quality_aggregates import QualityAggregates
+from report_store import ReportStore
+from state_files import load_json_state, save_json_state
+from article_features import ArticleFeatures, build_matcher, extract_features
 
 # 日本標準時のタイムゾーン
 JST = timezone(timedelta(hours=9))
 
+# 採点ロジックを含むソースファイル（変更されると評価キャッシュが無効になる）
+SCORING_SOURCE_FILES = [
+    Path(__file__),
+    Path(article_features.__file__),
+    Path(keyword_matcher.__file__),
+    Path(prose_analysis.__file__)
+]
+
+# 採点で参照するキーワード（大文字小文字を区別する）
+TECH_TERMS = ["API", "async", "await", "class", "function", "database", "cache"]
+EXECUTABLE_PATTERNS = ["if __name__", "async def main", "def main(", "asyncio.run("]
+EVALUATION_KEYWORDS = [
+    "2025", "最新",
+    "とは", "について", "の概要",
+    "なぜこの記事を書こうと思ったのか", "AIの思考プロセス",
+    "実装例", "使用例", "サンプルコード",
+    "Step 1", "ステップ1", "手順",
+    "トラブルシューティング", "よくある問題", "エラー",
+    "pip install", "npm install", "インストール",
+    "との連携", "を組み合わせ", "統合",
+    "AIの視点", "自動化", "機械学習",
+    "詳しく", "詳細に", "深く",
+    "最適化", "パフォーマンス", "高速化",
+] + EXECUTABLE_PATTERNS
+
+# 全キーワードを1つのオートマトンにまとめておく（技術用語は大文字小文字を区別しない）
+EVALUATION_MATCHER = build_matcher(EVALUATION_KEYWORDS, TECH_TERMS)
+
+def compute_rule_version(rules_file: Path) -> str:
+    """採点コードとルールファイルの内容からルールバージョンを算出"""
+    digest = hashlib.sha256()
+    for path in SCORING_SOURCE_FILES + [rules_file]:
+        digest.update(str(path.name).encode("utf-8"))
+        if path.exists():
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+# 評価履歴（追記専用ログ）と、移行元の旧形式ファイル
+EVALUATION_LOG_FILE = Path("evaluation_history.jsonl")
+LEGACY_EVALUATION_HISTORY_FILE = Path("evaluation_history.json")
+
+def open_evaluation_log() -> AppendOnlyLog:
+    """評価履歴ログを開く（旧形式のevaluation_history.jsonがあれば取り込む）"""
+    log = AppendOnlyLog(EVALUATION_LOG_FILE)
+    if LEGACY_EVALUATION_HISTORY_FILE.exists():
+        with open(LEGACY_EVALUATION_HISTORY_FILE, "r", encoding="utf-8") as f:
+            legacy = json.load(f)
+        if len(log) == 0:
+            log.append_many(legacy.get("evaluations", []))
+        LEGACY_EVALUATION_HISTORY_FILE.rename(
+            LEGACY_EVALUATION_HISTORY_FILE.with_suffix(".json.migrated")
+        )
+    return log
+
+# 評価履歴の逐次集計（ログから作り直せる）
+EVALUATION_AGGREGATES_FILE = Path("evaluation_aggregates.json")
+EVALUATION_SCORE_CATEGORIES = ["technical_accuracy", "readability", "practicality", "originality"]
+
+def evaluation_values(evaluation: Dict[str, Any]) -> Dict[str, float]:
+    """集計対象のスコアを取り出す"""
+    scores = evaluation.get("scores", {})
+    values = {category: scores[category] for category in EVALUATION_SCORE_CATEGORIES if category in scores}
+    if "total_score" in evaluation:
+        values["total_score"] = evaluation["total_score"]
+    return values
+
+def evaluation_day(evaluation: Dict[str, Any]) -> str:
+    """評価日（YYYY-MM-DD）"""
+    return evaluation.get("timestamp", "")[:10]
+
+def load_evaluation_aggregates(log: AppendOnlyLog) -> QualityAggregates:
+    """集計状態を読み込み、ログに追加された分だけ取り込む"""
+    aggregates = QualityAggregates(EVALUATION_AGGREGATES_FILE, evaluation_values, evaluation_day)
+    if aggregates.sync(len(log), log.iter_from):
+        aggregates.save()
+    return aggregates
+
+def compute_content_hash(content: str) -> str:
+    """記事本文のハッシュ"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+# バッチ評価でプロセスプールを使う最小件数（これ未満はプロセス起動の方が高くつく）
+PARALLEL_EVALUATION_THRESHOLD = 4
+
+# ワーカープロセス内で使い回す評価器（履歴・キャッシュは持たない）
+_worker_evaluator = None
+
+def _init_evaluation_worker(rule_version: str):
+    """ワーカープロセスの初期化"""
+    global _worker_evaluator
+    _worker_evaluator = ArticleEvaluator(persistent=False)
+    _worker_evaluator.rule_version = rule_version
+
+def _score_in_worker(article_path: str, content: str, content_hash: str) -> Dict[str, Any]:
+    """ワーカープロセスで特徴量抽出と採点を行う"""
+    return _worker_evaluator.score_content(Path(article_path), content, content_hash)
+
 class ArticleEvaluator:
     """記事の評価を行うクラス"""
     
-    def __init__(self):
-        self.evaluation_history_file = Path("evaluation_history.json")
+    def __init__(self, persistent: bool = True):
+        self.evaluation_cache_file = Path("evaluation_cache.json")
+        self.posts_dir = Path("posts")
+        # 記事ファイルごとの (サイズ, 更新時刻) とハッシュ（キャッシュの整理で同じファイルを読み直さない）
+        self.post_hashes: Dict[str, Any] = {}
         self.rules_file = Path("BLOG_WRITING_RULES.md")
-        self.load_history()
+        self.rule_version = compute_rule_version(self.rules_file)
+        if persistent:
+            self.load_history()
+            self.load_cache()
+        else:
+            # 採点だけを行う（ワーカープロセス用）
+            self.pending_evaluations = []
+            self.evaluation_cache = {}
+            self.recorded_keys = set()
         
     def load_history(self):
-        """評価履歴を読み込む"""
-        if self.evaluation_history_file.exists():
-            with open(self.evaluation_history_file, "r", encoding="utf-8") as f:
-                self.history = json.load(f)
-        else:
-            self.history = {
-                "evaluations": [],
-                "rule_updates": [],
-                "quality_trends": {}
-            }
+        """評価履歴ログを開く（全件は読み込まない）"""
+        self.evaluation_log = open_evaluation_log()
+        self.aggregates = load_evaluation_aggregates(self.evaluation_log)
+        self.pending_evaluations = []
     
     def save_history(self):
-        """評価履歴を保存"""
-        with open(self.evaluation_history_file, "w", encoding="utf-8") as f:
-            json.dump(self.history, f, ensure_ascii=False, indent=2)
+        """未保存の評価を履歴ログに追記し、集計を更新"""
+        self.evaluation_log.append_many(self.pending_evaluations)
+        # 集計はログへの書き込みが済んでから進める（途中で止まっても次回ログから追いつく）
+        self.aggregates.add_many(self.pending_evaluations)
+        self.aggregates.save()
+        self.pending_evaluations = []
+        self.save_cache()
+    
+    def recent_evaluations(self, n: int) -> List[Dict[str, Any]]:
+        """最新n件の評価（古い順）"""
+        return self.evaluation_log.tail(n)
+    
+    def evaluations_since(self, when: datetime) -> List[Dict[str, Any]]:
+        """指定時刻以降の評価"""
+        return self.evaluation_log.since(when)
+    
+    def evaluation_count(self) -> int:
+        """保存済みの評価件数"""
+        return len(self.evaluation_log)
+    
+    def load_cache(self):
+        """評価キャッシュを読み込む（現在のルールバージョンのものだけ残す）"""
+        self.evaluation_cache = {}
+        # 履歴ログに記録済みの (本文ハッシュ, ルールバージョン)
+        self.recorded_keys = set()
+        cache = load_json_state(self.evaluation_cache_file)
+        if cache is not None:
+            if cache.get("rule_version") == self.rule_version:
+                self.evaluation_cache = cache.get("entries", {})
+                self.recorded_keys = set(cache.get("recorded", []))
+    
+    def _live_content_hashes(self) -> set:
+        """posts/ にある記事の本文ハッシュ"""
+        hashes = set()
+        for path in self.posts_dir.glob("*.md"):
+            stat = path.stat()
+            signature = (stat.st_size, stat.st_mtime_ns)
+            cached = self.post_hashes.get(path.name)
+            if cached is None or cached[0] != signature:
+                cached = (signature, compute_content_hash(path.read_text(encoding="utf-8")))
+                self.post_hashes[path.name] = cached
+            hashes.add(cached[1])
+        return hashes
+    
+    def save_cache(self):
+        """評価キャッシュを保存（posts/ に本文が残っていない評価は捨てる）"""
+        live_hashes = self._live_content_hashes()
+        self.evaluation_cache = {
+            key: evaluation for key, evaluation in self.evaluation_cache.items()
+            if evaluation["content_hash"] in live_hashes
+        }
+        save_json_state(self.evaluation_cache_file, {
+            "rule_version": self.rule_version,
+            "entries": self.evaluation_cache,
+            "recorded": sorted(self.recorded_keys)
+        })
+    
+    def _cache_key(self, content_hash: str, rule_version: str) -> str:
+        return f"{content_hash}:{rule_version}"
+    
+    def _cached_evaluation(self, cache_key: str, article_path: Path) -> Dict[str, Any]:
+        """キャッシュの評価を、今回の記事のパスと時刻にして返す（同じ本文の別ファイルもあるため）"""
+        evaluation = dict(self.evaluation_cache[cache_key])
+        evaluation["article_path"] = str(article_path)
+        evaluation["timestamp"] = datetime.now(JST).isoformat()
+        return evaluation
+    
+    def is_recorded(self, evaluation: Dict[str, Any]) -> bool:
+        """同じ本文・同じルールでの評価が履歴に記録済みか"""
+        return self._cache_key(evaluation["content_hash"], evaluation["rule_version"]) in self.recorded_keys
+    
+    def record_evaluation(self, evaluation: Dict[str, Any]) -> bool:
+        """未記録の評価だけを履歴に追加する（save_historyでログに追記）"""
+        if self.is_recorded(evaluation):
+            return False
+        self.pending_evaluations.append(evaluation)
+        self.recorded_keys.add(self._cache_key(evaluation["content_hash"], evaluation["rule_version"]))
+        return True
     
     async def evaluate_article(self, article_path: Path) -> Dict[str, Any]:
         """記事を評価する"""
@@ -45,31 +237,98 @@ class ArticleEvaluator:
         with open(article_path, "r", encoding="utf-8") as f:
             content = f.read()
         
+        # 同じ本文・同じルールで評価済みならキャッシュを返す
+        content_hash = compute_content_hash(content)
+        cache_key = self._cache_key(content_hash, self.rule_version)
+        if cache_key in self.evaluation_cache:
+            return self._cached_evaluation(cache_key, article_path)
+        
+        evaluation = self.score_content(article_path, content, content_hash)
+        self.evaluation_cache[cache_key] = evaluation
+        
+        return evaluation
+    
+    async def evaluate_batch(self, article_paths: List[Path], max_workers: int = None):
+        """複数の記事をプロセスプールで評価し、入力順に1件ずつ返す（非同期ジェネレータ）"""
+        article_paths = list(article_paths)
+        max_workers = max_workers or os.cpu_count() or 1
+        
+        if max_workers == 1 or len(article_paths) < PARALLEL_EVALUATION_THRESHOLD:
+            for article_path in article_paths:
+                yield await self.evaluate_article(article_path)
+            return
+        
+        loop = asyncio.get_running_loop()
+        # 本文をすべて抱え込まないよう、先行して投げる件数を制限する
+        max_in_flight = max_workers * 4
+        in_flight = deque()
+        
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_evaluation_worker,
+            initargs=(self.rule_version,)
+        ) as pool:
+            for article_path in article_paths:
+                with open(article_path, "r", encoding="utf-8") as f:
+                    content = f.read()
+                content_hash = compute_content_hash(content)
+                cache_key = self._cache_key(content_hash, self.rule_version)
+                
+                if cache_key in self.evaluation_cache:
+                    future = loop.create_future()
+                    future.set_result(self._cached_evaluation(cache_key, article_path))
+                else:
+                    future = loop.run_in_executor(
+                        pool, _score_in_worker, str(article_path), content, content_hash
+                    )
+                in_flight.append((cache_key, future))
+                
+                while len(in_flight) >= max_in_flight:
+                    yield await self._collect_batch_result(*in_flight.popleft())
+            
+            while in_flight:
+                yield await self._collect_batch_result(*in_flight.popleft())
+    
+    async def _collect_batch_result(self, cache_key: str, future) -> Dict[str, Any]:
+        """バッチ評価の結果を受け取り、キャッシュに入れる"""
+        evaluation = await future
+        self.evaluation_cache[cache_key] = evaluation
+        return evaluation
+    
+    def score_content(self, article_path: Path, content: str, content_hash: str) -> Dict[str, Any]:
+        """本文を採点する（ファイル入出力やキャッシュに触れない純粋な計算）"""
+        
         # メタデータを抽出
         metadata = self._extract_metadata(content)
         
+        # 本文を1回だけ走査して特徴量を抽出
+        features = extract_features(content, EVALUATION_MATCHER)
+        
         # 評価スコアを計算
         scores = {
-            "technical_accuracy": await self._evaluate_technical_accuracy(content, metadata),
-            "readability": await self._evaluate_readability(content, metadata),
-            "practicality": await self._evaluate_practicality(content, metadata),
-            "originality": await self._evaluate_originality(content, metadata)
+            "technical_accuracy": self._evaluate_technical_accuracy(features, metadata),
+            "readability": self._evaluate_readability(features, metadata),
+            "practicality": self._evaluate_practicality(features, metadata),
+            "originality": self._evaluate_originality(features, metadata)
         }
         
         # 詳細な評価結果
         evaluation = {
             "article_path": str(article_path),
             "timestamp": datetime.now(JST).isoformat(),
+            "content_hash": content_hash,
+            "rule_version": self.rule_version,
             "metadata": metadata,
             "scores": scores,
             "total_score": sum(scores.values()),
+            "readability_metrics": features.prose.summary(),
             "strengths": [],
             "weaknesses": [],
             "improvement_suggestions": []
         }
         
         # 強みと弱みを分析
-        evaluation.update(self._analyze_strengths_weaknesses(content, scores))
+        evaluation.update(self._analyze_strengths_weaknesses(features, scores))
         
         return evaluation
     
@@ -88,150 +347,121 @@ class ArticleEvaluator:
         
         return metadata
     
-    async def _evaluate_technical_accuracy(self, content: str, metadata: Dict[str, str]) -> float:
+    def _evaluate_technical_accuracy(self, features: ArticleFeatures, metadata: Dict[str, str]) -> float:
         """技術的正確性を評価（25点満点）"""
         score = 25.0
         
         # コードブロックの存在と品質をチェック
-        code_blocks = re.findall(r'```[\w]*\n(.*?)\n```', content, re.DOTALL)
-        
-        if len(code_blocks) == 0:
+        if len(features.code_blocks) == 0:
             score -= 10  # コードがない
         else:
             # コードの品質をチェック
-            for code in code_blocks:
+            for block in features.code_blocks:
                 # エラーハンドリングの有無
-                if 'try:' in code or 'except' in code or 'error' in code.lower():
-                    score -= 0  # 良い
-                else:
+                if not block.has_error_handling:
                     score -= 0.5  # エラーハンドリングなし
                 
                 # コメントの有無
-                if '#' in code and not code.strip().startswith('#'):
-                    score -= 0  # コメントあり
-                else:
+                if not block.has_comment:
                     score -= 0.5  # コメントなし
         
         # 技術用語の適切な使用
-        tech_terms = ["API", "async", "await", "class", "function", "database", "cache"]
-        term_count = sum(1 for term in tech_terms if term.lower() in content.lower())
-        if term_count < 5:
+        if features.hits(*TECH_TERMS) < 5:
             score -= 2  # 技術用語が少ない
         
         # 最新性のチェック（2025年の記述があるか）
-        if "2025" in content or "最新" in content:
-            score -= 0  # 最新性あり
-        else:
+        if not features.has("2025", "最新"):
             score -= 1
         
         return max(0, score)
     
-    async def _evaluate_readability(self, content: str, metadata: Dict[str, str]) -> float:
+    def _evaluate_readability(self, features: ArticleFeatures, metadata: Dict[str, str]) -> float:
         """読みやすさを評価（25点満点）"""
         score = 25.0
         
+        # 文章構造・段落・箇条書きはコードブロックを除いた地の文で数える
+        prose = features.prose
+        
         # 文章構造のチェック
-        sections = re.findall(r'^#{1,3}\s+(.+)$', content, re.MULTILINE)
-        if len(sections) < 5:
+        if prose.heading_count < 5:
             score -= 3  # セクションが少ない
         
         # 段落の長さをチェック
-        paragraphs = content.split('\n\n')
-        long_paragraphs = [p for p in paragraphs if len(p) > 500 and not p.startswith('```')]
+        long_paragraphs = [length for length in prose.paragraph_lengths if length > 500]
         if len(long_paragraphs) > 3:
             score -= 2  # 長すぎる段落が多い
         
+        # 一文の長さをチェック
+        if prose.sentence_count and len(prose.long_sentences()) / prose.sentence_count > 0.1:
+            score -= 2  # 長すぎる文が多い
+        
         # 箇条書きの使用
-        bullet_points = content.count('\n- ') + content.count('\n* ') + content.count('\n1. ')
-        if bullet_points < 5:
+        if prose.bullet_count < 5:
             score -= 2  # 箇条書きが少ない
         
         # 専門用語の説明
-        if "とは" in content or "について" in content or "の概要" in content:
-            score -= 0  # 説明あり
-        else:
+        if not features.has("とは", "について", "の概要"):
             score -= 3  # 説明不足
         
         # AIの思考プロセスセクションの存在
-        if "なぜこの記事を書こうと思ったのか" in content or "AIの思考プロセス" in content:
-            score -= 0
-        else:
+        if not features.has("なぜこの記事を書こうと思ったのか", "AIの思考プロセス"):
             score -= 5  # 必須セクションがない
         
         return max(0, score)
     
-    async def _evaluate_practicality(self, content: str, metadata: Dict[str, str]) -> float:
+    def _evaluate_practicality(self, features: ArticleFeatures, metadata: Dict[str, str]) -> float:
         """実用性を評価（25点満点）"""
         score = 25.0
         
         # 実装例の存在
-        if "実装例" in content or "使用例" in content or "サンプルコード" in content:
-            score -= 0
-        else:
+        if not features.has("実装例", "使用例", "サンプルコード"):
             score -= 5
         
         # ステップバイステップガイドの存在
-        if "Step 1" in content or "ステップ1" in content or "手順" in content:
-            score -= 0
-        else:
+        if not features.has("Step 1", "ステップ1", "手順"):
             score -= 3
         
         # トラブルシューティングセクション
-        if "トラブルシューティング" in content or "よくある問題" in content or "エラー" in content:
-            score -= 0
-        else:
+        if not features.has("トラブルシューティング", "よくある問題", "エラー"):
             score -= 2
         
         # インストール/セットアップ手順
-        if "pip install" in content or "npm install" in content or "インストール" in content:
-            score -= 0
-        else:
+        if not features.has("pip install", "npm install", "インストール"):
             score -= 2
         
         # 実行可能なコード例の数
-        executable_patterns = ["if __name__", "async def main", "def main(", "asyncio.run("]
-        executable_count = sum(1 for pattern in executable_patterns if pattern in content)
-        if executable_count < 2:
+        if features.hits(*EXECUTABLE_PATTERNS) < 2:
             score -= 3
         
         return max(0, score)
     
-    async def _evaluate_originality(self, content: str, metadata: Dict[str, str]) -> float:
+    def _evaluate_originality(self, features: ArticleFeatures, metadata: Dict[str, str]) -> float:
         """独自性を評価（25点満点）"""
         score = 25.0
         
         # 複数技術の組み合わせ
-        tech_combinations = 0
-        if "との連携" in content or "を組み合わせ" in content or "統合" in content:
-            tech_combinations += 1
-        if tech_combinations == 0:
+        if not features.has("との連携", "を組み合わせ", "統合"):
             score -= 3
         
         # AIならではの視点
-        if "AIの視点" in content or "自動化" in content or "機械学習" in content:
-            score -= 0
-        else:
+        if not features.has("AIの視点", "自動化", "機械学習"):
             score -= 3
         
         # 詳細な実装説明
-        detailed_explanations = content.count("詳しく") + content.count("詳細に") + content.count("深く")
-        if detailed_explanations < 3:
+        if features.occurrences("詳しく", "詳細に", "深く") < 3:
             score -= 2
         
         # パフォーマンス最適化の言及
-        if "最適化" in content or "パフォーマンス" in content or "高速化" in content:
-            score -= 0
-        else:
+        if not features.has("最適化", "パフォーマンス", "高速化"):
             score -= 2
         
         # 文章量（独自の詳細な説明があるか）
-        word_count = len(content.replace(" ", "").replace("\n", ""))
-        if word_count < 5000:
+        if features.non_whitespace_chars < 5000:
             score -= 5  # 文章が短すぎる
         
         return max(0, score)
     
-    def _analyze_strengths_weaknesses(self, content: str, scores: Dict[str, float]) -> Dict[str, List[str]]:
+    def _analyze_strengths_weaknesses(self, features: ArticleFeatures, scores: Dict[str, float]) -> Dict[str, List[str]]:
         """強みと弱みを分析"""
         result = {
             "strengths": [],
@@ -247,19 +477,19 @@ class ArticleEvaluator:
                 result["weaknesses"].append(f"{category}: 改善が必要 ({score:.1f}/25)")
         
         # コンテンツ分析
-        if len(re.findall(r'```[\w]*\n', content)) > 5:
+        if features.fence_lines > 5:
             result["strengths"].append("豊富なコード例")
         else:
             result["improvement_suggestions"].append("より多くのコード例を追加")
         
-        if "なぜこの記事を書こうと思ったのか" in content:
+        if features.has("なぜこの記事を書こうと思ったのか"):
             result["strengths"].append("AIの思考プロセスが明確")
         else:
             result["weaknesses"].append("AIの思考プロセスセクションが不足")
             result["improvement_suggestions"].append("記事冒頭にAIの思考プロセスを追加")
         
         # 文章とコードのバランス
-        code_ratio = len(re.findall(r'```[\w]*\n(.*?)\n```', content, re.DOTALL)) / max(1, content.count('\n\n'))
+        code_ratio = len(features.code_blocks) / max(1, features.prose.paragraph_count)
         if 0.2 <= code_ratio <= 0.4:
             result["strengths"].append("文章とコードの良好なバランス")
         else:
@@ -277,19 +507,14 @@ class RuleEvaluator:
     
     def load_rules_history(self):
         """ルール更新履歴を読み込む"""
-        if self.rules_history_file.exists():
-            with open(self.rules_history_file, "r", encoding="utf-8") as f:
-                self.rules_history = json.load(f)
-        else:
-            self.rules_history = {
-                "versions": [],
-                "update_reasons": []
-            }
+        self.rules_history = load_json_state(self.rules_history_file, {
+            "versions": [],
+            "update_reasons": []
+        })
     
     def save_rules_history(self):
         """ルール更新履歴を保存"""
-        with open(self.rules_history_file, "w", encoding="utf-8") as f:
-            json.dump(self.rules_history, f, ensure_ascii=False, indent=2)
+        save_json_state(self.rules_history_file, self.rules_history, indent=2)
     
     async def evaluate_rules(self, recent_evaluations: List[Dict[str, Any]]) -> Dict[str, Any]:
         """最近の評価結果に基づいてルールを評価"""
@@ -433,6 +658,7 @@ class SelfImprovingBlogSystem:
     def __init__(self):
         self.article_evaluator = ArticleEvaluator()
         self.rule_evaluator = RuleEvaluator()
+        self.report_store = ReportStore()
     
     async def evaluate_and_improve(self) -> Dict[str, Any]:
         """評価と改善のメインプロセス"""
@@ -446,12 +672,11 @@ class SelfImprovingBlogSystem:
         )[:5]  # 最新5記事
         
         evaluations = []
-        for article in recent_articles:
-            evaluation = await self.article_evaluator.evaluate_article(article)
+        async for evaluation in self.article_evaluator.evaluate_batch(recent_articles):
             evaluations.append(evaluation)
             
-            # 評価履歴に追加
-            self.article_evaluator.history["evaluations"].append(evaluation)
+            # 評価履歴に追加（同じ本文・同じルールの評価は重複させない）
+            self.article_evaluator.record_evaluation(evaluation)
         
         # 履歴を保存
         self.article_evaluator.save_history()
@@ -473,26 +698,47 @@ class SelfImprovingBlogSystem:
             "improvement_trends": self._analyze_trends()
         }
         
-        # レポートを保存
-        report_file = Path(f"improvement_report_{datetime.now(JST).strftime('%Y%m%d_%H%M%S')}.json")
-        with open(report_file, "w", encoding="utf-8") as f:
-            json.dump(improvement_report, f, ensure_ascii=False, indent=2)
+        # レポートを保存（日ごとのセグメントに追記）
+        self.report_store.append(improvement_report)
         
         return improvement_report
     
+    async def backfill_all(self, max_workers: int = None, save_every: int = 500) -> Dict[str, Any]:
+        """全記事を並列に評価し、未記録の評価を履歴に追加する"""
+        articles = sorted(Path("posts").glob("*.md"), key=lambda x: x.stat().st_mtime)
+        print(f"🔄 全記事の評価を開始: {len(articles)}記事")
+        
+        started = time.perf_counter()
+        evaluated = 0
+        recorded = 0
+        async for evaluation in self.article_evaluator.evaluate_batch(articles, max_workers=max_workers):
+            evaluated += 1
+            if self.article_evaluator.record_evaluation(evaluation):
+                recorded += 1
+            
+            # 途中で止まっても進捗が残るよう定期的に保存
+            if evaluated % save_every == 0:
+                self.article_evaluator.save_history()
+                print(f"  ... {evaluated}/{len(articles)}記事 ({time.perf_counter() - started:.1f}秒)")
+        
+        self.article_evaluator.save_history()
+        elapsed = time.perf_counter() - started
+        print(f"✅ 評価完了: {evaluated}記事（新規記録 {recorded}件）/ {elapsed:.1f}秒")
+        
+        return {"evaluated": evaluated, "recorded": recorded, "elapsed_seconds": elapsed}
+    
     def _analyze_trends(self) -> Dict[str, Any]:
         """品質トレンドを分析"""
-        evaluations = self.article_evaluator.history.get("evaluations", [])
+        evaluation_count = self.article_evaluator.evaluation_count()
+        total_scores = self.article_evaluator.aggregates.get("total_score")
         
-        if len(evaluations) < 2:
+        if evaluation_count < 2 or total_scores is None:
             return {"trend": "insufficient_data"}
         
-        # 最新10件と過去10件を比較
-        recent = evaluations[-10:]
-        older = evaluations[-20:-10] if len(evaluations) >= 20 else evaluations[:len(evaluations)//2]
-        
-        recent_avg = sum(e["total_score"] for e in recent) / len(recent)
-        older_avg = sum(e["total_score"] for e in older) / len(older) if older else recent_avg
+        # 最新10件と過去10件を比較（集計済みの直近ウィンドウを使う）
+        averages = total_scores.windowed_averages(10)
+        recent_avg = averages["recent_average"]
+        older_avg = averages["older_average"]
         
         improvement = recent_avg - older_avg
         
@@ -501,16 +747,25 @@ class SelfImprovingBlogSystem:
             "improvement_rate": improvement,
             "recent_average": recent_avg,
             "historical_average": older_avg,
-            "evaluation_count": len(evaluations)
+            "evaluation_count": evaluation_count
         }
 
 async def main():
     """メイン実行関数"""
-    print("🔄 自己改善型ブログシステム - 評価と改善プロセス開始")
-    print("=" * 60)
+    parser = argparse.ArgumentParser(description="自己改善型ブログシステム - 評価と改善")
+    parser.add_argument("--all", action="store_true", help="全記事を評価して履歴を埋める（ルール更新は行わない）")
+    parser.add_argument("--workers", type=int, default=None, help="評価に使うプロセス数（既定: CPU数）")
+    args = parser.parse_args()
     
     system = SelfImprovingBlogSystem()
     
+    if args.all:
+        await system.backfill_all(max_workers=args.workers)
+        return
+    
+    print("🔄 自己改善型ブログシステム - 評価と改善プロセス開始")
+    print("=" * 60)
+    
     # 評価と改善を実行
     report = await system.evaluate_and_improve()
     
@@ -524,7 +779,7 @@ async def main():
         print(f"  - 改善率: {report['improvement_trends']['improvement_rate']:.1f}ポイント")
     
     print("\n✅ 評価と改善プロセス完了")
-    print(f"📄 詳細レポート: improvement_report_*.json")
+    print(f"📄 詳細レポート: {system.report_store.root}/")
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
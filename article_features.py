@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+記事の特徴量抽出
+本文を1回走査して、コードブロック・キーワード出現数・地の文の指標などを
+型付きの特徴ベクトルにまとめる
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from keyword_matcher import KeywordMatcher, get_matcher
+from prose_analysis import ProseMetrics, get_prose_metrics
+
+FENCE_PATTERN = re.compile(r'```(\w*)$')
+
+# コードブロック内で調べるキーワード
+CODE_ERROR_KEYWORDS = ["try:", "except"]
+CODE_ERROR_KEYWORDS_IGNORE_CASE = ["error"]
+
+@dataclass
+class CodeBlock:
+    """コードブロック1つ分の特徴"""
+    language: str
+    start: int
+    end: int
+    code: str
+    has_error_handling: bool = False
+    has_comment: bool = False
+
+@dataclass
+class ArticleFeatures:
+    """記事の特徴ベクトル"""
+    char_count: int = 0
+    space_count: int = 0
+    newline_count: int = 0
+    code_blocks: List[CodeBlock] = field(default_factory=list)
+    fence_lines: int = 0
+    keyword_counts: Dict[str, int] = field(default_factory=dict)
+    prose: ProseMetrics = field(default_factory=ProseMetrics)
+
+    @property
+    def non_whitespace_chars(self) -> int:
+        """空白と改行を除いた文字数"""
+        return self.char_count - self.space_count - self.newline_count
+
+    def has(self, *keywords: str) -> bool:
+        """いずれかのキーワードが出現するか"""
+        return any(self.keyword_counts.get(keyword, 0) for keyword in keywords)
+
+    def hits(self, *keywords: str) -> int:
+        """出現したキーワードの種類数"""
+        return sum(1 for keyword in keywords if self.keyword_counts.get(keyword, 0))
+
+    def occurrences(self, *keywords: str) -> int:
+        """キーワードの出現回数の合計"""
+        return sum(self.keyword_counts.get(keyword, 0) for keyword in keywords)
+
+def build_matcher(keywords: List[str], ignore_case_keywords: List[str] = ()) -> KeywordMatcher:
+    """特徴量抽出用のマッチャーを作る（コードブロック用キーワードを含める）"""
+    return get_matcher(
+        list(keywords) + CODE_ERROR_KEYWORDS + ["#"],
+        list(ignore_case_keywords) + CODE_ERROR_KEYWORDS_IGNORE_CASE
+    )
+
+def extract_features(content: str, matcher: KeywordMatcher) -> ArticleFeatures:
+    """本文の構造を1回の行走査で、キーワードを1回のオートマトン走査で抽出"""
+    features = ArticleFeatures(
+        char_count=len(content),
+        space_count=content.count(" "),
+        newline_count=content.count("\n")
+    )
+
+    # 構造: コードブロック（見出し・箇条書き・段落は地の文の解析で数える）
+    position = 0
+    block_start = None
+    block_language = ""
+
+    for line in content.split("\n"):
+        line_end = position + len(line)
+
+        fence = FENCE_PATTERN.match(line)
+        if fence:
+            features.fence_lines += 1
+        if block_start is None:
+            if fence:
+                block_start = line_end + 1
+                block_language = fence.group(1)
+        elif line.startswith("```"):
+            code_end = max(block_start, position - 1)
+            features.code_blocks.append(CodeBlock(
+                language=block_language,
+                start=block_start,
+                end=code_end,
+                code=content[block_start:code_end]
+            ))
+            block_start = None
+
+        position = line_end + 1
+
+    # キーワード: 全パターンを1回の走査で数え、コードブロック内の出現も振り分ける
+    counts = {pattern: 0 for pattern in matcher.patterns}
+    blocks = features.code_blocks
+    block_index = 0
+    for start, pattern in matcher.iter_matches(content):
+        counts[pattern] += 1
+        while block_index < len(blocks) and blocks[block_index].end <= start:
+            block_index += 1
+        if block_index == len(blocks) or start < blocks[block_index].start:
+            continue
+        block = blocks[block_index]
+        if start + len(pattern) > block.end:
+            continue
+        if pattern == "#":
+            block.has_comment = True
+        elif pattern in CODE_ERROR_KEYWORDS or pattern in CODE_ERROR_KEYWORDS_IGNORE_CASE:
+            block.has_error_handling = True
+    features.keyword_counts = counts
+
+    # コメントだけで始まるブロックはコメント付きとみなさない
+    for block in blocks:
+        if block.has_comment and block.code.lstrip().startswith("#"):
+            block.has_comment = False
+
+    # 地の文の指標（コードブロックを除いた文・段落・箇条書き）
+    features.prose = get_prose_metrics(content)
+
+    return features
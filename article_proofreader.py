@@ -7,39 +7,117 @@
 import json
 import re
 import asyncio
+import hashlib
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Any, Tuple
 import httpx
 from urllib.parse import urlparse
 
+from keyword_matcher import get_matcher
+from code_validator import iter_code_blocks, validate_code
+import correction_engine
+from link_checker import LinkChecker
+from prose_analysis import get_prose_metrics
+from append_log import AppendOnlyLog, RecentWindow
+from state_files import load_json_state, save_json_state
+
 # 日本標準時のタイムゾーン
 JST = timezone(timedelta(hours=9))
 
+# 非推奨の用語や手法とその代替
+DEPRECATED_TERMS = {
+    "componentWillMount": "useEffect",
+    "componentWillReceiveProps": "useEffect or getDerivedStateFromProps",
+    "findDOMNode": "ref",
+    "React.createClass": "class components or function components",
+    "var ": "let or const",
+}
+
+# 基本的な誤字脱字パターン
+TYPO_PATTERNS = [
+    ("こども", "子ども"),
+    ("いづれ", "いずれ"),
+    ("すくなくとも", "少なくとも"),
+    ("もとづ", "基づ"),
+    ("おこな", "行な"),
+    ("してる", "している"),
+    ("してない", "していない"),
+]
+
+# 説明が必要な専門用語と、説明とみなす書き方
+TECHNICAL_TERMS = [
+    "Docker", "Kubernetes", "CI/CD", "DevOps", "マイクロサービス",
+    "レイテンシ", "スループット", "冪等性", "非同期処理"
+]
+EXPLANATION_SUFFIXES = ["とは", "は", "（", " ("]
+
+# 実用性チェックのキーワード
+INSTALL_KEYWORDS = ["pip install", "npm install", "yarn add", "インストール"]
+DEPENDENCY_KEYWORDS = ["ライブラリ", "パッケージ", "フレームワーク"]
+ERROR_HANDLING_KEYWORDS = ["try", "except", "catch", "エラー", "例外", "トラブルシューティング"]
+
+def build_proofreading_matcher():
+    """校正ルールの全キーワードをまとめたマッチャー（ルールが同じなら構築済みを再利用）"""
+    return get_matcher(
+        list(DEPRECATED_TERMS) + [wrong for wrong, _ in TYPO_PATTERNS]
+        + INSTALL_KEYWORDS + DEPENDENCY_KEYWORDS + ERROR_HANDLING_KEYWORDS,
+        TECHNICAL_TERMS + [term + suffix for term in TECHNICAL_TERMS for suffix in EXPLANATION_SUFFIXES]
+    )
+
+# 校正ログ（追記専用、本文は持たずハッシュと差分だけを記録）と、移行元の旧形式ファイル
+PROOFREADING_LOG_FILE = Path("proofreading_log.jsonl")
+LEGACY_PROOFREADING_LOG_FILE = Path("proofreading_log.json")
+
+# ルール評価に使う直近の校正記録
+RECENT_PROOFREADINGS_FILE = Path("proofreading_recent.json")
+RECENT_PROOFREADINGS_SIZE = 10
+
+def compute_content_hash(content: str) -> str:
+    """記事本文のハッシュ"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def compact_proofreading_record(result: Dict[str, Any]) -> Dict[str, Any]:
+    """校正結果からログ用の記録を作る（修正後の本文はハッシュに、問題の位置情報は省く）"""
+    record = {key: value for key, value in result.items() if key != "corrected_content"}
+    if "corrected_content" in result:
+        record["corrected_hash"] = compute_content_hash(result["corrected_content"])
+    record["issues_found"] = [
+        {key: value for key, value in issue.items() if key != "spans"}
+        for issue in result.get("issues_found", [])
+    ]
+    return record
+
+def open_proofreading_log() -> AppendOnlyLog:
+    """校正ログを開く（旧形式のproofreading_log.jsonがあれば取り込む）"""
+    log = AppendOnlyLog(PROOFREADING_LOG_FILE)
+    if LEGACY_PROOFREADING_LOG_FILE.exists():
+        with open(LEGACY_PROOFREADING_LOG_FILE, "r", encoding="utf-8") as f:
+            legacy = json.load(f)
+        if len(log) == 0:
+            log.append_many(compact_proofreading_record(result) for result in legacy.get("logs", []))
+        LEGACY_PROOFREADING_LOG_FILE.rename(
+            LEGACY_PROOFREADING_LOG_FILE.with_suffix(".json.migrated")
+        )
+    return log
+
 class ArticleProofreader:
     """記事の校正を行うクラス"""
     
     def __init__(self):
         self.proofreading_rules_file = Path("BLOG_PROOFREADING_RULES.md")
-        self.proofreading_log_file = Path("proofreading_log.json")
-        self.load_proofreading_log()
-        
-    def load_proofreading_log(self):
-        """校正ログを読み込む"""
-        if self.proofreading_log_file.exists():
-            with open(self.proofreading_log_file, "r", encoding="utf-8") as f:
-                self.proofreading_log = json.load(f)
-        else:
-            self.proofreading_log = {
-                "logs": [],
-                "common_issues": {},
-                "improvement_patterns": []
-            }
+        self.keyword_matcher = build_proofreading_matcher()
+        self.link_checker = LinkChecker()
+        self.proofreading_log = open_proofreading_log()
+        self.recent_proofreadings = RecentWindow(
+            RECENT_PROOFREADINGS_FILE, self.proofreading_log, RECENT_PROOFREADINGS_SIZE
+        )
     
-    def save_proofreading_log(self):
-        """校正ログを保存"""
-        with open(self.proofreading_log_file, "w", encoding="utf-8") as f:
-            json.dump(self.proofreading_log, f, ensure_ascii=False, indent=2)
+    def record_proofreading(self, proofreading_result: Dict[str, Any]) -> Dict[str, Any]:
+        """校正結果をログに追記（本文は持たず、ハッシュと差分だけを記録）"""
+        record = compact_proofreading_record(proofreading_result)
+        self.recent_proofreadings.append(record)
+        return record
     
     async def proofread_article(self, article_path: Path) -> Dict[str, Any]:
         """記事を校正する"""
@@ -54,21 +132,26 @@ class ArticleProofreader:
         proofreading_result = {
             "article_id": article_path.stem,
             "timestamp": datetime.now(JST).isoformat(),
+            "content_hash": compute_content_hash(content),
             "original_score": 100,  # 減点方式
             "issues_found": [],
             "corrections": [],
             "final_score": 100
         }
         
+        # 全ルールのキーワードを1回の走査で検出
+        keyword_hits = self.keyword_matcher.find_all(content)
+        
         # 各項目をチェック
-        technical_issues = await self._check_technical_accuracy(content, metadata)
+        technical_issues = await self._check_technical_accuracy(content, metadata, keyword_hits)
         timeliness_issues = await self._check_timeliness(content, metadata)
-        quality_issues = self._check_writing_quality(content)
-        practicality_issues = self._check_practicality(content)
+        quality_issues = self._check_writing_quality(content, keyword_hits)
+        practicality_issues = self._check_practicality(content, keyword_hits)
         
         # すべての問題を統合
         all_issues = technical_issues + timeliness_issues + quality_issues + practicality_issues
         proofreading_result["issues_found"] = all_issues
+        proofreading_result["readability_metrics"] = get_prose_metrics(content).summary()
         
         # スコアを計算
         for issue in all_issues:
@@ -79,15 +162,10 @@ class ArticleProofreader:
             else:
                 proofreading_result["original_score"] -= 2
         
-        # 自動修正を適用
-        corrected_content = content
-        for issue in all_issues:
-            if issue.get("auto_correctable", False):
-                corrected_content, correction = self._apply_correction(
-                    corrected_content, issue
-                )
-                if correction:
-                    proofreading_result["corrections"].append(correction)
+        # 自動修正を適用（検出時のspanから、重ならない編集を1回の走査で反映）
+        corrected_content, corrections, diff = correction_engine.correct(content, all_issues)
+        proofreading_result["corrections"] = corrections
+        proofreading_result["diff"] = diff
         
         # 最終スコアを計算
         proofreading_result["final_score"] = min(
@@ -119,9 +197,12 @@ class ArticleProofreader:
         
         return metadata
     
-    async def _check_technical_accuracy(self, content: str, metadata: Dict[str, str]) -> List[Dict[str, Any]]:
+    async def _check_technical_accuracy(self, content: str, metadata: Dict[str, str],
+                                        keyword_hits: Dict[str, List[int]] = None) -> List[Dict[str, Any]]:
         """技術的正確性をチェック"""
         issues = []
+        if keyword_hits is None:
+            keyword_hits = self.keyword_matcher.find_all(content)
         
         # バージョン情報をチェック
         version_patterns = [
@@ -133,31 +214,29 @@ class ArticleProofreader:
         ]
         
         for pattern, tech, latest in version_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for match in matches:
-                if self._is_version_outdated(match, latest):
-                    issues.append({
-                        "type": "version_outdated",
-                        "severity": "medium",
-                        "location": f"{tech} {match}",
-                        "original": match,
-                        "suggestion": latest,
-                        "auto_correctable": True,
-                        "pattern": f"{tech} {match}",
-                        "replacement": f"{tech} {latest}"
-                    })
+            # 同じバージョンの出現はまとめて1件の問題にする（spanは出現ごと）
+            outdated_spans: Dict[str, List[Tuple[int, int]]] = {}
+            for found in re.finditer(pattern, content, re.IGNORECASE):
+                match = found.group(1)
+                if match in outdated_spans or self._is_version_outdated(match, latest):
+                    outdated_spans.setdefault(match, []).append(found.span())
+            for match, spans in outdated_spans.items():
+                issues.append({
+                    "type": "version_outdated",
+                    "severity": "medium",
+                    "location": f"{tech} {match}",
+                    "original": match,
+                    "suggestion": latest,
+                    "auto_correctable": True,
+                    "pattern": f"{tech} {match}",
+                    "replacement": f"{tech} {latest}",
+                    "spans": spans,
+                    "scope": "prose"
+                })
         
         # 非推奨の用語や手法をチェック
-        deprecated_terms = {
-            "componentWillMount": "useEffect",
-            "componentWillReceiveProps": "useEffect or getDerivedStateFromProps",
-            "findDOMNode": "ref",
-            "React.createClass": "class components or function components",
-            "var ": "let or const",
-        }
-        
-        for deprecated, replacement in deprecated_terms.items():
-            if deprecated in content:
+        for deprecated, replacement in DEPRECATED_TERMS.items():
+            if keyword_hits[deprecated]:
                 issues.append({
                     "type": "deprecated_usage",
                     "severity": "high",
@@ -166,20 +245,24 @@ class ArticleProofreader:
                     "suggestion": replacement,
                     "auto_correctable": deprecated == "var ",
                     "pattern": deprecated,
-                    "replacement": "const " if deprecated == "var " else None
+                    "replacement": "const " if deprecated == "var " else None,
+                    # 識別子の途中（envvar など）は除き、コード内だけを書き換える
+                    "spans": [
+                        (start, start + len(deprecated)) for start in keyword_hits[deprecated]
+                        if start == 0 or not (content[start - 1].isalnum() or content[start - 1] == "_")
+                    ],
+                    "scope": "code"
                 })
         
-        # コードブロックの文法をチェック
-        code_blocks = re.findall(r'```(?:python|javascript|typescript)?\n(.*?)\n```', content, re.DOTALL)
-        for i, code in enumerate(code_blocks):
-            syntax_issues = self._check_code_syntax(code)
-            for issue in syntax_issues:
-                issue["location"] = f"Code block {i+1}"
+        # コードブロックの文法をチェック（Pythonはast、JS/TSはトークナイザ）
+        for i, language, code in iter_code_blocks(content):
+            for issue in self._check_code_syntax(code, language):
+                issue["location"] = f"Code block {i+1} line {issue['line']}"
                 issues.append(issue)
         
-        # URLの有効性をチェック（簡易版）
+        # URLの書式をチェック
         urls = re.findall(r'https?://[^\s\)]+', content)
-        for url in urls[:5]:  # 最初の5個のみチェック（パフォーマンスのため）
+        for url in urls:
             if not await self._is_url_valid(url):
                 issues.append({
                     "type": "invalid_url",
@@ -190,6 +273,18 @@ class ArticleProofreader:
                     "auto_correctable": False
                 })
         
+        # 全リンクの到達性をチェック（並行・キャッシュ付き）
+        for result in await self.link_checker.find_broken_links(content):
+            reason = f"HTTP {result['status']}" if result["status"] is not None else result["error"]
+            issues.append({
+                "type": "broken_link",
+                "severity": "medium" if result["status"] is not None else "low",
+                "location": result["url"],
+                "original": result["url"],
+                "suggestion": f"リンク切れ（{reason}）: URLを更新または削除",
+                "auto_correctable": False
+            })
+        
         return issues
     
     async def _check_timeliness(self, content: str, metadata: Dict[str, str]) -> List[Dict[str, Any]]:
@@ -235,23 +330,15 @@ class ArticleProofreader:
         
         return issues
     
-    def _check_writing_quality(self, content: str) -> List[Dict[str, Any]]:
+    def _check_writing_quality(self, content: str, keyword_hits: Dict[str, List[int]] = None) -> List[Dict[str, Any]]:
         """文章品質をチェック"""
         issues = []
+        if keyword_hits is None:
+            keyword_hits = self.keyword_matcher.find_all(content)
         
         # 基本的な誤字脱字パターン
-        typo_patterns = [
-            ("こども", "子ども"),
-            ("いづれ", "いずれ"),
-            ("すくなくとも", "少なくとも"),
-            ("もとづ", "基づ"),
-            ("おこな", "行な"),
-            ("してる", "している"),
-            ("してない", "していない"),
-        ]
-        
-        for wrong, correct in typo_patterns:
-            if wrong in content:
+        for wrong, correct in TYPO_PATTERNS:
+            if keyword_hits[wrong]:
                 issues.append({
                     "type": "typo",
                     "severity": "low",
@@ -260,53 +347,42 @@ class ArticleProofreader:
                     "suggestion": correct,
                     "auto_correctable": True,
                     "pattern": wrong,
-                    "replacement": correct
+                    "replacement": correct,
+                    "spans": [(start, start + len(wrong)) for start in keyword_hits[wrong]],
+                    "scope": "prose"
                 })
         
-        # 一文の長さをチェック
-        sentences = re.split(r'[。！？]', content)
-        for i, sentence in enumerate(sentences):
-            if len(sentence) > 100:  # 100文字以上
-                issues.append({
-                    "type": "long_sentence",
-                    "severity": "low",
-                    "location": f"Sentence {i+1}",
-                    "original": sentence[:50] + "...",
-                    "suggestion": "文を分割して読みやすくする",
-                    "auto_correctable": False
-                })
+        # 一文の長さと受動態は、コードブロックを除いた地の文だけで数える
+        prose = get_prose_metrics(content)
+        for i in prose.long_sentences():
+            start, end = prose.sentences[i]
+            issues.append({
+                "type": "long_sentence",
+                "severity": "low",
+                "location": f"Sentence {i+1}",
+                "original": content[start:end].strip()[:50] + "...",
+                "suggestion": "文を分割して読みやすくする",
+                "auto_correctable": False
+            })
         
         # 受動態の過度な使用をチェック
-        passive_count = len(re.findall(r'れる|られる', content))
-        if passive_count > 20:  # 記事全体で20回以上
+        if prose.passive_count > 20:  # 記事全体で20回以上
             issues.append({
                 "type": "excessive_passive_voice",
                 "severity": "low",
                 "location": "全体",
-                "original": f"受動態が{passive_count}回使用",
+                "original": f"受動態が{prose.passive_count}回使用（受動態を含む文の割合 {prose.passive_ratio:.0%}）",
                 "suggestion": "能動態を使って文章を活発にする",
                 "auto_correctable": False
             })
         
-        # 専門用語の説明不足をチェック
-        technical_terms = [
-            "Docker", "Kubernetes", "CI/CD", "DevOps", "マイクロサービス",
-            "レイテンシ", "スループット", "冪等性", "非同期処理"
-        ]
-        
-        content_lower = content.lower()
-        for term in technical_terms:
-            if term.lower() in content_lower:
+        # 専門用語の説明不足をチェック（大文字小文字は区別しない）
+        for term in TECHNICAL_TERMS:
+            if keyword_hits[term]:
                 # 用語の説明があるかチェック
-                explanation_patterns = [
-                    f"{term}とは",
-                    f"{term}は",
-                    f"{term}（",
-                    f"{term} \\("
-                ]
                 has_explanation = any(
-                    pattern.lower() in content_lower 
-                    for pattern in explanation_patterns
+                    keyword_hits[term + suffix]
+                    for suffix in EXPLANATION_SUFFIXES
                 )
                 
                 if not has_explanation:
@@ -321,9 +397,11 @@ class ArticleProofreader:
         
         return issues
     
-    def _check_practicality(self, content: str) -> List[Dict[str, Any]]:
+    def _check_practicality(self, content: str, keyword_hits: Dict[str, List[int]] = None) -> List[Dict[str, Any]]:
         """実用性をチェック"""
         issues = []
+        if keyword_hits is None:
+            keyword_hits = self.keyword_matcher.find_all(content)
         
         # コード例の数をチェック
         code_blocks = re.findall(r'```[^\n]*\n', content)
@@ -338,15 +416,9 @@ class ArticleProofreader:
             })
         
         # インストール手順の有無をチェック
-        has_install = any(
-            keyword in content 
-            for keyword in ["pip install", "npm install", "yarn add", "インストール"]
-        )
+        has_install = any(keyword_hits[keyword] for keyword in INSTALL_KEYWORDS)
         
-        if not has_install and any(
-            tech in content 
-            for tech in ["ライブラリ", "パッケージ", "フレームワーク"]
-        ):
+        if not has_install and any(keyword_hits[tech] for tech in DEPENDENCY_KEYWORDS):
             issues.append({
                 "type": "missing_installation_guide",
                 "severity": "medium",
@@ -357,10 +429,7 @@ class ArticleProofreader:
             })
         
         # エラーハンドリングの言及をチェック
-        has_error_handling = any(
-            keyword in content 
-            for keyword in ["try", "except", "catch", "エラー", "例外", "トラブルシューティング"]
-        )
+        has_error_handling = any(keyword_hits[keyword] for keyword in ERROR_HANDLING_KEYWORDS)
         
         if not has_error_handling:
             issues.append({
@@ -374,41 +443,9 @@ class ArticleProofreader:
         
         return issues
     
-    def _check_code_syntax(self, code: str) -> List[Dict[str, Any]]:
-        """コードの文法をチェック（簡易版）"""
-        issues = []
-        
-        # 基本的な文法エラーパターン
-        if "import" in code and "from" in code:
-            lines = code.split('\n')
-            for i, line in enumerate(lines):
-                if line.strip().startswith("from") and " import " in line:
-                    # import文の順序をチェック
-                    if i > 0 and not lines[i-1].strip().startswith(("from", "import", "")):
-                        issues.append({
-                            "type": "import_order",
-                            "severity": "low",
-                            "location": f"Line {i+1}",
-                            "original": line.strip(),
-                            "suggestion": "Import文を先頭にまとめる",
-                            "auto_correctable": False
-                        })
-        
-        # 未使用の変数をチェック（簡易版）
-        variable_pattern = r'^(\s*)(\w+)\s*='
-        variables = re.findall(variable_pattern, code, re.MULTILINE)
-        for indent, var_name in variables:
-            if var_name not in ["_", "__"] and code.count(var_name) == 1:
-                issues.append({
-                    "type": "unused_variable",
-                    "severity": "low",
-                    "location": var_name,
-                    "original": var_name,
-                    "suggestion": f"未使用の変数 {var_name}",
-                    "auto_correctable": False
-                })
-        
-        return issues
+    def _check_code_syntax(self, code: str, language: str = "python") -> List[Dict[str, Any]]:
+        """コードの文法をチェック（結果はブロックのハッシュでキャッシュ）"""
+        return validate_code(code, language)
     
     def _is_version_outdated(self, version: str, latest: str) -> bool:
         """バージョンが古いかチェック"""
@@ -430,38 +467,12 @@ class ArticleProofreader:
             return False
     
     async def _is_url_valid(self, url: str) -> bool:
-        """URLが有効かチェック（簡易版）"""
+        """URLの書式が有効かチェック（到達性はLinkCheckerで確認）"""
         try:
-            # GitHubのURLは常に有効とみなす
             parsed = urlparse(url)
-            if parsed.netloc in ["github.com", "githubusercontent.com"]:
-                return True
-            
-            # その他のURLは簡単なフォーマットチェックのみ
             return bool(parsed.scheme and parsed.netloc)
         except:
             return False
-    
-    def _apply_correction(self, content: str, issue: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
-        """修正を適用"""
-        if not issue.get("auto_correctable", False):
-            return content, None
-        
-        pattern = issue.get("pattern")
-        replacement = issue.get("replacement")
-        
-        if pattern and replacement is not None:
-            corrected_content = content.replace(pattern, replacement)
-            if corrected_content != content:
-                correction = {
-                    "type": issue["type"],
-                    "original": pattern,
-                    "corrected": replacement,
-                    "location": issue.get("location", "")
-                }
-                return corrected_content, correction
-        
-        return content, None
 
 class ProofreadingRuleManager:
     """校正ルールを管理・更新するクラス"""
@@ -473,19 +484,14 @@ class ProofreadingRuleManager:
     
     def load_rules_history(self):
         """ルール更新履歴を読み込む"""
-        if self.rules_history_file.exists():
-            with open(self.rules_history_file, "r", encoding="utf-8") as f:
-                self.rules_history = json.load(f)
-        else:
-            self.rules_history = {
-                "versions": [],
-                "update_reasons": []
-            }
+        self.rules_history = load_json_state(self.rules_history_file, {
+            "versions": [],
+            "update_reasons": []
+        })
     
     def save_rules_history(self):
         """ルール更新履歴を保存"""
-        with open(self.rules_history_file, "w", encoding="utf-8") as f:
-            json.dump(self.rules_history, f, ensure_ascii=False, indent=2)
+        save_json_state(self.rules_history_file, self.rules_history, indent=2)
     
     async def evaluate_proofreading_rules(self, recent_proofreadings: List[Dict[str, Any]]) -> Dict[str, Any]:
         """最近の校正結果に基づいてルールを評価"""
@@ -579,12 +585,11 @@ class ImprovedArticleWithProofreading:
             
             print(f"\n📝 記事を更新しました: {article_path}")
         
-        # 校正ログを保存
-        self.proofreader.proofreading_log["logs"].append(proofreading_result)
-        self.proofreader.save_proofreading_log()
+        # 校正ログに追記
+        self.proofreader.record_proofreading(proofreading_result)
         
-        # ルールの評価（最新10件の校正結果を使用）
-        recent_logs = self.proofreader.proofreading_log["logs"][-10:]
+        # ルールの評価（直近10件の校正記録を使用）
+        recent_logs = self.proofreader.recent_proofreadings.to_list()
         rule_evaluation = await self.rule_manager.evaluate_proofreading_rules(recent_logs)
         
         if rule_evaluation["suggested_updates"]:
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+ストリーミング生成される記事の逐次保存
+モデルの出力をチャンクが届くたびに一時ファイルへ追記し、フロントマターの妥当性と文字数の上限を
+その場で確認する。完了したら一時ファイルを記事のパスへ原子的にリネームするので、
+書き込み途中の記事が posts/ に現れることはなく、メモリに記事全体を保持する必要もない
+"""
+
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from writer_avatars import WriterAvatar, add_writer_signature
+
+DEFAULT_STREAM_SETTINGS = {
+    "min_chars": 10000,              # これより短ければ完了時に問題として記録
+    "max_chars": 60000,              # これを超えたら生成を打ち切る
+    "front_matter_max_chars": 2000,  # この文字数までにフロントマターが閉じなければ問題として記録
+    "required_fields": ["title", "date"]
+}
+
+class ArticleStreamError(RuntimeError):
+    """ストリーミング中の検査で記事を保存できないと判断した"""
+
+class ArticleStreamWriter:
+    """チャンクを一時ファイルへ追記し、完了時に記事のパスへリネームする"""
+
+    def __init__(self, article_path, writer: Optional[WriterAvatar] = None, **settings):
+        self.article_path = Path(article_path)
+        self.temp_path = self.article_path.with_name(f".{self.article_path.name}.part")
+        self.writer = writer
+        self.settings = dict(DEFAULT_STREAM_SETTINGS)
+        self.settings.update(settings)
+
+        self.issues: List[str] = []
+        self.chars = 0
+        self.chunks = 0
+        self.fences = 0
+        self.front_matter: Dict[str, str] = {}
+        self.started_at = time.perf_counter()
+        self.first_byte_seconds = None
+        self.completed = False
+
+        # フロントマターが閉じるまでは手元に保持する（タイトルの書き換えと検査のため）
+        self._head: Optional[str] = ""
+        self._line_tail = ""
+        self.article_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.temp_path, "w", encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # finish()せずに抜けた（例外・中断）場合は一時ファイルを残さない
+        if not self.completed:
+            self.abort()
+        return False
+
+    def write(self, chunk: str):
+        """チャンクを検査して一時ファイルへ追記"""
+        if not chunk:
+            return
+        self.chunks += 1
+        self.chars += len(chunk)
+        if self.chars > self.settings["max_chars"]:
+            raise ArticleStreamError(f"文字数の上限（{self.settings['max_chars']}文字）を超えました")
+
+        self._count_fences(chunk)
+        if self._head is not None:
+            self._head += chunk
+            self._check_head()
+            return
+        self._emit(chunk)
+
+    def _count_fences(self, chunk: str):
+        """チャンク境界をまたぐ行も含めてコードブロックの開閉を数える"""
+        lines = (self._line_tail + chunk).split("\n")
+        self._line_tail = lines.pop()
+        self.fences += sum(1 for line in lines if line.startswith("```"))
+
+    def _emit(self, text: str):
+        self._file.write(text)
+        self._file.flush()
+        if self.first_byte_seconds is None:
+            self.first_byte_seconds = time.perf_counter() - self.started_at
+
+    def _check_head(self, final: bool = False):
+        """フロントマターが閉じたら検査してタイトルを書き換え、保持していた分を書き出す"""
+        head = self._head
+        stripped = head.lstrip()
+        if len(stripped) < 3 and not final:
+            return
+
+        if not stripped.startswith("---"):
+            self.issues.append("フロントマターがありません")
+            self._flush_head(head)
+            return
+
+        start = len(head) - len(stripped)
+        end = head.find("\n---", start + 3)
+        if end < 0:
+            if final or len(head) > self.settings["front_matter_max_chars"]:
+                self.issues.append("フロントマターが閉じていません")
+                self._flush_head(head)
+            return
+
+        front_matter = head[start + 3:end]
+        lines = front_matter.split("\n")
+        title_rewritten = False
+        for i, line in enumerate(lines):
+            key, sep, value = line.partition(":")
+            if sep and key.strip():
+                self.front_matter[key.strip()] = value.strip()
+            if key == "title" and self.writer and not title_rewritten:
+                # format_article_with_writer_styleと同じくタイトルにニックネームを付ける
+                lines[i] = f"{line} by {self.writer.nickname}"
+                title_rewritten = True
+
+        missing = [name for name in self.settings["required_fields"] if not self.front_matter.get(name)]
+        if missing:
+            self.issues.append(f"フロントマターに必須項目がありません: {', '.join(missing)}")
+        self._flush_head(head[:start + 3] + "\n".join(lines) + head[end:])
+
+    def _flush_head(self, text: str):
+        self._head = None
+        self._emit(text)
+
+    def abort(self):
+        """書き込みを中止して一時ファイルを削除"""
+        if not self._file.closed:
+            self._file.close()
+        self.temp_path.unlink(missing_ok=True)
+
+    def finish(self) -> Path:
+        """完了時の検査をして署名を追記し、記事のパスへリネーム"""
+        if self._head is not None:
+            self._check_head(final=True)
+        if self._line_tail.startswith("```"):
+            self.fences += 1
+            self._line_tail = ""
+        if self.chars < self.settings["min_chars"]:
+            self.issues.append(f"文字数が不足しています（{self.chars}文字）")
+        if self.fences % 2:
+            self.issues.append("コードブロックが閉じていません")
+
+        if self.writer:
+            self._emit(add_writer_signature("", self.writer))
+        self._file.close()
+        self.temp_path.replace(self.article_path)
+        self.completed = True
+        return self.article_path
+
+    def summary(self) -> Dict[str, Any]:
+        """ログに残すストリーミングの記録"""
+        return {
+            "chars": self.chars,
+            "chunks": self.chunks,
+            "time_to_first_byte": round(self.first_byte_seconds, 3) if self.first_byte_seconds is not None else None,
+            "elapsed_seconds": round(time.perf_counter() - self.started_at, 3),
+            "issues": list(self.issues),
+            "completed": self.completed
+        }
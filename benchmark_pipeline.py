@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+記事パイプライン（生成→校正→公開）のエンドツーエンドベンチマーク
+モックのLLMバックエンドで FullReviewArticleSystem を一時ディレクトリ内で繰り返し実行し、
+記事/時・フェーズごとの所要時間・AIセクションの所要時間・障害の件数を計測する
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Any
+
+from benchmark_rss_aggregator import percentile
+from llm_backends import DEFAULT_MOCK_SETTINGS, MockLLMBackend
+from llm_response_cache import LLM_CACHE_MODE_ENV, LLM_CACHE_MODES
+from resilience import DEFAULT_RESILIENCE_SETTINGS, RESILIENCE_CONFIG_FILE, ResilientIntegration
+
+REPO_ROOT = Path(__file__).resolve().parent
+PIPELINE_PHASES = ["evaluation", "generation", "proofreading", "publish", "feedback"]
+
+# 作業ディレクトリにコピーするもの（公開スクリプトはカレントディレクトリから実行される）
+WORKSPACE_FILES = ["convert_articles_v3.py", "update_to_modern_ui_v3.py"]
+
+def prepare_workspace(workspace: Path, seed_posts: int):
+    """既存記事の一部と公開スクリプトを作業ディレクトリに用意する"""
+    posts_dir = workspace / "posts"
+    posts_dir.mkdir(parents=True)
+    (workspace / "docs" / "articles").mkdir(parents=True)
+    posts = sorted((REPO_ROOT / "posts").glob("*.md"))
+    for post in posts[max(0, len(posts) - seed_posts):]:
+        shutil.copy2(post, posts_dir / post.name)
+    for name in WORKSPACE_FILES:
+        if (REPO_ROOT / name).exists():
+            shutil.copy2(REPO_ROOT / name, workspace / name)
+
+def write_resilience_config(workspace: Path, time_scale: float):
+    """リトライの待ち時間もモデルの待ち時間と同じ倍率にする"""
+    config = {
+        "base_delay": DEFAULT_RESILIENCE_SETTINGS["base_delay"] * time_scale,
+        "max_delay": DEFAULT_RESILIENCE_SETTINGS["max_delay"] * time_scale,
+        "circuit": {"reset_timeout": DEFAULT_RESILIENCE_SETTINGS["circuit"]["reset_timeout"] * time_scale}
+    }
+    with open(workspace / RESILIENCE_CONFIG_FILE, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+def _resilience_stats(integration) -> Dict[str, Any]:
+    """キャッシュなどのラッパーをたどって回復性レイヤーの記録を取り出す"""
+    while integration is not None and not isinstance(integration, ResilientIntegration):
+        integration = integration.__dict__.get("integration")
+    return dict(integration.stats) if integration is not None else {}
+
+def _pipeline_output(verbose: bool):
+    """パイプラインの出力先（verboseなら標準エラー、それ以外は捨てる。結果の出力と混ざらないように）"""
+    return contextlib.redirect_stdout(sys.stderr if verbose else io.StringIO())
+
+async def _run_pipeline(articles: int, backend: MockLLMBackend, check_links: bool,
+                        verbose: bool) -> List[Dict[str, Any]]:
+    """記事をarticles本生成し、1本ごとの計測結果を返す"""
+    with _pipeline_output(verbose):
+        from generate_article_with_full_review import FullReviewArticleSystem
+        system = FullReviewArticleSystem(use_detailed_generator=True, backend=backend)
+    system.proofreading_system.proofreader.link_checker.settings["enabled"] = check_links
+
+    results = []
+    for index in range(articles):
+        model_before = dict(backend.stats)
+        resilience_before = _resilience_stats(system.article_generator.claude_integration)
+        started = time.perf_counter()
+        error = None
+        generation = {}
+        try:
+            with _pipeline_output(verbose):
+                generation = await system.generate_with_full_review()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        wall = time.perf_counter() - started
+
+        sections = [log for log in system.article_generator.generation_log if "section" in log]
+        resilience = _resilience_stats(system.article_generator.claude_integration)
+        results.append({
+            "article": index + 1,
+            **{key: resilience.get(key, 0) - resilience_before.get(key, 0)
+               for key in ("retries", "retry_seconds", "short_circuits")},
+            "wall_seconds": wall,
+            "phases": generation.get("phase_timings", {}),
+            "final_score": generation.get("final_score"),
+            "quality_status": generation.get("quality_status"),
+            "sections": [
+                {"section": log["section"], "status": log["status"], "seconds": log["duration_seconds"]}
+                for log in sections
+            ],
+            "model_calls": backend.stats["calls"] - model_before["calls"],
+            "model_failures": backend.stats["failures"] - model_before["failures"],
+            "model_seconds": backend.stats["simulated_seconds"] - model_before["simulated_seconds"],
+            "error": error
+        })
+    return results
+
+def benchmark(articles: int, backend_settings: Dict[str, Any] = None, seed_posts: int = 5,
+              check_links: bool = False, verbose: bool = False, cache_mode: str = "off") -> Dict[str, Any]:
+    """一時ディレクトリでパイプラインを実行し、集計結果を返す"""
+    backend = MockLLMBackend(**(backend_settings or {}))
+    original_cwd = Path.cwd()
+    original_cache_mode = os.environ.get(LLM_CACHE_MODE_ENV)
+    # 応答キャッシュが効くとモデルの待ち時間を計測できないので、既定では無効で計測する
+    os.environ[LLM_CACHE_MODE_ENV] = cache_mode
+
+    with tempfile.TemporaryDirectory() as workspace:
+        prepare_workspace(Path(workspace), seed_posts)
+        write_resilience_config(Path(workspace), backend.settings["time_scale"])
+        os.chdir(workspace)
+        try:
+            started = time.perf_counter()
+            results = asyncio.run(_run_pipeline(articles, backend, check_links, verbose))
+            total_wall = time.perf_counter() - started
+        finally:
+            os.chdir(original_cwd)
+            if original_cache_mode is None:
+                os.environ.pop(LLM_CACHE_MODE_ENV, None)
+            else:
+                os.environ[LLM_CACHE_MODE_ENV] = original_cache_mode
+
+    completed = [r for r in results if r["error"] is None]
+    phases = {}
+    for phase in PIPELINE_PHASES:
+        values = [r["phases"][phase] for r in completed if phase in r["phases"]]
+        if values:
+            phases[phase] = {
+                "mean_seconds": round(sum(values) / len(values), 3),
+                "p50_seconds": round(percentile(values, 50), 3),
+                "p95_seconds": round(percentile(values, 95), 3),
+                "share": round(sum(values) / sum(r["wall_seconds"] for r in completed), 3)
+            }
+
+    section_seconds = {}
+    for r in completed:
+        for section in r["sections"]:
+            section_seconds.setdefault(section["section"], []).append(section["seconds"])
+
+    return {
+        "articles": articles,
+        "completed": len(completed),
+        "failed": [r["error"] for r in results if r["error"]],
+        "total_wall_seconds": round(total_wall, 3),
+        "articles_per_hour": round(len(completed) / total_wall * 3600, 1) if total_wall else 0,
+        "article_p50_seconds": round(percentile([r["wall_seconds"] for r in completed], 50), 3),
+        "article_p95_seconds": round(percentile([r["wall_seconds"] for r in completed], 95), 3),
+        "phases": phases,
+        "sections": {
+            name: {"mean_seconds": round(sum(values) / len(values), 3), "count": len(values)}
+            for name, values in section_seconds.items()
+        },
+        "section_failures": sum(
+            1 for r in completed for section in r["sections"] if section["status"] != "success"
+        ),
+        "model": {
+            "calls": sum(r["model_calls"] for r in results),
+            "failures": sum(r["model_failures"] for r in results),
+            "simulated_seconds": round(sum(r["model_seconds"] for r in results), 2),
+            "time_scale": backend.settings["time_scale"]
+        },
+        "resilience": {
+            "retries": sum(r["retries"] for r in results),
+            "retry_seconds": round(sum(r["retry_seconds"] for r in results), 2),
+            "short_circuits": sum(r["short_circuits"] for r in results)
+        },
+        "scores": [r["final_score"] for r in completed]
+    }
+
+def print_report(report: Dict[str, Any]):
+    """結果を表形式で表示"""
+    print("\n📊 記事パイプライン ベンチマーク結果")
+    print("=" * 72)
+    print(f"記事数: {report['completed']}/{report['articles']}  "
+          f"合計: {report['total_wall_seconds']}秒  記事/時: {report['articles_per_hour']}")
+    print(f"1記事あたり: p50 {report['article_p50_seconds']}秒 / p95 {report['article_p95_seconds']}秒")
+    model = report["model"]
+    print(f"モデル呼び出し: {model['calls']}回（失敗 {model['failures']}回）  "
+          f"待ち時間（実時間換算）: {model['simulated_seconds']}秒  倍率: {model['time_scale']}")
+    resilience = report["resilience"]
+    print(f"リトライ: {resilience['retries']}回（待ち {resilience['retry_seconds']}秒）  "
+          f"遮断による即時失敗: {resilience['short_circuits']}回")
+
+    print("-" * 72)
+    print(f"{'phase':<14} {'mean(s)':>9} {'p50(s)':>9} {'p95(s)':>9} {'share':>7}")
+    for phase, stats in report["phases"].items():
+        print(f"{phase:<14} {stats['mean_seconds']:>9} {stats['p50_seconds']:>9} "
+              f"{stats['p95_seconds']:>9} {stats['share']:>7.1%}")
+
+    if report["sections"]:
+        print("-" * 72)
+        print(f"AIセクション（失敗・タイムアウト {report['section_failures']}件）")
+        for name, stats in report["sections"].items():
+            print(f"  {name:<40} {stats['mean_seconds']:>8}秒 × {stats['count']}")
+
+    for error in report["failed"]:
+        print(f"❌ {error}")
+
+def main():
+    """ベンチマークのエントリポイント"""
+    parser = argparse.ArgumentParser(description="記事パイプラインのエンドツーエンドベンチマーク（モックLLM）")
+    parser.add_argument("--articles", type=int, default=3, help="生成する記事数")
+    parser.add_argument("--first-token", type=float, default=DEFAULT_MOCK_SETTINGS["first_token_latency"],
+                        help="最初のトークンまでの待ち時間（秒）")
+    parser.add_argument("--token-latency", type=float, default=DEFAULT_MOCK_SETTINGS["token_latency"],
+                        help="1トークンあたりの待ち時間（秒）")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="モデルの待ち時間の倍率（0なら待たない）")
+    parser.add_argument("--length-scale", type=float, default=1.0, help="出力文字数の倍率")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="モデル呼び出しが失敗する確率")
+    parser.add_argument("--recordings", default=None, help="記録済みMarkdownのディレクトリ（省略時は合成）")
+    parser.add_argument("--seed-posts", type=int, default=5, help="作業ディレクトリに用意する既存記事の数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    parser.add_argument("--check-links", action="store_true", help="校正でリンク切れを実際に確認する")
+    parser.add_argument("--cache-mode", choices=LLM_CACHE_MODES, default="off",
+                        help="応答キャッシュの動作モード（readwriteで同じプロンプトの再利用を計測）")
+    parser.add_argument("--verbose", action="store_true", help="パイプラインの出力を表示")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args()
+
+    backend_settings = {
+        "first_token_latency": args.first_token,
+        "token_latency": args.token_latency,
+        "time_scale": args.time_scale,
+        "length_scale": args.length_scale,
+        "failure_rate": args.failure_rate,
+        "recordings": args.recordings,
+        "seed": args.seed
+    }
+
+    print(f"⏱️  {args.articles}記事で計測中...", file=sys.stderr)
+    report = benchmark(args.articles, backend_settings, args.seed_posts, args.check_links, args.verbose,
+                       args.cache_mode)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+
+if __name__ == "__main__":
+    main()
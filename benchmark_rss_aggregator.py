@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+RSSAggregatorのスループットベンチマーク
+ローカルフィードサーバーに対してfetch_all_feedsを実行し、
+feeds/sec・p50/p99レイテンシ・転送量・パースCPU時間を計測する
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import tempfile
+import time
+from typing import Dict, List, Any
+
+from feed_fixture_server import FeedFixtureServer
+
+DEFAULT_SIZES = [5, 100, 1000]
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近傍法でパーセンタイルを求める"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def _serve(conn, server_options: Dict[str, Any]):
+    """子プロセスでフィードサーバーを動かす（計測側とGILを分けるため）"""
+    server = FeedFixtureServer(**server_options).start()
+    conn.send(server.feeds())
+    conn.recv()  # 停止指示を待つ
+    conn.send(server.stats)
+    server.stop()
+
+async def _run_fetch(feeds: List[Dict[str, str]], rounds: int, fetch_settings: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """fetch_all_feedsをrounds回実行し、ラウンドごとの結果を返す"""
+    from rss_aggregator import RSSAggregator
+
+    results = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        aggregator = RSSAggregator(feeds=feeds, cache_dir=cache_dir, **fetch_settings)
+        for round_index in range(rounds):
+            aggregator.fetch_stats = []
+            started = time.perf_counter()
+            articles = await aggregator.fetch_all_feeds()
+            wall = time.perf_counter() - started
+            results.append({
+                "round": round_index + 1,
+                "wall_seconds": wall,
+                "articles": len(articles),
+                "stats": aggregator.fetch_stats
+            })
+    return results
+
+def benchmark(num_feeds: int, rounds: int = 2, fetch_settings: Dict[str, Any] = None,
+              **server_options) -> Dict[str, Any]:
+    """指定フィード数でベンチマークを実行"""
+    parent_conn, child_conn = multiprocessing.Pipe()
+    server_options["num_feeds"] = num_feeds
+    process = multiprocessing.Process(target=_serve, args=(child_conn, server_options), daemon=True)
+    process.start()
+
+    try:
+        feeds = parent_conn.recv()
+        round_results = asyncio.run(_run_fetch(feeds, rounds, fetch_settings or {}))
+    finally:
+        parent_conn.send("stop")
+        server_stats = parent_conn.recv()
+        process.join(timeout=5)
+
+    report = {"feeds": num_feeds, "server": server_stats, "rounds": []}
+    for result in round_results:
+        stats = result["stats"]
+        latencies = [s["elapsed"] for s in stats]
+        report["rounds"].append({
+            "round": result["round"],
+            "wall_seconds": round(result["wall_seconds"], 3),
+            "feeds_per_sec": round(num_feeds / result["wall_seconds"], 1) if result["wall_seconds"] else 0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+            "bytes": sum(s["bytes"] for s in stats),
+            "parse_cpu_seconds": round(sum(s["parse_cpu"] for s in stats), 3),
+            "not_modified": sum(1 for s in stats if s["status"] == 304),
+            "failed": sum(1 for s in stats if s["status"] not in (200, 304)),
+            "articles": result["articles"]
+        })
+    return report
+
+def print_report(reports: List[Dict[str, Any]]):
+    """結果を表形式で表示"""
+    print("\n📊 RSSAggregator ベンチマーク結果")
+    print("=" * 96)
+    print(f"{'feeds':>6} {'round':>5} {'wall(s)':>8} {'feeds/s':>8} {'p50(ms)':>8} {'p99(ms)':>8} "
+          f"{'bytes':>11} {'parse CPU(s)':>12} {'304':>5} {'failed':>6}")
+    print("-" * 96)
+    for report in reports:
+        for r in report["rounds"]:
+            print(f"{report['feeds']:>6} {r['round']:>5} {r['wall_seconds']:>8} {r['feeds_per_sec']:>8} "
+                  f"{r['p50_ms']:>8} {r['p99_ms']:>8} {r['bytes']:>11,} {r['parse_cpu_seconds']:>12} "
+                  f"{r['not_modified']:>5} {r['failed']:>6}")
+
+def main():
+    """ベンチマークのエントリポイント"""
+    parser = argparse.ArgumentParser(description="RSSAggregatorのスループットベンチマーク")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="計測するフィード数")
+    parser.add_argument("--rounds", type=int, default=2, help="各サイズの実行回数（2回目以降はETag/304が効く）")
+    parser.add_argument("--latency", type=float, default=0.05, help="サーバー応答遅延（秒）")
+    parser.add_argument("--jitter", type=float, default=0.05, help="応答遅延の揺らぎ（秒）")
+    parser.add_argument("--entries", type=int, default=10, help="フィードあたりのエントリ数")
+    parser.add_argument("--summary-bytes", type=int, default=300, help="要約のサイズ（バイト）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503を返す確率")
+    parser.add_argument("--concurrency", type=int, default=64, help="同時に取得するフィード数の上限")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args()
+
+    # フィクスチャは全フィードが同一ホストなので、ホスト単位の制限は全体の上限に揃える
+    fetch_settings = {
+        "max_concurrency": args.concurrency,
+        "per_host_concurrency": args.concurrency,
+        "per_host_interval": 0.0
+    }
+
+    reports = []
+    for size in args.sizes:
+        print(f"⏱️  {size}フィードで計測中...")
+        reports.append(benchmark(
+            size,
+            rounds=args.rounds,
+            fetch_settings=fetch_settings,
+            entries_per_feed=args.entries,
+            latency=args.latency,
+            latency_jitter=args.jitter,
+            summary_bytes=args.summary_bytes,
+            error_rate=args.error_rate
+        ))
+
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+    else:
+        print_report(reports)
+
+if __name__ == "__main__":
+    main()
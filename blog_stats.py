@@ -5,9 +5,10 @@
 
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
-import json
 import re
 
+from state_files import save_json_state
+
 def generate_blog_stats():
     """ブログの統計情報を生成してJSONに保存"""
     
@@ -92,8 +93,7 @@ def generate_blog_stats():
     
     # JSONに保存
     stats_path = Path("blog_stats.json")
-    with open(stats_path, "w", encoding="utf-8") as f:
-        json.dump(stats, f, ensure_ascii=False, indent=2)
+    save_json_state(stats_path, stats, indent=2)
     
     # 統計レポートを表示
     print("📊 Alic AI Blog 統計レポート")
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+記事中のコードブロック検証
+Pythonはastで構文エラー・未使用の変数/import・import位置を、
+JavaScript/TypeScriptは簡易トークナイザで括弧・文字列の対応と未使用の変数を調べる
+（生成記事では同じスニペットが繰り返し現れるため、結果はブロックのハッシュでキャッシュする）
+"""
+
+import ast
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+CODE_FENCE_PATTERN = re.compile(r'^```([\w+#-]*)[^\n]*\n(.*?)\n```', re.MULTILINE | re.DOTALL)
+
+LANGUAGE_ALIASES = {
+    "python": "python", "py": "python", "python3": "python",
+    "javascript": "javascript", "js": "javascript", "mjs": "javascript",
+    "typescript": "javascript", "ts": "javascript",
+}
+
+# 検証結果のキャッシュ（ブロックのハッシュ → 問題のリスト）
+VALIDATION_CACHE_SIZE = 2048
+_VALIDATION_CACHE: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+validation_cache_stats = {"hits": 0, "misses": 0}
+
+def normalize_language(language: str) -> Optional[str]:
+    """フェンスの言語名を検証器の種類に変換（対象外はNone）"""
+    return LANGUAGE_ALIASES.get(language.lower())
+
+def iter_code_blocks(content: str) -> Iterator[Tuple[int, str, str]]:
+    """(ブロック番号, 言語, コード) をフェンスの出現順に返す"""
+    for index, match in enumerate(CODE_FENCE_PATTERN.finditer(content)):
+        yield index, match.group(1), match.group(2)
+
+def _issue(issue_type: str, severity: str, original: str, suggestion: str, line: int) -> Dict[str, Any]:
+    return {
+        "type": issue_type,
+        "severity": severity,
+        "line": line,
+        "original": original,
+        "suggestion": suggestion,
+        "auto_correctable": False
+    }
+
+def validate_code(code: str, language: str) -> List[Dict[str, Any]]:
+    """コードブロックを検証（対象外の言語は空リスト）"""
+    kind = normalize_language(language)
+    if kind is None:
+        return []
+
+    key = hashlib.sha1(f"{kind}\0{code}".encode("utf-8")).hexdigest()
+    if key in _VALIDATION_CACHE:
+        validation_cache_stats["hits"] += 1
+        _VALIDATION_CACHE.move_to_end(key)
+    else:
+        validation_cache_stats["misses"] += 1
+        issues = _validate_python(code) if kind == "python" else _validate_javascript(code)
+        _VALIDATION_CACHE[key] = issues
+        if len(_VALIDATION_CACHE) > VALIDATION_CACHE_SIZE:
+            _VALIDATION_CACHE.popitem(last=False)
+
+    # 呼び出し側がlocationなどを書き足すのでコピーを返す
+    return [dict(issue) for issue in _VALIDATION_CACHE[key]]
+
+# --- Python ---
+
+def _validate_python(code: str) -> List[Dict[str, Any]]:
+    """astで構文エラー・未使用の名前・import位置を調べる"""
+    lines = code.split("\n")
+    # 対話セッションの出力は検証しない
+    if any(line.startswith(">>> ") for line in lines):
+        return []
+    # IPythonのマジックコマンド（!pip, %timeit）は行番号を保ったまま空行にする
+    source = "\n".join("" if line.lstrip().startswith(("!", "%")) else line for line in lines)
+
+    try:
+        tree = compile(source, "<code block>", "exec", ast.PyCF_ONLY_AST | ast.PyCF_ALLOW_TOP_LEVEL_AWAIT)
+    except SyntaxError as e:
+        line_number = e.lineno or 1
+        line_text = lines[line_number - 1].strip() if 0 < line_number <= len(lines) else ""
+        return [_issue("syntax_error", "high", line_text, f"構文エラー: {e.msg}", line_number)]
+
+    issues = []
+    issues.extend(_python_import_order(tree))
+    issues.extend(_python_unused_imports(tree))
+    issues.extend(_python_unused_locals(tree))
+    return sorted(issues, key=lambda issue: issue["line"])
+
+def _is_import(statement: ast.stmt) -> bool:
+    if isinstance(statement, (ast.Import, ast.ImportFrom)):
+        return True
+    # try: import x / except ImportError: のようなブロックもimportとみなす
+    if isinstance(statement, ast.Try):
+        return all(isinstance(s, (ast.Import, ast.ImportFrom)) for s in statement.body)
+    return False
+
+def _python_import_order(tree: ast.Module) -> List[Dict[str, Any]]:
+    """先頭以外に置かれたモジュールレベルのimport"""
+    issues = []
+    seen_code = False
+    for position, statement in enumerate(tree.body):
+        is_docstring = (position == 0 and isinstance(statement, ast.Expr)
+                        and isinstance(statement.value, ast.Constant) and isinstance(statement.value.value, str))
+        if is_docstring:
+            continue
+        if _is_import(statement):
+            if seen_code:
+                issues.append(_issue(
+                    "import_order", "low", ast.unparse(statement).split("\n")[0],
+                    "Import文を先頭にまとめる", statement.lineno
+                ))
+        else:
+            seen_code = True
+    return issues
+
+def _loaded_names(tree: ast.AST) -> set:
+    """読み出されている名前（__all__の文字列も含む）"""
+    names = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Store)}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.AugAssign) and isinstance(node.target, ast.Name):
+            names.add(node.target.id)
+        if (isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "__all__" for t in node.targets)
+                and isinstance(node.value, (ast.List, ast.Tuple))):
+            names.update(e.value for e in node.value.elts if isinstance(e, ast.Constant) and isinstance(e.value, str))
+    return names
+
+def _python_unused_imports(tree: ast.Module) -> List[Dict[str, Any]]:
+    """モジュールレベルで使われていないimport"""
+    loaded = _loaded_names(tree)
+    issues = []
+    for statement in tree.body:
+        if not isinstance(statement, (ast.Import, ast.ImportFrom)):
+            continue
+        if isinstance(statement, ast.ImportFrom) and statement.module == "__future__":
+            continue
+        for alias in statement.names:
+            if alias.name == "*":
+                continue
+            bound = alias.asname or alias.name.split(".")[0]
+            if bound not in loaded and not bound.startswith("_"):
+                issues.append(_issue("unused_import", "low", bound, f"未使用のimport {bound}", statement.lineno))
+    return issues
+
+def _scope_statements(function: ast.AST) -> Iterator[ast.AST]:
+    """関数本体のノード（入れ子の関数・クラス・内包表記の中は除く）"""
+    stack = list(function.body)
+    while stack:
+        node = stack.pop()
+        yield node
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda,
+                                  ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+                continue
+            stack.append(child)
+
+def _python_unused_locals(tree: ast.Module) -> List[Dict[str, Any]]:
+    """関数内で代入だけされて読まれないローカル変数"""
+    issues = []
+    for function in ast.walk(tree):
+        if not isinstance(function, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+
+        assigned: Dict[str, int] = {}
+        declared_outer = set()
+        uses_locals = False
+        for node in _scope_statements(function):
+            if isinstance(node, (ast.Global, ast.Nonlocal)):
+                declared_outer.update(node.names)
+            elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in ("locals", "vars"):
+                uses_locals = True
+            elif isinstance(node, ast.Assign):
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        assigned.setdefault(target.id, node.lineno)
+            elif isinstance(node, ast.AnnAssign) and node.value is not None and isinstance(node.target, ast.Name):
+                assigned.setdefault(node.target.id, node.lineno)
+
+        if uses_locals:
+            continue
+        # 入れ子の関数（クロージャ）からの参照も使用とみなす
+        loaded = _loaded_names(function)
+        for name, line_number in assigned.items():
+            if name in loaded or name in declared_outer or name.startswith("_"):
+                continue
+            issues.append(_issue("unused_variable", "low", name, f"未使用の変数 {name}", line_number))
+    return issues
+
+# --- JavaScript / TypeScript ---
+
+JS_REGEX_PRECEDING_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw", "yield", "await"}
+JS_BRACKETS = {")": "(", "]": "[", "}": "{"}
+JSX_PATTERN = re.compile(r'(?:return|=>|=)\s*\(?\s*<[A-Za-z>]|^\s*<[A-Z][\w.]*[\s/>]', re.MULTILINE)
+JS_DECLARATION_KEYWORDS = {"const", "let", "var"}
+
+def _tokenize_javascript(code: str) -> Tuple[List[Tuple[str, str, int]], List[Dict[str, Any]]]:
+    """(種類, 値, 行) のトークン列と、字句・括弧の対応エラーを返す"""
+    tokens: List[Tuple[str, str, int]] = []
+    errors: List[Dict[str, Any]] = []
+    brackets: List[Tuple[str, int]] = []
+    # テンプレート文字列の ${ ... } の入れ子（該当する{の深さを記録）
+    template_depths: List[int] = []
+    position = 0
+    line = 1
+    length = len(code)
+
+    def previous_allows_regex() -> bool:
+        if not tokens:
+            return True
+        kind, value, _ = tokens[-1]
+        if kind == "punct":
+            return value not in (")", "]", "}")
+        return kind == "name" and value in JS_REGEX_PRECEDING_KEYWORDS
+
+    def scan_template(start: int, start_line: int) -> Tuple[int, int, bool]:
+        """テンプレート文字列をバッククォートか ${ まで読む（戻り値: 位置, 行, ${で止まったか）"""
+        i, current_line = start, start_line
+        while i < length:
+            char = code[i]
+            if char == "\\":
+                i += 2
+                continue
+            if char == "\n":
+                current_line += 1
+            if char == "`":
+                return i + 1, current_line, False
+            if char == "$" and i + 1 < length and code[i + 1] == "{":
+                return i + 2, current_line, True
+            i += 1
+        errors.append(_issue("syntax_error", "high", "`", "構文エラー: テンプレート文字列が閉じられていません", start_line))
+        return length, current_line, False
+
+    while position < length:
+        char = code[position]
+
+        if char == "\n":
+            line += 1
+            position += 1
+        elif char.isspace():
+            position += 1
+        elif code.startswith("//", position):
+            end = code.find("\n", position)
+            position = length if end < 0 else end
+        elif code.startswith("/*", position):
+            end = code.find("*/", position + 2)
+            if end < 0:
+                errors.append(_issue("syntax_error", "high", "/*", "構文エラー: コメントが閉じられていません", line))
+                break
+            line += code.count("\n", position, end)
+            position = end + 2
+        elif char in ("'", '"'):
+            i = position + 1
+            while i < length and code[i] != char and code[i] != "\n":
+                i += 2 if code[i] == "\\" else 1
+            if i >= length or code[i] != char:
+                errors.append(_issue("syntax_error", "high", code[position:i].strip()[:40],
+                                     "構文エラー: 文字列が閉じられていません", line))
+                position = i
+            else:
+                tokens.append(("string", code[position:i + 1], line))
+                position = i + 1
+        elif char == "`":
+            start_line = line
+            position, line, opened = scan_template(position + 1, line)
+            tokens.append(("string", "`", start_line))
+            if opened:
+                brackets.append(("{", line))
+                template_depths.append(len(brackets))
+        elif char == "/" and previous_allows_regex():
+            i = position + 1
+            in_class = False
+            while i < length and code[i] != "\n":
+                if code[i] == "\\":
+                    i += 2
+                    continue
+                if code[i] == "[":
+                    in_class = True
+                elif code[i] == "]":
+                    in_class = False
+                elif code[i] == "/" and not in_class:
+                    break
+                i += 1
+            if i >= length or code[i] != "/":
+                errors.append(_issue("syntax_error", "high", code[position:i].strip()[:40],
+                                     "構文エラー: 正規表現リテラルが閉じられていません", line))
+                position = i
+                continue
+            i += 1
+            while i < length and (code[i].isalnum() or code[i] == "_"):
+                i += 1
+            tokens.append(("regex", code[position:i], line))
+            position = i
+        elif char.isalpha() or char in "_$":
+            i = position + 1
+            while i < length and (code[i].isalnum() or code[i] in "_$"):
+                i += 1
+            tokens.append(("name", code[position:i], line))
+            position = i
+        elif char.isdigit():
+            i = position + 1
+            while i < length and (code[i].isalnum() or code[i] in "._"):
+                i += 1
+            tokens.append(("number", code[position:i], line))
+            position = i
+        else:
+            if char in "([{":
+                brackets.append((char, line))
+            elif char in ")]}":
+                if not brackets or brackets[-1][0] != JS_BRACKETS[char]:
+                    errors.append(_issue("syntax_error", "high", char, f"構文エラー: 対応しない括弧 '{char}'", line))
+                    break
+                brackets.pop()
+                # テンプレート文字列の ${ ... } が閉じたら文字列の続きを読む
+                if char == "}" and template_depths and template_depths[-1] == len(brackets) + 1:
+                    template_depths.pop()
+                    position, line, opened = scan_template(position + 1, line)
+                    if opened:
+                        brackets.append(("{", line))
+                        template_depths.append(len(brackets))
+                    continue
+            tokens.append(("punct", char, line))
+            position += 1
+
+    if not errors and brackets:
+        bracket, bracket_line = brackets[-1]
+        errors.append(_issue("syntax_error", "high", bracket, f"構文エラー: 括弧 '{bracket}' が閉じられていません", bracket_line))
+
+    return tokens, errors
+
+def _validate_javascript(code: str) -> List[Dict[str, Any]]:
+    """字句・括弧の対応と、宣言だけされて参照されない変数を調べる"""
+    # JSXはトークナイザの対象外（タグ内の文章を文字列と誤認するため）
+    if JSX_PATTERN.search(code):
+        return []
+
+    tokens, errors = _tokenize_javascript(code)
+    if errors:
+        return errors
+
+    declarations: Dict[str, Tuple[int, int]] = {}
+    references: Dict[str, int] = {}
+    for index, (kind, value, line_number) in enumerate(tokens):
+        if kind != "name":
+            continue
+        previous = tokens[index - 1] if index else None
+        if previous and previous[0] == "name" and previous[1] in JS_DECLARATION_KEYWORDS:
+            exported = index >= 2 and tokens[index - 2][1] == "export"
+            if not exported:
+                declarations.setdefault(value, (line_number, index))
+            continue
+        # obj.name のプロパティ参照は変数の使用とみなさない
+        if previous and previous[1] == "." and previous[0] == "punct":
+            continue
+        references[value] = references.get(value, 0) + 1
+
+    issues = []
+    for name, (line_number, _) in declarations.items():
+        if not references.get(name) and not name.startswith("_"):
+            issues.append(_issue("unused_variable", "low", name, f"未使用の変数 {name}", line_number))
+    return sorted(issues, key=lambda issue: issue["line"])
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+範囲指定の自動修正エンジン
+検出時に記録した文字範囲（span）から編集を作り、重なりを優先度で解決したうえで
+本文を1回の走査で組み立て直す。ルールごとに適用範囲（地の文/コード）を限定できる
+"""
+
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, List, Any, Tuple
+
+FENCED_CODE_PATTERN = re.compile(r'^```[^\n]*\n.*?^```', re.MULTILINE | re.DOTALL)
+INLINE_CODE_PATTERN = re.compile(r'`[^`\n]+`')
+
+# 重なった編集は重大度の高い問題を優先する
+SEVERITY_PRIORITY = {"high": 3, "medium": 2, "low": 1}
+
+# 適用範囲: prose=地の文のみ、code=コード（フェンス・インラインコード）のみ、all=制限なし
+SCOPES = ("prose", "code", "all")
+
+@dataclass
+class Edit:
+    """本文の content[start:end] を replacement に置き換える編集"""
+    start: int
+    end: int
+    replacement: str
+    priority: int = 0
+    issue_index: int = -1
+
+def code_regions(content: str) -> List[Tuple[int, int]]:
+    """コード領域（フェンスとインラインコード）の範囲を開始位置順に返す"""
+    regions = [match.span() for match in FENCED_CODE_PATTERN.finditer(content)]
+    fenced = list(regions)
+    fence_starts = [start for start, _ in fenced]
+    for match in INLINE_CODE_PATTERN.finditer(content):
+        index = bisect_right(fence_starts, match.start()) - 1
+        if index >= 0 and match.start() < fenced[index][1]:
+            continue
+        regions.append(match.span())
+    return sorted(regions)
+
+def _inside(regions: List[Tuple[int, int]], starts: List[int], start: int, end: int) -> bool:
+    """[start, end) がいずれかの領域に完全に含まれるか"""
+    index = bisect_right(starts, start) - 1
+    return index >= 0 and end <= regions[index][1]
+
+def _overlaps(regions: List[Tuple[int, int]], starts: List[int], start: int, end: int) -> bool:
+    """[start, end) がいずれかの領域と重なるか"""
+    index = bisect_right(starts, start) - 1
+    if index >= 0 and regions[index][1] > start:
+        return True
+    return index + 1 < len(regions) and regions[index + 1][0] < end
+
+def edits_from_issues(content: str, issues: List[Dict[str, Any]]) -> List[Edit]:
+    """自動修正可能な問題のspanから、適用範囲に合う編集を作る"""
+    regions = code_regions(content)
+    starts = [start for start, _ in regions]
+    edits = []
+
+    for index, issue in enumerate(issues):
+        replacement = issue.get("replacement")
+        if not issue.get("auto_correctable") or replacement is None:
+            continue
+        scope = issue.get("scope", "all")
+        priority = SEVERITY_PRIORITY.get(issue.get("severity"), 0)
+
+        for start, end in issue.get("spans", []):
+            if content[start:end] == replacement:
+                continue
+            if scope == "prose" and _overlaps(regions, starts, start, end):
+                continue
+            if scope == "code" and not _inside(regions, starts, start, end):
+                continue
+            edits.append(Edit(start, end, replacement, priority, index))
+
+    return edits
+
+def resolve_edits(edits: List[Edit]) -> Tuple[List[Edit], List[Edit]]:
+    """重ならない編集の集合を選ぶ（優先度の高いもの、同じなら前・長いものを先に採用）"""
+    accepted: List[Edit] = []
+    accepted_starts: List[int] = []
+    rejected = []
+
+    for edit in sorted(edits, key=lambda e: (-e.priority, e.start, -(e.end - e.start))):
+        index = bisect_right(accepted_starts, edit.start)
+        before = accepted[index - 1] if index > 0 else None
+        after = accepted[index] if index < len(accepted) else None
+        if (before and before.end > edit.start) or (after and after.start < edit.end) \
+                or (before and before.start == edit.start):
+            rejected.append(edit)
+            continue
+        accepted.insert(index, edit)
+        accepted_starts.insert(index, edit.start)
+
+    return accepted, rejected
+
+def apply_edits(content: str, edits: List[Edit]) -> str:
+    """開始位置順で重ならない編集を1回の走査で適用"""
+    parts = []
+    position = 0
+    for edit in edits:
+        parts.append(content[position:edit.start])
+        parts.append(edit.replacement)
+        position = edit.end
+    parts.append(content[position:])
+    return "".join(parts)
+
+def compact_diff(content: str, edits: List[Edit]) -> List[Dict[str, Any]]:
+    """ログ用の簡潔な差分（行・桁・置換前後）"""
+    line_starts = [0] + [match.end() for match in re.finditer("\n", content)]
+    diff = []
+    for edit in edits:
+        line_index = bisect_right(line_starts, edit.start) - 1
+        diff.append({
+            "line": line_index + 1,
+            "column": edit.start - line_starts[line_index] + 1,
+            "-": content[edit.start:edit.end],
+            "+": edit.replacement
+        })
+    return diff
+
+def correct(content: str, issues: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """問題リストから自動修正を適用し、(修正後の本文, 問題ごとの修正記録, 差分) を返す"""
+    accepted, _ = resolve_edits(edits_from_issues(content, issues))
+
+    applied_counts: Dict[int, int] = {}
+    for edit in accepted:
+        applied_counts[edit.issue_index] = applied_counts.get(edit.issue_index, 0) + 1
+
+    corrections = []
+    for index in sorted(applied_counts):
+        issue = issues[index]
+        corrections.append({
+            "type": issue["type"],
+            "original": issue.get("pattern", issue.get("original", "")),
+            "corrected": issue["replacement"],
+            "location": issue.get("location", ""),
+            "occurrences": applied_counts[index]
+        })
+
+    return apply_edits(content, accepted), corrections, compact_diff(content, accepted)
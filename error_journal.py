@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+エラーの追記専用ジャーナル
+エラーと修復の結果を1件1行でerror_journal.jsonlに追記し、スタックトレースは
+フィンガープリント（例外の種類と呼び出し位置のハッシュ）ごとに1回だけerror_tracebacks.jsonlへ保存する。
+種類別・修復戦略別の件数はメモリ上で数え、一定件数・一定時間ごとにerror_statistics.jsonへ書き出す
+（書き出し前に止まっても、次回はジャーナルの続きから数え直す）。エラーが続いても1件あたりの処理は一定
+"""
+
+import hashlib
+import re
+import time
+import traceback
+from collections import Counter
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from append_log import AppendOnlyLog
+from state_files import CorruptStateFileError, load_json_state, quarantine_corrupt_file, save_json_state
+
+# 日本標準時のタイムゾーン
+JST = timezone(timedelta(hours=9))
+
+ERROR_JOURNAL_FILE = Path("error_journal.jsonl")
+ERROR_TRACEBACKS_FILE = Path("error_tracebacks.jsonl")
+ERROR_STATISTICS_FILE = Path("error_statistics.json")
+LEGACY_ERROR_LOG_FILE = Path("error_recovery_log.json")
+
+STATISTICS_VERSION = 1
+STATISTICS_FLUSH_EVENTS = 20     # この件数ごとに集計を書き出す
+STATISTICS_FLUSH_SECONDS = 60.0  # 前回の書き出しからこの秒数が経っていれば書き出す
+MAX_MESSAGE_LENGTH = 500
+
+FRAME_PATTERN = re.compile(r'File "([^"]+)", line \d+, in (\S+)')
+
+def traceback_fingerprint(error_type: str, traceback_text: str) -> str:
+    """例外の種類と呼び出し位置（ファイルと関数。行番号とメッセージは含めない）のハッシュ"""
+    frames = FRAME_PATTERN.findall(traceback_text or "")
+    material = "\n".join([error_type] + [f"{Path(filename).name}:{function}" for filename, function in frames])
+    return hashlib.sha1(material.encode("utf-8")).hexdigest()[:16]
+
+def format_error_traceback(error: Exception) -> str:
+    """例外のスタックトレース（exceptの外で呼ばれても例外自身のトレースバックを使う）"""
+    return "".join(traceback.format_exception(type(error), error, error.__traceback__))
+
+class ErrorJournal:
+    """エラー・修復の追記専用ジャーナルと、重複を除いたスタックトレース、メモリ上の件数"""
+
+    def __init__(self, journal_file=ERROR_JOURNAL_FILE, tracebacks_file=ERROR_TRACEBACKS_FILE,
+                 statistics_file=ERROR_STATISTICS_FILE, flush_events: int = STATISTICS_FLUSH_EVENTS,
+                 flush_seconds: float = STATISTICS_FLUSH_SECONDS):
+        self.journal = AppendOnlyLog(journal_file)
+        self.tracebacks = AppendOnlyLog(tracebacks_file)
+        self.statistics_file = Path(statistics_file)
+        self.flush_events = flush_events
+        self.flush_seconds = flush_seconds
+        # 保存済みのスタックトレース（一意なものだけなので全件読んでも小さい）
+        self.known_fingerprints = {record["fingerprint"] for record in self.tracebacks}
+        self.pending_events = 0
+        self.last_flush = time.monotonic()
+        self.load_statistics()
+
+    def reset_statistics(self):
+        self.journal_count = 0
+        self.errors_by_type: Counter = Counter()
+        self.errors_by_fingerprint: Counter = Counter()
+        self.recoveries_by_handler: Dict[str, Counter] = {}
+        self.first_error_at = None
+        self.last_error_at = None
+
+    def load_statistics(self):
+        """保存済みの集計を読み込み、その後にジャーナルへ追記された分を数え直す"""
+        self.reset_statistics()
+        try:
+            state = load_json_state(self.statistics_file)
+        except CorruptStateFileError as e:
+            # ジャーナルから作り直せるので退避して数え直す
+            quarantine_corrupt_file(e.path)
+            state = None
+        if state and state.get("version") == STATISTICS_VERSION and state["journal_count"] <= len(self.journal):
+            self.journal_count = state["journal_count"]
+            self.errors_by_type.update(state["errors_by_type"])
+            self.errors_by_fingerprint.update(state["errors_by_fingerprint"])
+            self.recoveries_by_handler = {
+                handler: Counter(counts) for handler, counts in state["recoveries_by_handler"].items()
+            }
+            self.first_error_at = state.get("first_error_at")
+            self.last_error_at = state.get("last_error_at")
+
+        for record in self.journal.iter_from(self.journal_count):
+            self._count(record)
+
+    def _count(self, record: Dict[str, Any]):
+        """ジャーナルの1件を件数に反映"""
+        self.journal_count += 1
+        if record["kind"] == "error":
+            self.errors_by_type[record["error_type"]] += 1
+            self.errors_by_fingerprint[record["fingerprint"]] += 1
+            self.first_error_at = self.first_error_at or record["timestamp"]
+            self.last_error_at = record["timestamp"]
+        else:
+            counts = self.recoveries_by_handler.setdefault(record.get("handler") or "none", Counter())
+            counts["success" if record["success"] else "failure"] += 1
+
+    def _append(self, record: Dict[str, Any]):
+        self.journal.append(record)
+        self._count(record)
+        self.pending_events += 1
+        if self.pending_events >= self.flush_events or time.monotonic() - self.last_flush >= self.flush_seconds:
+            self.flush()
+
+    def _store_traceback(self, fingerprint: str, error_type: str, traceback_text: str, timestamp: str):
+        """初めて見るスタックトレースだけを保存"""
+        if fingerprint in self.known_fingerprints:
+            return
+        self.tracebacks.append({
+            "timestamp": timestamp,
+            "fingerprint": fingerprint,
+            "error_type": error_type,
+            "traceback": traceback_text
+        })
+        self.known_fingerprints.add(fingerprint)
+
+    def record_error(self, error: Exception, context: Dict[str, Any] = None,
+                     traceback_text: str = None) -> Dict[str, Any]:
+        """エラーを1件追記し、記録したレコードを返す"""
+        error_type = type(error).__name__
+        traceback_text = traceback_text or format_error_traceback(error)
+        fingerprint = traceback_fingerprint(error_type, traceback_text)
+        timestamp = datetime.now(JST).isoformat()
+        self._store_traceback(fingerprint, error_type, traceback_text, timestamp)
+        record = {
+            "timestamp": timestamp,
+            "kind": "error",
+            "error_type": error_type,
+            "error_message": str(error)[:MAX_MESSAGE_LENGTH],
+            "fingerprint": fingerprint,
+            "context": context or {}
+        }
+        self._append(record)
+        return record
+
+    def record_recovery(self, error_record: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+        """修復の結果を1件追記"""
+        record = {
+            "timestamp": datetime.now(JST).isoformat(),
+            "kind": "recovery",
+            "error_type": error_record["error_type"],
+            "fingerprint": error_record["fingerprint"],
+            "handler": result.get("handler"),
+            "success": bool(result.get("success")),
+            "strategy": result.get("strategy") or result.get("reason"),
+            "action": result.get("action")
+        }
+        self._append(record)
+        return record
+
+    def flush(self):
+        """メモリ上の件数を書き出す"""
+        save_json_state(self.statistics_file, self.statistics(), indent=2)
+        self.pending_events = 0
+        self.last_flush = time.monotonic()
+
+    def statistics(self) -> Dict[str, Any]:
+        """種類別・フィンガープリント別のエラー件数と、修復戦略別の成否"""
+        return {
+            "version": STATISTICS_VERSION,
+            "journal_count": self.journal_count,
+            "errors_by_type": dict(self.errors_by_type),
+            "errors_by_fingerprint": dict(self.errors_by_fingerprint),
+            "recoveries_by_handler": {handler: dict(counts) for handler, counts in self.recoveries_by_handler.items()},
+            "first_error_at": self.first_error_at,
+            "last_error_at": self.last_error_at
+        }
+
+    def recent(self, n: int) -> List[Dict[str, Any]]:
+        """最新n件の記録（古い順）"""
+        return self.journal.tail(n)
+
+    def traceback_for(self, fingerprint: str) -> Optional[str]:
+        """フィンガープリントのスタックトレース"""
+        for record in self.tracebacks:
+            if record["fingerprint"] == fingerprint:
+                return record["traceback"]
+        return None
+
+    def import_legacy_log(self, legacy_file=LEGACY_ERROR_LOG_FILE) -> Tuple[int, int]:
+        """旧形式のerror_recovery_log.jsonを取り込み、.json.migratedに改名する（エラー数, 修復数）"""
+        legacy_file = Path(legacy_file)
+        try:
+            legacy = load_json_state(legacy_file)
+        except CorruptStateFileError as e:
+            quarantine_corrupt_file(e.path)
+            return 0, 0
+        if legacy is None:
+            return 0, 0
+
+        errors = legacy.get("errors", [])
+        recoveries = legacy.get("recoveries", [])
+        if len(self.journal) == 0:
+            records = []
+            for error in errors:
+                fingerprint = traceback_fingerprint(error["error_type"], error.get("traceback", ""))
+                self._store_traceback(fingerprint, error["error_type"], error.get("traceback", ""), error["timestamp"])
+                records.append({
+                    "timestamp": error["timestamp"],
+                    "kind": "error",
+                    "error_type": error["error_type"],
+                    "error_message": error.get("error_message", "")[:MAX_MESSAGE_LENGTH],
+                    "fingerprint": fingerprint,
+                    "context": error.get("context", {})
+                })
+            for recovery in recoveries:
+                records.append({
+                    "timestamp": recovery["timestamp"],
+                    "kind": "recovery",
+                    "error_type": recovery["error_type"],
+                    "fingerprint": None,
+                    "handler": None,
+                    "success": recovery.get("success", True),
+                    "strategy": recovery.get("strategy"),
+                    "action": None
+                })
+            records.sort(key=lambda record: record["timestamp"])
+            self.journal.append_many(records)
+            for record in records:
+                self._count(record)
+            self.flush()
+
+        legacy_file.rename(legacy_file.with_suffix(".json.migrated"))
+        return len(errors), len(recoveries)
@@ -5,13 +5,13 @@
 """
 
 import asyncio
-import json
-import time
-import traceback
 from pathlib import Path
-from datetime import datetime, timezone, timedelta
+from datetime import timezone, timedelta
 import logging
 import subprocess
+from error_journal import ErrorJournal
+from resilience import backoff_delay, load_resilience_settings
+from state_files import corrupt_file_from_error, find_corrupt_state_files, quarantine_corrupt_file
 
 # 日本標準時のタイムゾーン
 JST = timezone(timedelta(hours=9))
@@ -24,47 +24,31 @@ class ErrorRecoverySystem:
     """エラー自動修復システム"""
     
     def __init__(self):
-        self.error_log_file = Path("error_recovery_log.json")
+        self.resilience_settings = load_resilience_settings()
         self.recovery_strategies = {
+            "CircuitOpenError": self._recover_from_circuit_open,
             "TaskGroup": self._recover_from_taskgroup_error,
             "TimeoutError": self._recover_from_timeout,
             "ImportError": self._recover_from_import_error,
             "FileNotFoundError": self._recover_from_file_not_found,
             "JSONDecodeError": self._recover_from_json_error,
+            "CorruptStateFile": self._recover_from_json_error,
             "claude": self._recover_from_claude_error,
         }
-        self.load_error_log()
+        # エラーと修復の結果は追記専用のジャーナルに1件ずつ記録する（旧形式のログは初回に取り込む）
+        self.error_journal = ErrorJournal()
+        self.error_journal.import_legacy_log()
     
-    def load_error_log(self):
-        """エラーログを読み込む"""
-        if self.error_log_file.exists():
-            with open(self.error_log_file, "r", encoding="utf-8") as f:
-                self.error_log = json.load(f)
-        else:
-            self.error_log = {
-                "errors": [],
-                "recoveries": [],
-                "statistics": {}
-            }
-    
-    def save_error_log(self):
-        """エラーログを保存"""
-        with open(self.error_log_file, "w", encoding="utf-8") as f:
-            json.dump(self.error_log, f, ensure_ascii=False, indent=2)
+    def flush(self):
+        """未書き出しのエラー件数があれば書き出す"""
+        if self.error_journal.pending_events:
+            self.error_journal.flush()
     
     async def handle_error(self, error: Exception, context: dict = None):
         """エラーを処理し、可能であれば自動修復を試みる"""
         
-        error_info = {
-            "timestamp": datetime.now(JST).isoformat(),
-            "error_type": type(error).__name__,
-            "error_message": str(error),
-            "traceback": traceback.format_exc(),
-            "context": context or {}
-        }
-        
-        # エラーログに記録
-        self.error_log["errors"].append(error_info)
+        # ジャーナルに記録（スタックトレースは初めて見るものだけ保存）
+        error_info = self.error_journal.record_error(error, context)
         logger.error(f"エラーを検出: {error_info['error_type']} - {error_info['error_message']}")
         
         # 自動修復を試みる
@@ -72,16 +56,10 @@ class ErrorRecoverySystem:
         
         if recovery_result["success"]:
             logger.info(f"✅ エラーから自動修復しました: {recovery_result['strategy']}")
-            self.error_log["recoveries"].append({
-                "timestamp": datetime.now(JST).isoformat(),
-                "error_type": error_info["error_type"],
-                "strategy": recovery_result["strategy"],
-                "success": True
-            })
         else:
             logger.error(f"❌ 自動修復に失敗しました: {recovery_result['reason']}")
         
-        self.save_error_log()
+        self.error_journal.record_recovery(error_info, recovery_result)
         return recovery_result
     
     async def _attempt_recovery(self, error: Exception, error_info: dict):
@@ -92,8 +70,9 @@ class ErrorRecoverySystem:
             if error_keyword in error_info["error_type"] or error_keyword in error_info["error_message"]:
                 try:
                     result = await recovery_function(error, error_info)
-                    if result["success"]:
-                        return result
+                    # 失敗でも次の行動（認証待ち・遮断中など）が決まっていればそれを返す
+                    if result["success"] or result.get("action"):
+                        return {**result, "handler": error_keyword}
                 except Exception as e:
                     logger.error(f"修復戦略の実行中にエラー: {e}")
         
@@ -102,53 +81,41 @@ class ErrorRecoverySystem:
             "reason": "適切な修復戦略が見つかりませんでした"
         }
     
+    def _retry_after_backoff(self, error_info, strategy):
+        """回復性レイヤーと同じバックオフで待ってから再試行させる"""
+        attempt = error_info["context"].get("retry_count", 1)
+        return {
+            "success": True,
+            "strategy": strategy,
+            "action": "retry",
+            "delay": backoff_delay(attempt, self.resilience_settings)
+        }
+    
+    async def _recover_from_circuit_open(self, error, error_info):
+        """サーキットブレーカーの遮断中はすぐに諦める"""
+        
+        logger.info("モデルのバックエンドが不調のため、再試行せずに終了します")
+        return {
+            "success": False,
+            "reason": "サーキットブレーカーが遮断中",
+            "action": "circuit_open",
+            "retry_after": getattr(error, "retry_after", None)
+        }
+    
     async def _recover_from_taskgroup_error(self, error, error_info):
         """TaskGroupエラーからの回復"""
         
         logger.info("TaskGroupエラーの修復を試みています...")
         
-        # 戦略1: CLIフォールバックを強制
-        try:
-            # claude_code_integration.pyでCLI使用を強制
-            integration_path = Path(__file__).parent.parent / "src" / "claude_code_integration.py"
-            if integration_path.exists():
-                content = integration_path.read_text(encoding='utf-8')
-                # use_cli_fallbackをTrueに設定
-                if "self.use_cli_fallback = False" in content:
-                    content = content.replace("self.use_cli_fallback = False", "self.use_cli_fallback = True")
-                    integration_path.write_text(content, encoding='utf-8')
-                    
-                    return {
-                        "success": True,
-                        "strategy": "CLIフォールバックを強制的に有効化"
-                    }
-        except Exception as e:
-            logger.error(f"CLIフォールバック設定エラー: {e}")
-        
-        # 戦略2: シンプルな記事生成に切り替え
-        try:
-            # single_prompt_article_generator.pyを使用
-            subprocess.run(["python", "single_prompt_article_generator.py"], check=True)
-            return {
-                "success": True,
-                "strategy": "シンプルな記事生成システムに切り替え"
-            }
-        except Exception as e:
-            logger.error(f"代替生成システムエラー: {e}")
-        
-        return {"success": False, "reason": "TaskGroupエラーの修復に失敗"}
+        # CLIフォールバックへの切り替えは回復性レイヤーが設定（cli_fallback_on）に従って行う
+        return self._retry_after_backoff(error_info, "バックオフ後に再試行")
     
     async def _recover_from_timeout(self, error, error_info):
         """タイムアウトエラーからの回復"""
         
         logger.info("タイムアウトエラーの修復を試みています...")
         
-        # 戦略: より短いプロンプトで再試行
-        return {
-            "success": True,
-            "strategy": "より短いプロンプトで再試行",
-            "action": "retry_with_shorter_prompt"
-        }
+        return self._retry_after_backoff(error_info, "バックオフ後に再試行")
     
     async def _recover_from_import_error(self, error, error_info):
         """インポートエラーからの回復"""
@@ -191,27 +158,27 @@ class ErrorRecoverySystem:
         
         logger.info("JSONエラーの修復を試みています...")
         
-        # 破損したJSONファイルをバックアップして初期化
-        json_files = list(Path(".").glob("*.json"))
+        # 例外を起こしたファイルを特定し、分からなければ検証インデックスにある状態ファイルだけを確認する
+        path = corrupt_file_from_error(error) or error_info["context"].get("path")
+        corrupt_files = [Path(path)] if path else find_corrupt_state_files()
+        if not corrupt_files:
+            return {"success": False, "reason": "破損したJSONファイルを特定できませんでした"}
         
-        for json_file in json_files:
-            try:
-                with open(json_file, "r", encoding="utf-8") as f:
-                    json.load(f)
-            except json.JSONDecodeError:
-                # バックアップ
-                backup_path = json_file.with_suffix(f".backup_{int(time.time())}.json")
-                json_file.rename(backup_path)
-                
-                # 空のJSONで初期化
-                with open(json_file, "w", encoding="utf-8") as f:
-                    json.dump({}, f)
-                
-                logger.info(f"破損したJSONファイルを初期化: {json_file}")
+        # 退避して、読み込み側が既定値から始め直せるようにする
+        quarantined = []
+        for json_file in corrupt_files:
+            backup_path = quarantine_corrupt_file(json_file)
+            if backup_path:
+                logger.info(f"破損したJSONファイルを退避: {json_file} → {backup_path}")
+                quarantined.append(str(json_file))
+        
+        if not quarantined:
+            return {"success": False, "reason": "破損したJSONファイルが見つかりませんでした"}
         
         return {
             "success": True,
-            "strategy": "破損したJSONファイルを初期化"
+            "strategy": f"破損したJSONファイルを退避: {', '.join(quarantined)}",
+            "files": quarantined
         }
     
     async def _recover_from_claude_error(self, error, error_info):
@@ -254,6 +221,7 @@ class RobustArticleGenerator:
         """エラー回復機能付きで記事を生成"""
         
         retry_count = 0
+        generator = None
         
         while retry_count < self.max_retries:
             try:
@@ -267,13 +235,17 @@ class RobustArticleGenerator:
                     sys.path.insert(0, str(Path(__file__).parent))
                     from single_prompt_article_generator import SinglePromptArticleGenerator
                 
-                generator = SinglePromptArticleGenerator()
+                # 再試行でも同じ生成器を使い、サーキットブレーカーの状態を引き継ぐ
+                if generator is None:
+                    generator = SinglePromptArticleGenerator()
                 result = await generator.generate_article_with_single_prompt()
                 
                 if result["success"]:
+                    self.error_recovery.flush()
                     return result
                 else:
-                    raise Exception(result.get("error", "Unknown error"))
+                    # 元の例外の種類も含め、修復戦略を選べるようにする
+                    raise Exception(f"{result.get('error_type', 'Error')}: {result.get('error', 'Unknown error')}")
                     
             except Exception as e:
                 retry_count += 1
@@ -285,18 +257,22 @@ class RobustArticleGenerator:
                     "generator": "single_prompt"
                 })
                 
-                if recovery_result.get("action") == "retry_with_shorter_prompt":
-                    # より短いプロンプトで再試行
-                    logger.info("より短いプロンプトで再試行します...")
-                    continue
+                if recovery_result.get("action") == "circuit_open":
+                    # バックエンドが不調な間は待たずに終了
+                    break
                 elif recovery_result.get("action") == "manual_auth_required":
                     # 手動介入が必要
                     logger.error("手動でのClaude認証が必要です")
                     break
                 
-                # 少し待ってから再試行
-                await asyncio.sleep(5)
+                # バックオフしてから再試行
+                delay = recovery_result.get("delay")
+                if delay is None:
+                    delay = backoff_delay(retry_count, self.error_recovery.resilience_settings)
+                logger.info(f"{delay:.1f}秒後に再試行します...")
+                await asyncio.sleep(delay)
         
+        self.error_recovery.flush()
         return {
             "success": False,
             "error": f"最大試行回数 ({self.max_retries}) に達しました"
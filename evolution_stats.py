@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+自己進化トラッカー用のベクトル化統計エンジン
+評価履歴を一度だけNumPy配列（時刻・カテゴリ別スコア）に読み込み、
+平均・中央値・パーセンタイル・移動平均・回帰の傾き・トレンド・グレードを配列演算で求める
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from append_log import AppendOnlyLog, timestamp_of
+
+# 評価履歴の列キャッシュ（ログに追加された分だけ読み足す）
+EVALUATION_COLUMNS_FILE = Path("evaluation_columns.npz")
+
+JST_OFFSET_SECONDS = 9 * 3600
+
+# グレードの下限（_get_gradeと同じ基準）
+GRADE_THRESHOLDS = [60, 70, 80, 90]
+GRADE_LABELS = ["C", "B", "B+", "A", "A+"]
+
+def numpy_available() -> bool:
+    return np is not None
+
+class EvaluationArrays:
+    """評価履歴を列ごとの配列として保持（欠損はNaN）"""
+
+    def __init__(self, categories: List[str], timestamps=None, scores: Optional[Dict[str, Any]] = None,
+                 source_count: int = 0):
+        self.categories = list(categories)
+        self.timestamps = timestamps if timestamps is not None else np.empty(0)
+        self.scores = scores or {category: np.empty(0) for category in self.categories}
+        self.source_count = source_count
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def load(cls, log: AppendOnlyLog, categories: List[str],
+             cache_file: Path = EVALUATION_COLUMNS_FILE) -> "EvaluationArrays":
+        """列キャッシュを読み込み、ログに追加された分だけ変換して追記する"""
+        arrays = cls._load_cache(cache_file, categories)
+        total = len(log)
+        if arrays is None or arrays.source_count > total:
+            arrays = cls(categories)
+
+        if arrays.source_count < total:
+            arrays.extend(log.iter_from(arrays.source_count))
+            arrays.save(cache_file)
+        return arrays
+
+    @classmethod
+    def _load_cache(cls, cache_file: Path, categories: List[str]) -> Optional["EvaluationArrays"]:
+        if not cache_file.exists():
+            return None
+        try:
+            with np.load(cache_file) as data:
+                if any(f"score_{category}" not in data for category in categories):
+                    return None
+                return cls(
+                    categories,
+                    timestamps=data["timestamps"],
+                    scores={category: data[f"score_{category}"] for category in categories},
+                    source_count=int(data["source_count"])
+                )
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def extend(self, evaluations):
+        """評価レコードを列に変換して追加"""
+        timestamps = []
+        columns = {category: [] for category in self.categories}
+        nan = float("nan")
+        for evaluation in evaluations:
+            timestamps.append(timestamp_of(evaluation) or nan)
+            scores = evaluation.get("scores", {})
+            for category in self.categories:
+                value = evaluation.get(category) if category == "total_score" else scores.get(category)
+                columns[category].append(nan if value is None else float(value))
+
+        self.timestamps = np.concatenate([self.timestamps, np.asarray(timestamps, dtype="float64")])
+        for category in self.categories:
+            self.scores[category] = np.concatenate(
+                [self.scores[category], np.asarray(columns[category], dtype="float64")]
+            )
+        self.source_count += len(timestamps)
+
+    def save(self, cache_file: Path = EVALUATION_COLUMNS_FILE):
+        """列キャッシュを保存（一時ファイルに書いてから置き換える）"""
+        temp_path = cache_file.with_name(cache_file.name + ".tmp")
+        with open(temp_path, "wb") as f:
+            np.savez(
+                f,
+                timestamps=self.timestamps,
+                source_count=np.asarray(self.source_count),
+                **{f"score_{category}": values for category, values in self.scores.items()}
+            )
+        temp_path.replace(cache_file)
+
+    def day_numbers(self):
+        """JSTの日番号（1970-01-01からの日数）"""
+        return np.floor((self.timestamps + JST_OFFSET_SECONDS) / 86400).astype("int64")
+
+    def daily_averages(self, category: str) -> Dict[str, Dict[str, Any]]:
+        """日ごとの件数とスコア平均"""
+        valid_time = ~np.isnan(self.timestamps)
+        days, inverse = np.unique(self.day_numbers()[valid_time], return_inverse=True)
+        values = self.scores[category][valid_time]
+        counts = np.bincount(inverse, minlength=len(days))
+        has_value = ~np.isnan(values)
+        sums = np.bincount(inverse[has_value], weights=values[has_value], minlength=len(days))
+        value_counts = np.bincount(inverse[has_value], minlength=len(days))
+        return {
+            datetime.fromtimestamp(int(day) * 86400, timezone.utc).strftime("%Y-%m-%d"): {
+                "count": int(counts[i]),
+                "average_total_score": round(float(sums[i] / value_counts[i]), 2) if value_counts[i] else None
+            }
+            for i, day in enumerate(days)
+        }
+
+def classify_trend(recent_average: float, older_average: float, margin: float = 2.0) -> str:
+    """直近平均と過去平均の差からトレンドを判定"""
+    if recent_average > older_average + margin:
+        return "improving"
+    elif recent_average < older_average - margin:
+        return "declining"
+    return "stable"
+
+def trend_of(values) -> str:
+    """直近3件と過去の平均を比べてトレンドを判定（6件未満は直近1件とそれ以前を比べる）"""
+    count = len(values)
+    if count < 2:
+        return "insufficient_data"
+    recent = values[-3:] if count >= 3 else values[-1:]
+    older = values[:-3] if count >= 6 else values[:-1]
+    return classify_trend(float(recent.mean()), float(older.mean()))
+
+def rolling_mean(values, window: int):
+    """移動平均（累積和で一括計算、先頭window-1件は含めない）"""
+    if len(values) < window:
+        return np.empty(0)
+    cumulative = np.cumsum(np.insert(values, 0, 0.0))
+    return (cumulative[window:] - cumulative[:-window]) / window
+
+def regression_slope(values, x=None) -> float:
+    """最小二乗法による回帰直線の傾き（xを省略すると件数ごとの変化量）"""
+    if len(values) < 2:
+        return 0.0
+    x = np.arange(len(values), dtype="float64") if x is None else x
+    x_centered = x - x.mean()
+    denominator = float(np.dot(x_centered, x_centered))
+    if denominator == 0:
+        return 0.0
+    return float(np.dot(x_centered, values - values.mean()) / denominator)
+
+def grades_of(scores):
+    """スコアの配列をグレードの配列に変換"""
+    return np.asarray(GRADE_LABELS)[np.searchsorted(GRADE_THRESHOLDS, scores, side="right")]
+
+def grade_distribution(scores) -> Dict[str, int]:
+    """グレードごとの件数"""
+    counts = np.bincount(np.searchsorted(GRADE_THRESHOLDS, scores, side="right"), minlength=len(GRADE_LABELS))
+    return {label: int(count) for label, count in zip(GRADE_LABELS, counts) if count}
+
+def column_statistics(values, rolling_window: int = 10, percent_scale: bool = False) -> Optional[Dict[str, Any]]:
+    """1カテゴリ分の統計をまとめて計算（NaNは除外）"""
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return None
+
+    p10, p50, p90 = np.percentile(values, [10, 50, 90])
+    rolling = rolling_mean(values, rolling_window)
+    statistics_data = {
+        "average": round(float(values.mean()), 2),
+        "median": round(float(p50), 2),
+        "max": float(values.max()),
+        "min": float(values.min()),
+        "count": int(len(values)),
+        "stdev": round(float(values.std(ddof=1)), 2) if len(values) > 1 else 0.0,
+        "p10": round(float(p10), 2),
+        "p90": round(float(p90), 2),
+        "rolling_average": round(float(rolling[-1]), 2) if len(rolling) else None,
+        "slope_per_evaluation": round(regression_slope(values), 4),
+        "trend": trend_of(values)
+    }
+    if percent_scale:
+        statistics_data["grade_distribution"] = grade_distribution(values)
+    return statistics_data
+
+def quality_improvements(character_counts, thought_flags) -> List[Dict[str, Any]]:
+    """記事の品質指標の配列から改善点を特定（文字数の伸び・思考プロセスの採用）"""
+    improvements = []
+    if len(character_counts) < 2:
+        return improvements
+
+    if len(character_counts) > 3:
+        recent_average = float(character_counts[-3:].mean())
+        older_average = float(character_counts[:-3].mean())
+        if older_average and recent_average > older_average * 1.5:  # 50%以上の増加
+            improvements.append({
+                "metric": "character_count",
+                "improvement": f"{recent_average:.0f}文字 (前期比 {((recent_average/older_average - 1) * 100):.1f}%向上)",
+                "significance": "major"
+            })
+
+    recent_with_thought = int(thought_flags[-5:].sum())
+    if recent_with_thought >= 3:
+        improvements.append({
+            "metric": "thought_process_inclusion",
+            "improvement": f"最新5記事中{recent_with_thought}記事に思考プロセスを追加",
+            "significance": "moderate"
+        })
+
+    return improvements
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+ローカルRSS/Atomフィードサーバー
+Qiita・Dev.to・Redditの代わりに、記録済みまたは合成したフィードを配信する
+（レイテンシ・サイズ・エラー率・ETag/304を設定可能）
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+from xml.sax.saxutils import escape
+
+# 日本標準時のタイムゾーン
+JST = timezone(timedelta(hours=9))
+
+# リンクチェック用の経路: /status/404 は404を返す、/no-head/200 はHEADに405・GETに200を返す、
+# /redirect/200 は /status/200 へリダイレクトする
+STATUS_ROUTE = re.compile(r'^/(status|no-head|redirect)/(\d{3})$')
+
+SYNTHETIC_TAGS = ["ai", "python", "machinelearning", "llm", "agent", "rust", "typescript", "kubernetes"]
+
+class FeedFixtureServer:
+    """ベンチマーク・テスト用のローカルフィードサーバー"""
+
+    def __init__(self, num_feeds: int = 5, entries_per_feed: int = 10, latency: float = 0.0,
+                 latency_jitter: float = 0.0, summary_bytes: int = 300, error_rate: float = 0.0,
+                 recorded_file: Optional[Path] = None, host: str = "127.0.0.1", port: int = 0,
+                 seed: int = 42):
+        self.num_feeds = num_feeds
+        self.entries_per_feed = entries_per_feed
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.summary_bytes = summary_bytes
+        self.error_rate = error_rate
+        self.host = host
+        self.port = port
+        self.random = random.Random(seed)
+        self.recorded_articles = self._load_recorded(recorded_file) if recorded_file else []
+
+        # 配信内容はあらかじめ生成し、ETagも固定しておく
+        self.bodies: Dict[str, bytes] = {}
+        self.etags: Dict[str, str] = {}
+        self._build_feeds()
+
+        self.stats = {"requests": 0, "not_modified": 0, "errors": 0, "bytes_sent": 0}
+        self._stats_lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _load_recorded(self, recorded_file: Path) -> List[Dict[str, Any]]:
+        """RSSキャッシュ（data/rss_cache/*.json）から記録済み記事を読み込む"""
+        with open(recorded_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _build_feeds(self):
+        """全フィードの本文を生成"""
+        for i in range(self.num_feeds):
+            # 偶数番目はAtom、奇数番目はRSS 2.0で配信
+            if i % 2 == 0:
+                path = f"/feeds/{i}.atom"
+                body = self._render_atom(i, self._make_entries(i))
+            else:
+                path = f"/feeds/{i}.rss"
+                body = self._render_rss(i, self._make_entries(i))
+            self.bodies[path] = body
+            self.etags[path] = '"' + hashlib.sha1(body).hexdigest() + '"'
+
+    def _make_entries(self, feed_index: int) -> List[Dict[str, Any]]:
+        """フィードのエントリを作成（記録済みがあれば優先）"""
+        entries = []
+        base_time = datetime(2025, 6, 28, 8, 0, tzinfo=JST)
+
+        for j in range(self.entries_per_feed):
+            if self.recorded_articles:
+                recorded = self.recorded_articles[(feed_index * self.entries_per_feed + j) % len(self.recorded_articles)]
+                entries.append({
+                    "title": recorded.get("title", ""),
+                    "link": f"{recorded.get('link', '')}#feed{feed_index}",
+                    "summary": recorded.get("summary", ""),
+                    "published": base_time - timedelta(minutes=j),
+                    "tags": recorded.get("tags", [])
+                })
+                continue
+
+            tags = self.random.sample(SYNTHETIC_TAGS, 3)
+            filler = f"{tags[0]}と{tags[1]}を組み合わせた実装例の解説です。"
+            summary = (filler * (self.summary_bytes // len(filler.encode("utf-8")) + 1))
+            summary = summary.encode("utf-8")[:self.summary_bytes].decode("utf-8", errors="ignore")
+            entries.append({
+                "title": f"Synthetic article {feed_index}-{j}: {' '.join(tags)} performance tips",
+                "link": f"https://example.com/feeds/{feed_index}/items/{j}",
+                "summary": summary,
+                "published": base_time - timedelta(minutes=j),
+                "tags": tags
+            })
+
+        return entries
+
+    def _render_atom(self, feed_index: int, entries: List[Dict[str, Any]]) -> bytes:
+        """Atom形式で出力"""
+        parts = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<feed xmlns="http://www.w3.org/2005/Atom">',
+            f"<title>Fixture Feed {feed_index}</title>",
+            f"<id>tag:fixture,2025:{feed_index}</id>",
+        ]
+        for entry in entries:
+            parts.append("<entry>")
+            parts.append(f"<title>{escape(entry['title'])}</title>")
+            parts.append(f'<link rel="alternate" href="{escape(entry["link"])}"/>')
+            parts.append(f"<id>{escape(entry['link'])}</id>")
+            parts.append(f"<published>{entry['published'].isoformat()}</published>")
+            parts.append(f"<summary>{escape(entry['summary'])}</summary>")
+            for tag in entry["tags"]:
+                parts.append(f'<category term="{escape(tag)}"/>')
+            parts.append("</entry>")
+        parts.append("</feed>")
+        return "\n".join(parts).encode("utf-8")
+
+    def _render_rss(self, feed_index: int, entries: List[Dict[str, Any]]) -> bytes:
+        """RSS 2.0形式で出力"""
+        parts = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<rss version="2.0"><channel>',
+            f"<title>Fixture Feed {feed_index}</title>",
+            f"<link>https://example.com/feeds/{feed_index}</link>",
+        ]
+        for entry in entries:
+            parts.append("<item>")
+            parts.append(f"<title>{escape(entry['title'])}</title>")
+            parts.append(f"<link>{escape(entry['link'])}</link>")
+            parts.append(f"<pubDate>{entry['published'].strftime('%a, %d %b %Y %H:%M:%S %z')}</pubDate>")
+            parts.append(f"<description>{escape(entry['summary'])}</description>")
+            for tag in entry["tags"]:
+                parts.append(f"<category>{escape(tag)}</category>")
+            parts.append("</item>")
+        parts.append("</channel></rss>")
+        return "\n".join(parts).encode("utf-8")
+
+    def feeds(self, feed_type: str = "tech") -> List[Dict[str, str]]:
+        """RSSAggregatorに渡せる形式のフィード一覧"""
+        return [
+            {
+                "name": f"Fixture Feed {path.rsplit('/', 1)[-1]}",
+                "url": f"{self.base_url}{path}",
+                "type": feed_type
+            }
+            for path in self.bodies
+        ]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _record(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _make_handler(self):
+        server = self
+
+        class FixtureHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self._respond(send_body=True)
+
+            def do_HEAD(self):
+                self._respond(send_body=False)
+
+            def _respond(self, send_body: bool):
+                server._record("requests")
+
+                delay = server.latency
+                if server.latency_jitter:
+                    delay += server.random.uniform(0, server.latency_jitter)
+                if delay > 0:
+                    time.sleep(delay)
+
+                path = self.path.split("?", 1)[0]
+
+                status_route = STATUS_ROUTE.match(path)
+                if status_route:
+                    self._respond_status(status_route.group(1), int(status_route.group(2)), send_body)
+                    return
+
+                if path not in server.bodies:
+                    self._send_empty(404)
+                    return
+
+                if server.error_rate and server.random.random() < server.error_rate:
+                    server._record("errors")
+                    self._send_empty(503)
+                    return
+
+                etag = server.etags[path]
+                if self.headers.get("If-None-Match") == etag:
+                    server._record("not_modified")
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                body = server.bodies[path]
+                content_type = "application/atom+xml" if path.endswith(".atom") else "application/rss+xml"
+                self.send_response(200)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+                    server._record("bytes_sent", len(body))
+
+            def _respond_status(self, route: str, status: int, send_body: bool):
+                if route == "no-head" and not send_body:
+                    self._send_empty(405)
+                elif route == "redirect":
+                    self.send_response(301)
+                    self.send_header("Location", f"/status/{status}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                else:
+                    self._send_empty(status)
+
+            def _send_empty(self, status: int):
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                # ベンチマーク出力を汚さないようにアクセスログは抑制
+                pass
+
+        return FixtureHandler
+
+    def start(self) -> "FeedFixtureServer":
+        """バックグラウンドスレッドでサーバーを起動"""
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        self._server.request_queue_size = 1024
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """サーバーを停止"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+def main():
+    """フィードサーバーを起動して待ち受ける"""
+    parser = argparse.ArgumentParser(description="ローカルRSS/Atomフィードサーバー")
+    parser.add_argument("--feeds", type=int, default=5, help="配信するフィード数")
+    parser.add_argument("--entries", type=int, default=10, help="フィードあたりのエントリ数")
+    parser.add_argument("--latency", type=float, default=0.0, help="応答遅延（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="応答遅延の揺らぎ（秒）")
+    parser.add_argument("--summary-bytes", type=int, default=300, help="要約のサイズ（バイト）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503を返す確率")
+    parser.add_argument("--recorded", type=Path, help="記録済み記事（data/rss_cache/*.json）")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = FeedFixtureServer(
+        num_feeds=args.feeds,
+        entries_per_feed=args.entries,
+        latency=args.latency,
+        latency_jitter=args.jitter,
+        summary_bytes=args.summary_bytes,
+        error_rate=args.error_rate,
+        recorded_file=args.recorded,
+        port=args.port
+    ).start()
+
+    print(f"📡 フィードサーバー起動: {server.base_url} ({args.feeds}フィード)")
+    for feed in server.feeds()[:5]:
+        print(f"   - {feed['url']}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+        print(f"\n🛑 停止しました: {server.stats}")
+
+if __name__ == "__main__":
+    main()
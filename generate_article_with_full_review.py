@@ -7,14 +7,15 @@
 import asyncio
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-import json
 import os
+import importlib
 import subprocess
 import logging
+import time
 from article_evaluator import SelfImprovingBlogSystem
 from article_proofreader import ImprovedArticleWithProofreading
-from generate_article_with_evaluation import ImprovedArticleGenerator
-from generate_detailed_article_v4 import DetailedArticleGenerator
+from quality_aggregates import QualityAggregates
+from state_files import load_json_state, save_json_state
 from writer_avatars import WriterSelector, format_article_with_writer_style, WRITER_AVATARS
 
 # ロガーの設定
@@ -23,6 +24,34 @@ logger = logging.getLogger(__name__)
 # 日本標準時のタイムゾーン
 JST = timezone(timedelta(hours=9))
 
+async def publish_site(in_process: bool = False):
+    """記事をHTMLに変換してインデックスを更新（in_processなら新しいインタプリタを起動せずに実行）"""
+    steps = [
+        ("convert_articles_v3.py", "HTML変換", "convert_articles_v3", "main"),
+        ("update_to_modern_ui_v3.py", "インデックス更新", "update_to_modern_ui_v3", "update_to_modern_ui"),
+    ]
+    for script, label, module_name, function_name in steps:
+        if in_process:
+            try:
+                module = importlib.import_module(module_name)
+                # 常駐プロセスのイベントループを止めないよう、スレッドで実行する
+                await asyncio.to_thread(getattr(module, function_name))
+                print(f"  ✓ {label}完了")
+            except Exception as e:
+                print(f"  × {label}エラー: {e}")
+            continue
+        
+        if Path(script).exists():
+            result = subprocess.run(
+                ["python", script],
+                capture_output=True,
+                text=True
+            )
+            if result.returncode == 0:
+                print(f"  ✓ {label}完了")
+            else:
+                print(f"  × {label}エラー: {result.stderr}")
+
 def get_jst_now():
     """現在の日本時間を取得"""
     return datetime.now(JST)
@@ -30,35 +59,46 @@ def get_jst_now():
 class FullReviewArticleSystem:
     """完全レビューシステムを統合した記事生成"""
     
-    def __init__(self, use_detailed_generator=True):
+    def __init__(self, use_detailed_generator=True, backend=None, publish_in_process=False):
         self.evaluation_system = SelfImprovingBlogSystem()
         self.proofreading_system = ImprovedArticleWithProofreading()
-        if use_detailed_generator:
-            self.article_generator = DetailedArticleGenerator()
-            self.use_detailed = True
-        else:
-            self.article_generator = ImprovedArticleGenerator()
-            self.use_detailed = False
+        self.use_detailed = use_detailed_generator
+        self.backend = backend
+        self._article_generator = None
+        # 常駐デーモンでは公開処理をプロセス内で実行する
+        self.publish_in_process = publish_in_process
         self.generation_log_file = Path("full_review_log.json")
         self.writer_selector = WriterSelector()
         self.load_generation_log()
+        self.quality_aggregates = QualityAggregates(
+            Path("full_review_aggregates.json"),
+            lambda generation: {"final_score": generation["final_score"]}
+        )
+    
+    @property
+    def article_generator(self):
+        """記事生成器（最初に使うときに読み込む。公開・評価だけなら生成モジュールとコード例を読み込まない）"""
+        if self._article_generator is None:
+            if self.use_detailed:
+                from generate_detailed_article_v4 import DetailedArticleGenerator
+                self._article_generator = DetailedArticleGenerator(backend=self.backend)
+            else:
+                from generate_article_with_evaluation import ImprovedArticleGenerator
+                self._article_generator = ImprovedArticleGenerator()
+        return self._article_generator
     
     def load_generation_log(self):
         """生成ログを読み込む"""
-        if self.generation_log_file.exists():
-            with open(self.generation_log_file, "r", encoding="utf-8") as f:
-                self.generation_log = json.load(f)
-        else:
-            self.generation_log = {
-                "generations": [],
-                "quality_trends": [],
-                "improvement_metrics": {}
-            }
+        self.generation_log = load_json_state(self.generation_log_file, {
+            "generations": [],
+            "quality_trends": [],
+            "improvement_metrics": {}
+        })
     
     def save_generation_log(self):
         """生成ログを保存"""
-        with open(self.generation_log_file, "w", encoding="utf-8") as f:
-            json.dump(self.generation_log, f, ensure_ascii=False, indent=2)
+        save_json_state(self.generation_log_file, self.generation_log, indent=2)
+        self.quality_aggregates.save()
     
     async def generate_with_full_review(self):
         """完全レビュープロセスで記事を生成"""
@@ -70,12 +110,15 @@ class FullReviewArticleSystem:
             "timestamp": get_jst_now().isoformat(),
             "phases": {},
             "final_score": 0,
-            "published": False
+            "published": False,
+            "phase_timings": {}
         }
+        phase_timings = generation_result["phase_timings"]
         
         # Phase 1: 既存記事の評価と改善提案
         print("\n📊 Phase 1: 既存記事の評価と改善提案")
         print("-" * 50)
+        phase_started = time.perf_counter()
         
         improvement_report = await self.evaluation_system.evaluate_and_improve()
         # improvement_suggestionsの数を安全に取得
@@ -96,9 +139,12 @@ class FullReviewArticleSystem:
         print(f"  ✓ 平均スコア: {improvement_report['average_score']:.1f}/100")
         print(f"  ✓ ルール更新: {'実施' if improvement_report['rules_updated'] else '不要'}")
         
+        phase_timings["evaluation"] = round(time.perf_counter() - phase_started, 3)
+        
         # Phase 2: 改善を反映した新記事の生成
         print("\n✏️ Phase 2: 改善を反映した新記事の生成")
         print("-" * 50)
+        phase_started = time.perf_counter()
         
         if self.use_detailed:
             # 詳細記事生成システムを使用
@@ -209,6 +255,8 @@ class FullReviewArticleSystem:
             print(f"  ✓ 記事タイトル: {article_data['article_data']['title'][:50]}...")
             print(f"  ✓ 初期スコア: {article_data['evaluation']['total_score']:.1f}/100")
         
+        phase_timings["generation"] = round(time.perf_counter() - phase_started, 3)
+        
         # ライターアバターを選択
         # 記事のトピックとタグを取得
         article_title = article_data.get("article_data", {}).get("title", "")
@@ -222,6 +270,7 @@ class FullReviewArticleSystem:
         # Phase 3: プロのライター視点での校正
         print("\n🔍 Phase 3: プロのライター視点での校正")
         print("-" * 50)
+        phase_started = time.perf_counter()
         
         # 最新の記事を取得
         posts_dir = Path("posts")
@@ -250,9 +299,12 @@ class FullReviewArticleSystem:
             "final_score": proofreading_result["proofreading_result"]["final_score"]
         }
         
+        phase_timings["proofreading"] = round(time.perf_counter() - phase_started, 3)
+        
         # Phase 4: 品質判定とリリース決定
         print("\n🎯 Phase 4: 品質判定とリリース決定")
         print("-" * 50)
+        phase_started = time.perf_counter()
         
         # 総合スコアを計算（評価スコアと校正スコアの平均）
         final_score = (
@@ -281,9 +333,12 @@ class FullReviewArticleSystem:
             # ボツ記事として校正レポート付きで公開
             await self._publish_rejected_article(latest_article, proofreading_result, final_score)
         
+        phase_timings["publish"] = round(time.perf_counter() - phase_started, 3)
+        
         # Phase 5: 学習とフィードバック
         print("\n📈 Phase 5: 学習とフィードバック")
         print("-" * 50)
+        phase_started = time.perf_counter()
         
         # 生成ログを更新
         self.generation_log["generations"].append(generation_result)
@@ -296,6 +351,7 @@ class FullReviewArticleSystem:
         print(f"  📈 改善率: {quality_trend['improvement_rate']:.1f}%")
         
         # ログを保存
+        phase_timings["feedback"] = round(time.perf_counter() - phase_started, 3)
         self.save_generation_log()
         
         # 古い記事のクリーンアップ
@@ -308,29 +364,8 @@ class FullReviewArticleSystem:
         
         print("\n📤 記事を公開しています...")
         
-        # HTMLに変換
-        if Path("convert_articles_v3.py").exists():
-            result = subprocess.run(
-                ["python", "convert_articles_v3.py"], 
-                capture_output=True, 
-                text=True
-            )
-            if result.returncode == 0:
-                print("  ✓ HTML変換完了")
-            else:
-                print(f"  × HTML変換エラー: {result.stderr}")
-        
-        # index.htmlを更新
-        if Path("update_to_modern_ui_v3.py").exists():
-            result = subprocess.run(
-                ["python", "update_to_modern_ui_v3.py"],
-                capture_output=True,
-                text=True
-            )
-            if result.returncode == 0:
-                print("  ✓ インデックス更新完了")
-            else:
-                print(f"  × インデックス更新エラー: {result.stderr}")
+        # HTMLに変換してindex.htmlを更新
+        await publish_site(self.publish_in_process)
     
     async def _publish_rejected_article(self, article_path: Path, proofreading_result: dict, final_score: float):
         """ボツ記事として校正レポート付きで公開"""
@@ -461,19 +496,21 @@ class FullReviewArticleSystem:
         
         generations = self.generation_log["generations"]
         
+        # 集計に未反映の生成結果だけを取り込む
+        self.quality_aggregates.sync(len(generations), lambda position: generations[position:])
+        final_scores = self.quality_aggregates.get("final_score")
+        
         if len(generations) < 2:
             return {
                 "direction": "データ不足",
                 "improvement_rate": 0,
-                "average_score": generations[-1]["final_score"] if generations else 0
+                "average_score": final_scores.last if final_scores else 0
             }
         
-        # 最新10件の平均と、その前の10件の平均を比較
-        recent = generations[-10:]
-        older = generations[-20:-10] if len(generations) >= 20 else generations[:len(generations)//2]
-        
-        recent_avg = sum(g["final_score"] for g in recent) / len(recent)
-        older_avg = sum(g["final_score"] for g in older) / len(older) if older else recent_avg
+        # 最新10件の平均と、その前の10件の平均を比較（集計済みの直近ウィンドウを使う）
+        averages = final_scores.windowed_averages(10)
+        recent_avg = averages["recent_average"]
+        older_avg = averages["older_average"]
         
         improvement_rate = ((recent_avg - older_avg) / older_avg * 100) if older_avg > 0 else 0
         
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+ホスト単位のリクエスト制限
+同一ホストへの同時接続数と、リクエスト開始の最小間隔を制御する
+（RSS取得とリンクチェックで共有）
+"""
+
+import asyncio
+import time
+from urllib.parse import urlparse
+
+class HostRateLimiter:
+    """ホスト単位で同時接続数とリクエスト間隔を制限"""
+    
+    def __init__(self, per_host_concurrency, per_host_interval):
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_interval = per_host_interval
+        self.semaphores = {}
+        self.next_start = {}
+        self.locks = {}
+    
+    def _host(self, url):
+        return urlparse(url).netloc
+    
+    async def acquire(self, url):
+        """ホストの枠を確保し、必要なら前回リクエストからの間隔を空ける"""
+        host = self._host(url)
+        if host not in self.semaphores:
+            self.semaphores[host] = asyncio.Semaphore(self.per_host_concurrency)
+            self.locks[host] = asyncio.Lock()
+            self.next_start[host] = 0.0
+        
+        await self.semaphores[host].acquire()
+        
+        if self.per_host_interval > 0:
+            async with self.locks[host]:
+                now = time.monotonic()
+                wait = self.next_start[host] - now
+                self.next_start[host] = max(now, self.next_start[host]) + self.per_host_interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+    
+    def release(self, url):
+        self.semaphores[self._host(url)].release()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+複数キーワード照合エンジン
+Aho-Corasick法で、登録したすべてのキーワードを本文の1回の走査で検出する
+"""
+
+import hashlib
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# 英大文字だけを小文字にする変換表（文字数が変わらないので位置がずれない）
+ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+# ルールセットのバージョンごとに構築済みのマッチャーを保持（記事をまたいで再利用）
+_MATCHER_CACHE: Dict[str, "KeywordMatcher"] = {}
+
+def rule_set_version(patterns: Iterable[str], ignore_case_patterns: Iterable[str] = ()) -> str:
+    """パターン集合からルールセットのバージョンを算出"""
+    digest = hashlib.sha1()
+    for pattern in sorted(set(patterns)):
+        digest.update(b"s\0" + pattern.encode("utf-8") + b"\0")
+    for pattern in sorted(set(ignore_case_patterns)):
+        digest.update(b"i\0" + pattern.encode("utf-8") + b"\0")
+    return digest.hexdigest()[:12]
+
+def get_matcher(patterns: Iterable[str], ignore_case_patterns: Iterable[str] = ()) -> "KeywordMatcher":
+    """ルールセットのバージョンが同じなら構築済みのマッチャーを返す"""
+    patterns = list(patterns)
+    ignore_case_patterns = list(ignore_case_patterns)
+    version = rule_set_version(patterns, ignore_case_patterns)
+    if version not in _MATCHER_CACHE:
+        _MATCHER_CACHE[version] = KeywordMatcher(patterns, ignore_case_patterns)
+    return _MATCHER_CACHE[version]
+
+class KeywordMatcher:
+    """Aho-Corasickオートマトンによるキーワード照合"""
+
+    def __init__(self, patterns: Iterable[str], ignore_case_patterns: Iterable[str] = ()):
+        # 同じ文字列が両方に登録された場合は大文字小文字を区別しない方を優先
+        self.ignore_case_patterns = list(dict.fromkeys(p for p in ignore_case_patterns if p))
+        ignore_case_set = set(self.ignore_case_patterns)
+        self.patterns = [
+            p for p in dict.fromkeys(patterns) if p and p not in ignore_case_set
+        ] + self.ignore_case_patterns
+        self.case_sensitive = [p not in ignore_case_set for p in self.patterns]
+        self.version = rule_set_version(self.patterns, self.ignore_case_patterns)
+
+        # 遷移表・失敗リンク・出力（パターン番号）
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[int]] = [[]]
+        self._build()
+
+    def _build(self):
+        """トライを作り、幅優先で失敗リンクを張る"""
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern.translate(ASCII_LOWER):
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].append(index)
+
+        # 深さ1のノードの失敗リンクはルート（0）のまま
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """(開始位置, パターン) を出現順に返す（重なりも含む）"""
+        folded = text.translate(ASCII_LOWER)
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        state = 0
+
+        for position, char in enumerate(folded):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not output[state]:
+                continue
+            for index in output[state]:
+                pattern = self.patterns[index]
+                start = position - len(pattern) + 1
+                # 大文字小文字を区別するパターンは元の本文で確認
+                if self.case_sensitive[index] and text[start:position + 1] != pattern:
+                    continue
+                yield start, pattern
+
+    def find_all(self, text: str) -> Dict[str, List[int]]:
+        """パターンごとの出現位置の一覧（未出現は空リスト）"""
+        positions = {pattern: [] for pattern in self.patterns}
+        for start, pattern in self.iter_matches(text):
+            positions[pattern].append(start)
+        return positions
+
+    def count(self, text: str) -> Dict[str, int]:
+        """パターンごとの出現回数（未出現は0）"""
+        counts = {pattern: 0 for pattern in self.patterns}
+        for _, pattern in self.iter_matches(text):
+            counts[pattern] += 1
+        return counts
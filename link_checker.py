@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+記事内リンクの到達性チェック
+共有の非同期クライアントでHEAD（拒否されたらGET）を送り、ホスト単位の同時接続数を制限する
+結果はURLごとにTTL付きでキャッシュし、全体の時間予算内で全リンクを確認する
+"""
+
+import asyncio
+import json
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from correction_engine import code_regions
+from host_rate_limiter import HostRateLimiter
+from state_files import save_json_state
+
+DEFAULT_LINK_CHECK_SETTINGS = {
+    "enabled": True,              # Falseならネットワークに出ずリンク切れなしとする（オフライン実行用）
+    "max_concurrency": 16,        # 同時に確認するURL数の上限
+    "per_host_concurrency": 2,    # 同一ホストへの同時接続数の上限
+    "per_host_interval": 0.0,     # 同一ホストへのリクエスト開始間隔（秒）
+    "request_timeout": 10.0,      # URL1件あたりの時間予算（秒）
+    "total_timeout": 60.0,        # 全URL確認の時間予算（秒）
+    "ok_ttl": 7 * 24 * 3600,      # 到達できたURLの結果を再利用する期間（秒）
+    "broken_ttl": 24 * 3600,      # リンク切れの結果を再利用する期間（秒）
+    "error_ttl": 600              # 接続エラーの結果を再利用する期間（秒）
+}
+
+# 日本語の文中では全角の括弧・句読点の直前でURLが終わる
+URL_PATTERN = re.compile(r'https?://[^\s<>"\'`\)\]（）「」『』【】、。　]+')
+URL_TRAILING_PUNCTUATION = ".,;:!?"
+
+# 例示用・ローカルのホストは確認しない
+SKIPPED_HOSTS = {"localhost", "127.0.0.1", "0.0.0.0", "example.com", "example.org", "example.net"}
+
+# HEADを受け付けないサーバーが返すステータス（GETで確認し直す）
+HEAD_FALLBACK_STATUSES = {400, 403, 404, 405, 406, 501}
+
+# 認証やレート制限はリンク切れとはみなさない
+NOT_BROKEN_STATUSES = {401, 403, 429}
+
+def extract_urls(content: str, include_code: bool = False) -> List[str]:
+    """本文中のURLを出現順に重複なく取り出す（既定ではコード内のURLは除く）"""
+    regions = [] if include_code else code_regions(content)
+    urls = []
+    seen = set()
+    for match in URL_PATTERN.finditer(content):
+        if any(start <= match.start() < end for start, end in regions):
+            continue
+        url = match.group(0).rstrip(URL_TRAILING_PUNCTUATION)
+        host = urlparse(url).hostname or ""
+        if host in SKIPPED_HOSTS or host.endswith(".example.com") or url in seen:
+            continue
+        seen.add(url)
+        urls.append(url)
+    return urls
+
+def is_broken(result: Dict[str, Any]) -> bool:
+    """HTTP応答があり、リンク切れとみなすステータスか"""
+    status = result.get("status")
+    return status is not None and status >= 400 and status not in NOT_BROKEN_STATUSES
+
+class LinkCheckCache:
+    """URLごとの確認結果（TTL付き）"""
+
+    def __init__(self, cache_file, settings: Dict[str, Any]):
+        self.cache_file = Path(cache_file)
+        self.settings = settings
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                self.entries = {}
+
+    def _ttl(self, result: Dict[str, Any]) -> float:
+        if result.get("status") is None:
+            return self.settings["error_ttl"]
+        if is_broken(result):
+            return self.settings["broken_ttl"]
+        return self.settings["ok_ttl"]
+
+    def get(self, url: str, now: float = None) -> Optional[Dict[str, Any]]:
+        """有効期限内の結果（なければNone）"""
+        result = self.entries.get(url)
+        if result is None:
+            return None
+        now = time.time() if now is None else now
+        if now - result["checked_at"] > self._ttl(result):
+            return None
+        return result
+
+    def put(self, result: Dict[str, Any]):
+        self.entries[result["url"]] = result
+
+    def save(self):
+        """期限切れを除いて保存（一時ファイルに書いてから置き換える）"""
+        now = time.time()
+        self.entries = {
+            url: result for url, result in self.entries.items()
+            if now - result["checked_at"] <= self._ttl(result)
+        }
+        save_json_state(self.cache_file, self.entries)
+
+class LinkChecker:
+    """URLの到達性をまとめて確認"""
+
+    def __init__(self, cache_file="data/link_check_cache.json", **settings):
+        self.settings = dict(DEFAULT_LINK_CHECK_SETTINGS)
+        self.settings.update(settings)
+        self.cache = LinkCheckCache(cache_file, self.settings)
+        self.check_stats = {"checked": 0, "cached": 0, "timed_out": 0}
+        # 常駐プロセスが共有するHTTPクライアント（Noneなら確認のたびに作る）
+        self.http_client = None
+
+    async def check_url(self, url: str, client) -> Dict[str, Any]:
+        """HEADで確認し、HEADが拒否されたらGET（本文は読まない）で確認し直す"""
+        result = {"url": url, "status": None, "method": "HEAD", "error": None, "checked_at": time.time()}
+        try:
+            response = await client.head(url, follow_redirects=True)
+            result["status"] = response.status_code
+            if response.status_code in HEAD_FALLBACK_STATUSES:
+                result["method"] = "GET"
+                async with client.stream("GET", url, follow_redirects=True) as response:
+                    result["status"] = response.status_code
+        except httpx.HTTPError as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        result["checked_at"] = time.time()
+        return result
+
+    async def _check_with_budget(self, url: str, client, pool, host_limiter) -> Dict[str, Any]:
+        """同時実行数・ホスト制限・時間予算の範囲でURLを確認"""
+        async with pool:
+            await host_limiter.acquire(url)
+            try:
+                return await asyncio.wait_for(self.check_url(url, client), timeout=self.settings["request_timeout"])
+            except asyncio.TimeoutError:
+                return {"url": url, "status": None, "method": "HEAD", "error": "timeout", "checked_at": time.time()}
+            finally:
+                host_limiter.release(url)
+
+    async def check_urls(self, urls: List[str], client=None) -> Dict[str, Dict[str, Any]]:
+        """URLをまとめて確認し、URL → 結果 を返す（全体の時間予算を超えた分は結果なし）"""
+        results = {}
+        pending = []
+        for url in dict.fromkeys(urls):
+            cached = self.cache.get(url)
+            if cached is not None:
+                results[url] = cached
+                self.check_stats["cached"] += 1
+            else:
+                pending.append(url)
+
+        if pending:
+            client = client or self.http_client
+            if client is None:
+                limits = httpx.Limits(
+                    max_connections=self.settings["max_concurrency"],
+                    max_keepalive_connections=self.settings["max_concurrency"]
+                )
+                async with httpx.AsyncClient(
+                    timeout=self.settings["request_timeout"],
+                    limits=limits,
+                    headers={"User-Agent": "Mozilla/5.0 (compatible; AlicAIBot/1.0)"}
+                ) as own_client:
+                    await self._check_pending(pending, own_client, results)
+            else:
+                await self._check_pending(pending, client, results)
+            self.cache.save()
+
+        return results
+
+    async def _check_pending(self, urls: List[str], client, results: Dict[str, Dict[str, Any]]):
+        pool = asyncio.Semaphore(self.settings["max_concurrency"])
+        host_limiter = HostRateLimiter(self.settings["per_host_concurrency"], self.settings["per_host_interval"])
+        tasks = [asyncio.ensure_future(self._check_with_budget(url, client, pool, host_limiter)) for url in urls]
+        try:
+            for next_done in asyncio.as_completed(tasks, timeout=self.settings["total_timeout"]):
+                result = await next_done
+                results[result["url"]] = result
+                self.check_stats["checked"] += 1
+                if result["error"] != "timeout":
+                    self.cache.put(result)
+        except asyncio.TimeoutError:
+            self.check_stats["timed_out"] += sum(1 for task in tasks if not task.done())
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def find_broken_links(self, content: str) -> List[Dict[str, Any]]:
+        """本文中のリンク切れを返す（1件も応答がなければネットワーク不通とみなし、接続エラーは報告しない）"""
+        if not self.settings["enabled"]:
+            return []
+        results = await self.check_urls(extract_urls(content))
+        network_available = any(result.get("status") is not None for result in results.values())
+        return [
+            result for result in results.values()
+            if is_broken(result) or (network_available and result.get("status") is None)
+        ]
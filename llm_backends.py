@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+記事生成用のLLMバックエンド
+生成システムは query_with_sdk(prompt, max_turns) を持つオブジェクトをバックエンドとして受け取る。
+本番はClaudeCodeSDKIntegration、オフラインではMockLLMBackendが記録済みまたは合成のMarkdownを返し、
+最初のトークンまでの待ち時間・トークンごとの待ち時間・障害を再現する
+"""
+
+import asyncio
+import hashlib
+import os
+import random
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Any, AsyncIterator, Optional
+
+# バックエンドの選択（claude: 本番のSDK、mock: オフラインのモック）
+LLM_BACKEND_ENV = "LLM_BACKEND"
+LLM_BACKENDS = ("claude", "mock")
+
+DEFAULT_MOCK_SETTINGS = {
+    "first_token_latency": 1.5,   # 最初のトークンまでの待ち時間（秒）
+    "token_latency": 0.012,       # 1トークンあたりの待ち時間（秒）
+    "chars_per_token": 1.5,       # 日本語の1トークンあたりの文字数の目安
+    "time_scale": 1.0,            # 待ち時間の倍率（0なら待たない）
+    "default_chars": 8000,        # プロンプトに文字数の指定がないときの出力文字数
+    "length_scale": 1.0,          # プロンプトの指定文字数に対する出力文字数の倍率
+    "failure_rate": 0.0,          # 呼び出しが失敗する確率
+    "failure_kinds": ["taskgroup", "timeout", "error_result"],
+    "recordings": None,           # 記録済みMarkdownのディレクトリ（Noneなら合成）
+    "stream_chunk_tokens": 32,    # ストリーミング時の1チャンクのトークン数
+    "seed": 0
+}
+
+TARGET_CHARS_PATTERN = re.compile(r'(\d[\d,]*)文字以上')
+FIELD_PATTERN = re.compile(r'^\s*(トピック|タイトル|タグ|キーワード|セクション|date):\s*(.+)$', re.MULTILINE)
+
+def selected_backend_name(name: str = None) -> str:
+    """使うバックエンド名（引数 → 環境変数LLM_BACKEND → claude）"""
+    name = name or os.environ.get(LLM_BACKEND_ENV) or "claude"
+    if name not in LLM_BACKENDS:
+        raise ValueError(f"不明なLLMバックエンド: {name}（{', '.join(LLM_BACKENDS)}）")
+    return name
+
+def backend_from_env(**settings):
+    """LLM_BACKEND=mockならモックを返す（claudeならNoneを返し、呼び出し側が本番のSDKを使う）"""
+    if selected_backend_name() == "mock":
+        return MockLLMBackend(**settings)
+    return None
+
+def result_text(messages: List[Dict[str, Any]]) -> Optional[str]:
+    """応答メッセージから成功した結果の本文を取り出す（なければNone）"""
+    for message in reversed(messages or []):
+        if isinstance(message, dict) and message.get("type") == "result" and message.get("subtype") == "success":
+            return message.get("result", "")
+    return None
+
+async def stream_text(backend, prompt: str, max_turns: int = 1, **kwargs) -> AsyncIterator[str]:
+    """本文をチャンクごとに返す（stream()を持たないバックエンドは応答全体を1チャンクとして返す）"""
+    if hasattr(backend, "stream"):
+        async for chunk in backend.stream(prompt, max_turns=max_turns, **kwargs):
+            yield chunk
+        return
+
+    messages = await backend.query_with_sdk(prompt, max_turns=max_turns, **kwargs)
+    text = result_text(messages)
+    if text is None:
+        raise RuntimeError("モデルから成功した応答がありませんでした")
+    yield text
+
+class MockLLMBackend:
+    """記録済み/合成のMarkdownを、モデルらしい待ち時間と障害つきで返すオフライン用バックエンド"""
+
+    def __init__(self, **settings):
+        self.settings = dict(DEFAULT_MOCK_SETTINGS)
+        self.settings.update(settings)
+        self.model = "mock"
+        self.rng = random.Random(self.settings["seed"])
+        self.recordings = self._load_recordings(self.settings["recordings"])
+        self.stats = {"calls": 0, "failures": 0, "chars": 0, "simulated_seconds": 0.0}
+
+    @staticmethod
+    def _load_recordings(directory) -> List[str]:
+        """記録済みMarkdownを読み込む（フロントマターは除く）"""
+        if not directory:
+            return []
+        recordings = []
+        for path in sorted(Path(directory).glob("*.md")):
+            text = path.read_text(encoding="utf-8")
+            if text.startswith("---"):
+                parts = text.split("---", 2)
+                text = parts[2].lstrip() if len(parts) == 3 else text
+            recordings.append(text)
+        return recordings
+
+    def target_chars(self, prompt: str) -> int:
+        """プロンプトで指定された文字数（指定がなければ既定値）"""
+        match = TARGET_CHARS_PATTERN.search(prompt)
+        chars = int(match.group(1).replace(",", "")) if match else self.settings["default_chars"]
+        return max(1, int(chars * self.settings["length_scale"]))
+
+    def render(self, prompt: str) -> str:
+        """プロンプトに対する本文（同じプロンプトには同じ本文を返す）"""
+        digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+        if self.recordings:
+            return self.recordings[digest % len(self.recordings)]
+        return synthesize_markdown(prompt, self.target_chars(prompt), random.Random(digest ^ self.settings["seed"]))
+
+    async def _sleep(self, seconds: float):
+        self.stats["simulated_seconds"] += seconds
+        scaled = seconds * self.settings["time_scale"]
+        if scaled > 0:
+            await asyncio.sleep(scaled)
+
+    def _pick_failure(self) -> Optional[str]:
+        if self.settings["failure_rate"] and self.rng.random() < self.settings["failure_rate"]:
+            return self.rng.choice(self.settings["failure_kinds"])
+        return None
+
+    async def stream(self, prompt: str, max_turns: int = 1, **kwargs) -> AsyncIterator[str]:
+        """本文をチャンクごとに返す（最初のトークンとトークンごとの待ち時間を再現）"""
+        async for chunk in self._stream(prompt, self._pick_failure()):
+            yield chunk
+
+    async def _stream(self, prompt: str, failure: Optional[str]) -> AsyncIterator[str]:
+        self.stats["calls"] += 1
+        text = self.render(prompt)
+        chunk_chars = max(1, int(self.settings["stream_chunk_tokens"] * self.settings["chars_per_token"]))
+
+        await self._sleep(self.settings["first_token_latency"])
+        if failure in ("taskgroup", "error_result"):
+            self.stats["failures"] += 1
+            raise RuntimeError("unhandled errors in a TaskGroup (1 sub-exception)")
+
+        # タイムアウトは出力の途中で起こす
+        stop_at = len(text) // 2 if failure == "timeout" else len(text)
+        for start in range(0, stop_at, chunk_chars):
+            chunk = text[start:min(start + chunk_chars, stop_at)]
+            await self._sleep(len(chunk) / self.settings["chars_per_token"] * self.settings["token_latency"])
+            self.stats["chars"] += len(chunk)
+            yield chunk
+        if failure == "timeout":
+            self.stats["failures"] += 1
+            raise TimeoutError("mock backend: response timed out")
+
+    async def query_with_sdk(self, prompt: str, max_turns: int = 1, **kwargs) -> List[Dict[str, Any]]:
+        """ClaudeCodeSDKIntegration.query_with_sdkと同じ形式で応答を返す"""
+        started = time.time()
+        failure = self._pick_failure()
+
+        # error_resultは例外ではなく失敗の結果メッセージとして返す
+        if failure == "error_result":
+            self.stats["calls"] += 1
+            self.stats["failures"] += 1
+            await self._sleep(self.settings["first_token_latency"])
+            return [{"type": "result", "subtype": "error_during_execution", "is_error": True}]
+
+        text = "".join([chunk async for chunk in self._stream(prompt, failure)])
+        return [{
+            "type": "result",
+            "subtype": "success",
+            "result": text,
+            "duration_ms": int((time.time() - started) * 1000),
+            "usage": {"output_tokens": int(len(text) / self.settings["chars_per_token"])}
+        }]
+
+# 合成Markdownの部品
+SYNTHETIC_ASPECTS = ["基本概念", "アーキテクチャ", "実装手順", "設定とチューニング", "テスト戦略",
+                     "トラブルシューティング", "パフォーマンス最適化", "セキュリティ", "運用と監視", "導入事例"]
+SYNTHETIC_SENTENCES = [
+    "{keyword}を導入すると、{aspect}の見通しが大きく改善します。",
+    "まずは小さな構成で{keyword}を試し、効果を測定してから適用範囲を広げるのが安全です。",
+    "{aspect}では、設定値の根拠をチームで共有しておくことが重要です。",
+    "本番環境では、{keyword}の挙動をメトリクスで継続的に確認します。",
+    "よくある失敗は、{aspect}の前提条件を確認せずに設定を変更してしまうことです。",
+    "{keyword}の公式ドキュメントに沿って、段階的に移行を進めましょう。",
+    "チームの規模が大きくなるほど、{aspect}の自動化による効果が高まります。",
+]
+
+def _prompt_fields(prompt: str) -> Dict[str, str]:
+    return {key: value.strip() for key, value in FIELD_PATTERN.findall(prompt)}
+
+def synthesize_markdown(prompt: str, target_chars: int, rng: random.Random) -> str:
+    """見出し・段落・箇条書き・コードブロックを含む合成の記事本文を作る"""
+    fields = _prompt_fields(prompt)
+    keywords = [k.strip() for k in (fields.get("キーワード") or fields.get("タグ", "")).split(",") if k.strip()]
+    keywords = keywords or ["この技術"]
+    section_title = fields.get("セクション")
+
+    parts = []
+    length = 0
+    if section_title:
+        parts.append(f"## {section_title}\n")
+    elif "タイトル" in fields:
+        # 記事全体を求めるプロンプトにはフロントマターを付ける
+        parts.append(f"---\ntitle: {fields['タイトル']}\ndate: {fields.get('date', '')}\n"
+                     f"tags: {', '.join(keywords)}\n---\n")
+    section_index = 0
+    while length < target_chars:
+        aspect = SYNTHETIC_ASPECTS[section_index % len(SYNTHETIC_ASPECTS)]
+        keyword = keywords[section_index % len(keywords)]
+        heading = "###" if section_title else "##"
+        block = [f"{heading} {keyword}の{aspect}\n"]
+        for _ in range(3):
+            block.append("".join(
+                rng.choice(SYNTHETIC_SENTENCES).format(keyword=keyword, aspect=aspect)
+                for _ in range(rng.randint(3, 5))
+            ) + "\n")
+        block.append("\n".join(
+            f"- {keyword}の{rng.choice(SYNTHETIC_ASPECTS)}を確認する" for _ in range(3)
+        ) + "\n")
+        block.append(
+            "```python\n"
+            f"def check_{section_index}(config: dict) -> bool:\n"
+            f"    \"\"\"{keyword}の{aspect}を確認する\"\"\"\n"
+            f"    return config.get(\"enabled\", False)\n"
+            "```\n"
+        )
+        text = "\n".join(block)
+        parts.append(text)
+        length += len(text)
+        section_index += 1
+    return "\n".join(parts)
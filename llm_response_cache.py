@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+モデル呼び出しの応答キャッシュ
+(プロンプトのハッシュ, モデル, パラメータ) をキーに応答をディスクへ保存し、
+同じプロンプトの再実行・リトライではモデルを呼ばずに応答を返す。
+件数・容量の上限を超えたら最も長く使われていないものから削除し、TTLと明示的な無効化に対応する。
+replayモードではキャッシュだけで応答し、モデル待ちなしでパイプライン全体を再実行・計測できる。
+同じトピックで同じ本文を繰り返さないよう、記事生成では既定で無効（LLM_CACHE_MODEかベンチマークで有効にする）
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Any, AsyncIterator, Optional, Tuple
+
+from llm_backends import result_text, stream_text
+
+# キャッシュの動作モード
+#   readwrite: ヒットすれば再利用し、ミスしたらモデルを呼んで保存
+#   replay:    キャッシュだけで応答（ミスはReplayCacheMiss、TTLは無視）
+#   refresh:   常にモデルを呼び、結果でキャッシュを更新
+#   off:       キャッシュを使わない（既定）
+LLM_CACHE_MODES = ("readwrite", "replay", "refresh", "off")
+LLM_CACHE_MODE_ENV = "LLM_CACHE_MODE"
+DEFAULT_LLM_CACHE_MODE = "off"
+
+DEFAULT_LLM_CACHE_DIR = Path("data/llm_cache")
+DEFAULT_LLM_CACHE_SETTINGS = {
+    "ttl": 7 * 24 * 3600,             # 応答を再利用する期間（秒）
+    "max_entries": 500,               # 保存する応答数の上限
+    "max_bytes": 200 * 1024 * 1024    # キャッシュ全体の容量の上限
+}
+
+class ReplayCacheMiss(RuntimeError):
+    """replayモードでキャッシュにない呼び出しが行われた"""
+
+def resolve_cache_mode(mode: Optional[str] = None) -> str:
+    """動作モードを決める（引数 → 環境変数LLM_CACHE_MODE → off）"""
+    mode = mode or os.environ.get(LLM_CACHE_MODE_ENV) or DEFAULT_LLM_CACHE_MODE
+    if mode not in LLM_CACHE_MODES:
+        raise ValueError(f"不明なキャッシュモード: {mode}（{', '.join(LLM_CACHE_MODES)}）")
+    return mode
+
+def cache_key(prompt: str, model: str, params: Dict[str, Any]) -> str:
+    """(プロンプトのハッシュ, モデル, パラメータ) からキャッシュキーを作る"""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    material = json.dumps({"prompt": prompt_hash, "model": model, "params": params},
+                          sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+def is_successful_response(messages: List[Dict[str, Any]]) -> bool:
+    """保存してよい応答か（成功の結果メッセージを含むもののみ）"""
+    return any(
+        isinstance(message, dict) and message.get("type") == "result" and message.get("subtype") == "success"
+        for message in messages or []
+    )
+
+class ResponseCache:
+    """応答をキーごとのファイルに保存するディスクLRUキャッシュ（最終利用時刻はファイルのmtime）"""
+
+    def __init__(self, cache_dir=DEFAULT_LLM_CACHE_DIR, **settings):
+        self.cache_dir = Path(cache_dir)
+        self.settings = dict(DEFAULT_LLM_CACHE_SETTINGS)
+        self.settings.update(settings)
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "writes": 0, "evictions": 0}
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str, ignore_ttl: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """保存済みの応答（なければNone）。ヒットしたら最終利用時刻を更新する"""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.stats["misses"] += 1
+            return None
+
+        if not ignore_ttl and time.time() - entry.get("created_at", 0) > self.settings["ttl"]:
+            self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["messages"]
+
+    def put(self, key: str, messages: List[Dict[str, Any]], metadata: Dict[str, Any] = None) -> bool:
+        """応答を保存（JSONにできない応答は保存しない）"""
+        entry = {
+            "created_at": time.time(),
+            "metadata": metadata or {},
+            "messages": messages
+        }
+        try:
+            data = json.dumps(entry, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return False
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        temp_path = path.with_name(path.name + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        temp_path.replace(path)
+        self.stats["writes"] += 1
+        self._evict()
+        return True
+
+    def _entries(self) -> List[Tuple[Path, os.stat_result]]:
+        """(パス, stat) の一覧を最終利用の古い順に"""
+        if not self.cache_dir.exists():
+            return []
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                entries.append((path, path.stat()))
+            except OSError:
+                continue
+        entries.sort(key=lambda item: item[1].st_mtime)
+        return entries
+
+    def _evict(self):
+        """件数・容量の上限を超えた分を、最も長く使われていないものから削除"""
+        entries = self._entries()
+        total_bytes = sum(stat.st_size for _, stat in entries)
+        while entries and (len(entries) > self.settings["max_entries"] or total_bytes > self.settings["max_bytes"]):
+            path, stat = entries.pop(0)
+            path.unlink(missing_ok=True)
+            total_bytes -= stat.st_size
+            self.stats["evictions"] += 1
+
+    def invalidate(self, key: str) -> bool:
+        """指定したキーの応答を削除"""
+        path = self._path(key)
+        if path.exists():
+            path.unlink()
+            return True
+        return False
+
+    def prune_expired(self) -> int:
+        """TTLを過ぎた応答を削除し、削除数を返す"""
+        removed = 0
+        now = time.time()
+        for path, _ in self._entries():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    created_at = json.load(f).get("created_at", 0)
+            except (OSError, json.JSONDecodeError):
+                created_at = 0
+            if now - created_at > self.settings["ttl"]:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def clear(self) -> int:
+        """すべての応答を削除し、削除数を返す"""
+        entries = self._entries()
+        for path, _ in entries:
+            path.unlink(missing_ok=True)
+        return len(entries)
+
+    def summary(self) -> Dict[str, Any]:
+        """保存件数・容量と、このプロセスでの利用状況"""
+        entries = self._entries()
+        return {
+            "entries": len(entries),
+            "bytes": sum(stat.st_size for _, stat in entries),
+            **self.stats
+        }
+
+class CachedClaudeIntegration:
+    """ClaudeCodeSDKIntegrationの応答をキャッシュするラッパー（その他の属性は元のオブジェクトに委譲）"""
+
+    def __init__(self, integration, cache: ResponseCache = None, mode: str = None, model: str = None):
+        self.integration = integration
+        self.cache = cache or ResponseCache()
+        self.mode = resolve_cache_mode(mode)
+        self.model = model or getattr(integration, "model", None) or "default"
+
+    def __getattr__(self, name):
+        integration = self.__dict__.get("integration")
+        if integration is None:
+            raise AttributeError(name)
+        return getattr(integration, name)
+
+    async def query_with_sdk(self, prompt: str, max_turns: int = 1, **kwargs) -> List[Dict[str, Any]]:
+        """キャッシュにあれば保存済みの応答を、なければモデルを呼んで応答を返す"""
+        params = {"max_turns": max_turns, **kwargs}
+        key = cache_key(prompt, self.model, params)
+
+        if self.mode in ("readwrite", "replay"):
+            messages = self.cache.get(key, ignore_ttl=self.mode == "replay")
+            if messages is not None:
+                return messages
+            if self.mode == "replay":
+                raise ReplayCacheMiss(f"キャッシュにない呼び出しです: {key[:12]}（{prompt[:40]}...）")
+
+        if self.integration is None:
+            raise RuntimeError("Claude Code SDKが利用できません")
+
+        messages = await self.integration.query_with_sdk(prompt=prompt, max_turns=max_turns, **kwargs)
+
+        if self.mode != "off" and is_successful_response(messages):
+            self.cache.put(key, messages, self._metadata(prompt, params))
+        return messages
+
+    async def stream(self, prompt: str, max_turns: int = 1, **kwargs) -> AsyncIterator[str]:
+        """キャッシュにあれば保存済みの本文を、なければモデルの出力をチャンクごとに返す"""
+        params = {"max_turns": max_turns, **kwargs}
+        key = cache_key(prompt, self.model, params)
+
+        if self.mode in ("readwrite", "replay"):
+            messages = self.cache.get(key, ignore_ttl=self.mode == "replay")
+            text = result_text(messages)
+            if text is not None:
+                yield text
+                return
+            if self.mode == "replay":
+                raise ReplayCacheMiss(f"キャッシュにない呼び出しです: {key[:12]}（{prompt[:40]}...）")
+
+        if self.integration is None:
+            raise RuntimeError("Claude Code SDKが利用できません")
+
+        # 最後まで受け取れた本文だけを、query_with_sdkと同じ形式で保存する
+        chunks = []
+        async for chunk in stream_text(self.integration, prompt, max_turns, **kwargs):
+            if self.mode != "off":
+                chunks.append(chunk)
+            yield chunk
+        if self.mode != "off":
+            self.cache.put(key, [{"type": "result", "subtype": "success", "result": "".join(chunks)}],
+                           self._metadata(prompt, params))
+
+    def _metadata(self, prompt: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "params": params,
+            "prompt_preview": prompt[:200]
+        }
+
+def wrap_integration(integration, mode: str = None, cache: ResponseCache = None):
+    """統合オブジェクトをキャッシュ付きにする（offならそのまま返す。replayならSDKがなくても使える）"""
+    mode = resolve_cache_mode(mode)
+    if mode == "off" or (integration is None and mode != "replay"):
+        return integration
+    return CachedClaudeIntegration(integration, cache=cache, mode=mode)
+
+def main():
+    parser = argparse.ArgumentParser(description="モデル応答キャッシュの管理")
+    parser.add_argument("command", choices=["stats", "prune", "clear"])
+    parser.add_argument("--dir", default=str(DEFAULT_LLM_CACHE_DIR), help="キャッシュディレクトリ")
+    args = parser.parse_args()
+
+    cache = ResponseCache(args.dir)
+    if args.command == "stats":
+        summary = cache.summary()
+        print(f"📦 応答キャッシュ: {summary['entries']}件 / {summary['bytes'] / 1024 / 1024:.1f}MB")
+    elif args.command == "prune":
+        print(f"🧹 期限切れの応答を削除しました: {cache.prune_expired()}件")
+    else:
+        print(f"🗑️ 応答キャッシュを削除しました: {cache.clear()}件")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+"""
+記事パイプラインの常駐デーモン
+モジュール・コンパイル済みの正規表現・評価器/校正器のインスタンス・HTTPの接続プールを温めたまま常駐し、
+生成・評価・校正・RSSキュレーション・公開を優先度付きのジョブキューで実行する。
+同じ状態ファイルを触るジョブはロックで直列化し、ジョブの種類ごとと全体の同時実行数を制限する。
+操作はローカルのUNIXソケット（1行1リクエストのJSON）で行う
+
+    python pipeline_daemon.py serve
+    python pipeline_daemon.py submit generate
+    python pipeline_daemon.py status
+"""
+
+import argparse
+import asyncio
+import heapq
+import importlib
+import itertools
+import json
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Dict, List, Any, Callable, Optional
+
+from append_log import AppendOnlyLog
+from error_journal import ErrorJournal
+
+# 日本標準時のタイムゾーン
+JST = timezone(timedelta(hours=9))
+
+PIPELINE_JOBS_FILE = Path("pipeline_jobs.jsonl")
+
+# ジョブの種類（priorityは小さいほど先に実行。locksを共有するジョブは同時に動かさない）
+#   posts: posts/ を書き換える・読み込むジョブ（公開と統計も、校正・RSSの書き換え中には読まない）
+#   site:  docs/ を書き換えるジョブ
+#   evaluation: 評価と改善ルールの更新
+#   state: カレントディレクトリの状態ファイル（*_history.json・blog_stats.jsonなど）を保存するジョブ
+# threaded: 処理をスレッドで行うジョブ。取り消し・タイムアウトでもスレッドは止まらないので、終わるまでロックを保持する
+JOB_TYPES = {
+    "publish": {"priority": 10, "concurrency": 1, "locks": ["site", "posts"], "threaded": True},
+    "generate": {"priority": 20, "concurrency": 1, "locks": ["posts", "site", "evaluation", "state"]},
+    "evaluate": {"priority": 30, "concurrency": 1, "locks": ["evaluation", "state"]},
+    "proofread": {"priority": 30, "concurrency": 1, "locks": ["posts", "state"]},
+    "rss": {"priority": 40, "concurrency": 1, "locks": ["posts", "state"]},
+    "stats": {"priority": 50, "concurrency": 1, "locks": ["posts", "state"], "threaded": True},
+}
+
+DEFAULT_DAEMON_SETTINGS = {
+    "socket_path": "data/pipeline_daemon.sock",
+    "max_concurrent_jobs": 2,      # 全体の同時実行数
+    "job_timeout": 3600.0,         # 1ジョブの時間予算（秒）
+    # 定期実行の間隔（秒）
+    "schedule": {"generate": 4 * 3600, "rss": 4 * 3600, "stats": 3600},
+    "run_on_start": False,         # 起動直後に定期ジョブを1回ずつ実行する
+    "history_size": 50,            # statusで返す終了済みジョブの数
+    "shutdown_grace": 60.0         # 終了時に実行中のジョブを待つ秒数
+}
+
+# 起動時に読み込んでおくモジュール（なければ飛ばす）
+WARM_MODULES = [
+    "generate_detailed_article_v4", "snippet_store", "convert_articles_v3", "update_to_modern_ui_v3",
+    "article_evaluator", "article_proofreader", "rss_aggregator", "markdown", "httpx"
+]
+
+def warm_imports() -> Dict[str, float]:
+    """モジュールを読み込み、それぞれの所要時間（秒）を返す"""
+    timings = {}
+    for name in WARM_MODULES:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        timings[name] = round(time.perf_counter() - started, 3)
+    return timings
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp, JST).isoformat() if timestamp else None
+
+@dataclass
+class Job:
+    """キューに入ったジョブ"""
+    job_id: int
+    kind: str
+    priority: int
+    params: Dict[str, Any] = field(default_factory=dict)
+    status: str = "queued"
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+
+    def summary(self) -> Dict[str, Any]:
+        """ステータス表示・ジョブログ用の要約"""
+        duration = None
+        if self.started_at:
+            duration = round((self.finished_at or time.time()) - self.started_at, 2)
+        return {
+            "timestamp": _isoformat(self.finished_at or self.submitted_at),
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "priority": self.priority,
+            "status": self.status,
+            "params": self.params,
+            "submitted_at": _isoformat(self.submitted_at),
+            "started_at": _isoformat(self.started_at),
+            "duration_seconds": duration,
+            "result": self.result,
+            "error": self.error
+        }
+
+class JobQueue:
+    """優先度付きキュー（実行できるジョブのうち最も優先度が高いものを取り出す）"""
+
+    def __init__(self):
+        self.heap: List = []
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def push(self, job: Job):
+        heapq.heappush(self.heap, (job.priority, job.job_id, job))
+
+    def pop_runnable(self, can_run: Callable[[Job], bool]) -> Optional[Job]:
+        """can_runを満たす最優先のジョブを取り出す（ロック待ちのジョブが後続を塞がないように）"""
+        for item in sorted(self.heap):
+            if can_run(item[2]):
+                self.heap.remove(item)
+                heapq.heapify(self.heap)
+                return item[2]
+        return None
+
+    def remove(self, job_id: int) -> Optional[Job]:
+        for item in self.heap:
+            if item[1] == job_id:
+                self.heap.remove(item)
+                heapq.heapify(self.heap)
+                return item[2]
+        return None
+
+    def jobs(self) -> List[Job]:
+        return [item[2] for item in sorted(self.heap)]
+
+class PipelineServices:
+    """ジョブ間で使い回す、温めたインスタンスとHTTPクライアント"""
+
+    def __init__(self):
+        self.http_client = None
+        self.full_review = None
+        self.rss = None
+        self.import_timings: Dict[str, float] = {}
+
+    async def start(self):
+        import httpx
+        from generate_article_with_full_review import FullReviewArticleSystem
+        from rss_aggregator import RSSAggregator
+
+        self.import_timings = warm_imports()
+        self.http_client = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+            headers={"User-Agent": "Mozilla/5.0 (compatible; AlicAIBot/1.0)"}
+        )
+        self.full_review = FullReviewArticleSystem(publish_in_process=True)
+        # 生成器は遅延読み込みなので、ここで作っておく
+        self.full_review.article_generator
+        self.full_review.proofreading_system.proofreader.link_checker.http_client = self.http_client
+        self.rss = RSSAggregator()
+        self.rss.http_client = self.http_client
+
+    async def close(self):
+        if self.http_client is not None:
+            await self.http_client.aclose()
+
+class PipelineDaemon:
+    """ジョブキュー・スケジューラ・制御ソケットを持つ常駐プロセス"""
+
+    def __init__(self, services: PipelineServices = None, **settings):
+        self.settings = json.loads(json.dumps(DEFAULT_DAEMON_SETTINGS))
+        self.settings.update(settings)
+        self.services = services or PipelineServices()
+        self.queue = JobQueue()
+        self.running: Dict[int, Job] = {}
+        self.tasks: Dict[int, asyncio.Task] = {}
+        self.held_locks = set()
+        self.history = deque(maxlen=self.settings["history_size"])
+        self.jobs_log = AppendOnlyLog(PIPELINE_JOBS_FILE)
+        self.error_journal = ErrorJournal()
+        self.job_ids = itertools.count(len(self.jobs_log) + 1)
+        self.last_scheduled: Dict[str, float] = {}
+        self.handlers: Dict[str, Callable] = {
+            "generate": self._run_generate,
+            "evaluate": self._run_evaluate,
+            "proofread": self._run_proofread,
+            "rss": self._run_rss,
+            "publish": self._run_publish,
+            "stats": self._run_stats,
+        }
+        self.started_at = time.time()
+        self.stopping = False
+        self._wake = asyncio.Event()
+        self._stopped = asyncio.Event()
+
+    # ジョブの受付と実行
+
+    def submit(self, kind: str, priority: int = None, params: Dict[str, Any] = None) -> Job:
+        """ジョブをキューに入れる"""
+        if kind not in JOB_TYPES:
+            raise ValueError(f"不明なジョブ: {kind}（{', '.join(JOB_TYPES)}）")
+        if self.stopping:
+            raise RuntimeError("デーモンは終了処理中です")
+        job = Job(next(self.job_ids), kind, JOB_TYPES[kind]["priority"] if priority is None else priority,
+                  params or {})
+        self.queue.push(job)
+        self._wake.set()
+        return job
+
+    def _is_pending(self, kind: str) -> bool:
+        return any(job.kind == kind for job in list(self.running.values()) + self.queue.jobs())
+
+    def _can_run(self, job: Job) -> bool:
+        spec = JOB_TYPES[job.kind]
+        same_kind = sum(1 for running in self.running.values() if running.kind == job.kind)
+        return same_kind < spec["concurrency"] and not self.held_locks.intersection(spec["locks"])
+
+    async def _dispatch(self):
+        """実行枠とロックが空いたら、実行できる最優先のジョブを起動する"""
+        while not self.stopping:
+            self._wake.clear()
+            while len(self.running) < self.settings["max_concurrent_jobs"]:
+                job = self.queue.pop_runnable(self._can_run)
+                if job is None:
+                    break
+                self._start(job)
+            await self._wake.wait()
+
+    def _start(self, job: Job):
+        job.status = "running"
+        job.started_at = time.time()
+        self.held_locks.update(JOB_TYPES[job.kind]["locks"])
+        self.running[job.job_id] = job
+        self.tasks[job.job_id] = asyncio.create_task(self._run(job))
+        print(f"▶️  ジョブ開始: #{job.job_id} {job.kind}")
+
+    async def _run(self, job: Job):
+        handler = asyncio.ensure_future(self.handlers[job.kind](job))
+        try:
+            # スレッドで動くジョブは取り消しても処理が止まらないので、待つのをやめるだけにする
+            awaitable = asyncio.shield(handler) if JOB_TYPES[job.kind].get("threaded") else handler
+            job.result = await asyncio.wait_for(awaitable, timeout=self.settings["job_timeout"])
+            job.status = "done"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = f"{type(e).__name__}: {e}"
+            self.error_journal.record_error(e, {"job": job.kind, "job_id": job.job_id})
+            traceback.print_exc()
+        finally:
+            if not handler.done():
+                print(f"⏳ #{job.job_id} {job.kind} のスレッドが終わるまでロックを保持します")
+            while not handler.done():
+                try:
+                    await asyncio.wait({handler})
+                except asyncio.CancelledError:
+                    # 重ねて取り消されても、ロックを解放する前にスレッドの終了を待つ
+                    continue
+            if not handler.cancelled():
+                handler.exception()
+            job.finished_at = time.time()
+            self.held_locks.difference_update(JOB_TYPES[job.kind]["locks"])
+            self.running.pop(job.job_id, None)
+            self.tasks.pop(job.job_id, None)
+            self._finish(job)
+
+    def _finish(self, job: Job):
+        summary = job.summary()
+        self.history.append(summary)
+        self.jobs_log.append(summary)
+        if job.status == "failed":
+            self.error_journal.flush()
+        icon = {"done": "✅", "failed": "❌", "cancelled": "🚫"}.get(job.status, "•")
+        print(f"{icon} ジョブ終了: #{job.job_id} {job.kind} {job.status}（{summary['duration_seconds']}秒）")
+        self._wake.set()
+
+    def cancel(self, job_id: int) -> Optional[Job]:
+        """待機中のジョブを取り消すか、実行中のジョブを中断する"""
+        job = self.queue.remove(job_id)
+        if job is not None:
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            self._finish(job)
+            return job
+        task = self.tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+            return self.running.get(job_id)
+        return None
+
+    async def _schedule(self):
+        """定期ジョブを間隔ごとにキューに入れる（同じ種類が待機中・実行中なら入れない）"""
+        now = time.time()
+        for kind in self.settings["schedule"]:
+            self.last_scheduled[kind] = 0.0 if self.settings["run_on_start"] else now
+        while not self.stopping:
+            now = time.time()
+            for kind, interval in self.settings["schedule"].items():
+                if interval and now - self.last_scheduled[kind] >= interval and not self._is_pending(kind):
+                    self.last_scheduled[kind] = now
+                    self.submit(kind)
+            await asyncio.sleep(30)
+
+    # ジョブの処理
+
+    async def _run_generate(self, job: Job) -> Dict[str, Any]:
+        result = await self.services.full_review.generate_with_full_review()
+        return {
+            "final_score": result.get("final_score"),
+            "published": result.get("published"),
+            "quality_status": result.get("quality_status"),
+            "phase_timings": result.get("phase_timings")
+        }
+
+    async def _run_evaluate(self, job: Job) -> Dict[str, Any]:
+        report = await self.services.full_review.evaluation_system.evaluate_and_improve()
+        return {"average_score": report.get("average_score"), "rules_updated": report.get("rules_updated")}
+
+    async def _run_proofread(self, job: Job) -> Dict[str, Any]:
+        path = job.params.get("path")
+        if not path:
+            posts = sorted(Path("posts").glob("*.md"), key=lambda p: p.stat().st_mtime)
+            if not posts:
+                raise FileNotFoundError("校正する記事がありません")
+            path = posts[-1]
+        result = await self.services.full_review.proofreading_system.generate_and_proofread(Path(path))
+        proofreading = result["proofreading_result"]
+        return {
+            "article": str(path),
+            "final_score": proofreading["final_score"],
+            "issues": len(proofreading["issues_found"]),
+            "corrections": len(proofreading["corrections"])
+        }
+
+    async def _run_rss(self, job: Job) -> Dict[str, Any]:
+        articles = await self.services.rss.fetch_all_feeds()
+        article_id = None
+        if articles:
+            article_id = await self.services.rss.generate_curated_article(articles)
+            # キュレーション記事を公開する
+            self.submit("publish")
+        return {"articles": len(articles), "article_id": article_id}
+
+    async def _run_publish(self, job: Job) -> Dict[str, Any]:
+        from generate_article_with_full_review import publish_site
+        await publish_site(in_process=True)
+        return {}
+
+    async def _run_stats(self, job: Job) -> Dict[str, Any]:
+        import blog_stats
+        await asyncio.to_thread(blog_stats.generate_blog_stats)
+        return {}
+
+    # 制御ソケット
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "stopping": self.stopping,
+            "running": [job.summary() for job in self.running.values()],
+            "queued": [job.summary() for job in self.queue.jobs()],
+            "recent": list(self.history)[-10:],
+            "held_locks": sorted(self.held_locks),
+            "import_timings": self.services.import_timings
+        }
+
+    def handle_command(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """制御コマンドを1件処理"""
+        command = request.get("command")
+        if command == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if command == "submit":
+            job = self.submit(request["job"], request.get("priority"), request.get("params"))
+            return {"ok": True, "job": job.summary()}
+        if command == "status":
+            return {"ok": True, **self.status()}
+        if command == "cancel":
+            job = self.cancel(int(request["job_id"]))
+            if job is None:
+                return {"ok": False, "error": f"ジョブが見つかりません: {request['job_id']}"}
+            return {"ok": True, "job": job.summary()}
+        if command == "shutdown":
+            self.request_stop()
+            return {"ok": True}
+        return {"ok": False, "error": f"不明なコマンド: {command}"}
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = self.handle_command(json.loads(line))
+                except Exception as e:
+                    response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                writer.write((json.dumps(response, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+                await writer.drain()
+                if self.stopping:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    # 起動と終了
+
+    def request_stop(self):
+        """新しいジョブの受付をやめ、待機中のジョブを取り消して終了させる"""
+        if self.stopping:
+            return
+        self.stopping = True
+        for job in self.queue.jobs():
+            self.cancel(job.job_id)
+        self._wake.set()
+        self._stopped.set()
+
+    async def serve(self):
+        """ソケットを開き、キューとスケジューラを動かし続ける"""
+        socket_path = Path(self.settings["socket_path"])
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if socket_path.exists():
+            if _socket_alive(socket_path):
+                raise RuntimeError(f"デーモンはすでに起動しています: {socket_path}")
+            socket_path.unlink()
+
+        started = time.perf_counter()
+        await self.services.start()
+        print(f"🔥 ウォームアップ完了: {time.perf_counter() - started:.2f}秒")
+
+        server = await asyncio.start_unix_server(self._handle_client, path=str(socket_path))
+        os.chmod(socket_path, 0o600)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.request_stop)
+        print(f"🛰️  パイプラインデーモン起動: {socket_path}（pid {os.getpid()}）")
+
+        background = [asyncio.create_task(self._dispatch()), asyncio.create_task(self._schedule())]
+        try:
+            await self._stopped.wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+            if self.tasks:
+                print(f"⏳ 実行中のジョブを待っています（最大{self.settings['shutdown_grace']}秒）")
+                _, pending = await asyncio.wait(list(self.tasks.values()), timeout=self.settings["shutdown_grace"])
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+            self.error_journal.flush()
+            await self.services.close()
+            socket_path.unlink(missing_ok=True)
+            print("👋 パイプラインデーモンを終了しました")
+
+def _socket_alive(socket_path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+            return True
+        except OSError:
+            return False
+
+def send_command(request: Dict[str, Any], socket_path=DEFAULT_DAEMON_SETTINGS["socket_path"],
+                 timeout: float = 10.0) -> Dict[str, Any]:
+    """デーモンにコマンドを送り、応答を返す"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+        sock.sendall((json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as f:
+            return json.loads(f.readline())
+
+def print_status(status: Dict[str, Any]):
+    """statusの応答を表示"""
+    print(f"🛰️  pid {status['pid']}  稼働 {status['uptime_seconds']}秒  ロック: {', '.join(status['held_locks']) or 'なし'}")
+    for label, jobs in (("実行中", status["running"]), ("待機中", status["queued"]), ("最近", status["recent"])):
+        print(f"-- {label}（{len(jobs)}件）")
+        for job in jobs:
+            detail = job["error"] or job["result"] or ""
+            print(f"  #{job['job_id']:<5} {job['kind']:<10} p{job['priority']:<3} {job['status']:<9} "
+                  f"{job['duration_seconds'] or '':>8} {detail}")
+
+def main():
+    parser = argparse.ArgumentParser(description="記事パイプラインの常駐デーモン")
+    parser.add_argument("--socket", default=DEFAULT_DAEMON_SETTINGS["socket_path"], help="制御ソケットのパス")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="デーモンを起動")
+    serve_parser.add_argument("--max-jobs", type=int, default=DEFAULT_DAEMON_SETTINGS["max_concurrent_jobs"],
+                              help="全体の同時実行数")
+    serve_parser.add_argument("--run-on-start", action="store_true", help="起動直後に定期ジョブを実行")
+    serve_parser.add_argument("--no-schedule", action="store_true", help="定期実行をしない（submitのみ）")
+
+    submit_parser = subparsers.add_parser("submit", help="ジョブを追加")
+    submit_parser.add_argument("job", choices=list(JOB_TYPES))
+    submit_parser.add_argument("--priority", type=int, default=None, help="優先度（小さいほど先）")
+    submit_parser.add_argument("--param", action="append", default=[], help="key=value 形式のパラメータ")
+
+    cancel_parser = subparsers.add_parser("cancel", help="ジョブを取り消す")
+    cancel_parser.add_argument("job_id", type=int)
+
+    subparsers.add_parser("status", help="キューと実行中のジョブを表示")
+    subparsers.add_parser("ping", help="デーモンが応答するか確認")
+    subparsers.add_parser("shutdown", help="デーモンを終了")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        settings = {"socket_path": args.socket, "max_concurrent_jobs": args.max_jobs,
+                    "run_on_start": args.run_on_start}
+        if args.no_schedule:
+            settings["schedule"] = {}
+        try:
+            asyncio.run(PipelineDaemon(**settings).serve())
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        return
+
+    request: Dict[str, Any] = {"command": args.command}
+    if args.command == "submit":
+        request.update(job=args.job, priority=args.priority,
+                       params=dict(param.split("=", 1) for param in args.param))
+    elif args.command == "cancel":
+        request["job_id"] = args.job_id
+
+    try:
+        response = send_command(request, args.socket)
+    except OSError as e:
+        print(f"❌ デーモンに接続できません（{args.socket}）: {e}")
+        sys.exit(1)
+
+    if not response.get("ok"):
+        print(f"❌ {response.get('error')}")
+        sys.exit(1)
+    if args.command == "status":
+        print_status(response)
+    elif args.command == "submit":
+        print(f"📥 ジョブを追加しました: #{response['job']['job_id']} {response['job']['kind']}")
+    elif args.command == "cancel":
+        print(f"🚫 ジョブを取り消しました: #{response['job']['job_id']}")
+    elif args.command == "shutdown":
+        print("👋 終了を指示しました")
+    else:
+        print(f"✅ 応答あり（pid {response['pid']}）")
+
+if __name__ == "__main__":
+    main()
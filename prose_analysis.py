@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+地の文の解析（文・段落の分割と読みやすさの指標）
+フロントマターとコードブロックを除いた本文を1回だけ走査して文と段落に分け、
+文の長さの分布・受動態の割合などを計算する。結果は本文のハッシュでキャッシュし、
+校正・評価・自己進化トラッカーで共有する
+"""
+
+import hashlib
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Tuple
+
+# 文末（閉じ括弧は直前の文に含める）
+SENTENCE_PATTERN = re.compile(r'.+?(?:[。！？]+[」』）]*|$)', re.DOTALL)
+PASSIVE_PATTERN = re.compile(r'れる|られる')
+HEADING_PATTERN = re.compile(r'#{1,6}\s')
+LIST_ITEM_PATTERN = re.compile(r'\s*(?:[-*+]|\d+\.)\s+')
+BLOCKQUOTE_PATTERN = re.compile(r'>\s?')
+
+# この文字数を超える文を長文とみなす
+LONG_SENTENCE_LENGTH = 100
+
+PROSE_CACHE_SIZE = 256
+_PROSE_CACHE: "OrderedDict[str, ProseMetrics]" = OrderedDict()
+prose_cache_stats = {"hits": 0, "misses": 0}
+
+@dataclass
+class ProseMetrics:
+    """地の文の解析結果（キャッシュで共有するので読み取り専用として扱う）"""
+    sentences: List[Tuple[int, int]] = field(default_factory=list)
+    sentence_lengths: List[int] = field(default_factory=list)
+    passive_count: int = 0
+    passive_sentences: int = 0
+    paragraph_lengths: List[int] = field(default_factory=list)
+    bullet_count: int = 0
+    heading_count: int = 0
+    code_block_count: int = 0
+    prose_chars: int = 0
+    code_chars: int = 0
+
+    @property
+    def sentence_count(self) -> int:
+        return len(self.sentence_lengths)
+
+    @property
+    def paragraph_count(self) -> int:
+        return len(self.paragraph_lengths)
+
+    @property
+    def average_sentence_length(self) -> float:
+        return sum(self.sentence_lengths) / len(self.sentence_lengths) if self.sentence_lengths else 0.0
+
+    @property
+    def passive_ratio(self) -> float:
+        """受動態を含む文の割合"""
+        return self.passive_sentences / len(self.sentence_lengths) if self.sentence_lengths else 0.0
+
+    def sentence_length_percentile(self, percent: float) -> int:
+        """文の長さのパーセンタイル（最近傍順位法）"""
+        if not self.sentence_lengths:
+            return 0
+        ordered = sorted(self.sentence_lengths)
+        rank = max(1, -(-len(ordered) * percent // 100))
+        return ordered[int(rank) - 1]
+
+    def long_sentences(self, threshold: int = LONG_SENTENCE_LENGTH) -> List[int]:
+        """長文の番号（0始まり）"""
+        return [i for i, length in enumerate(self.sentence_lengths) if length > threshold]
+
+    def summary(self) -> Dict[str, Any]:
+        """ログやレポートに残す要約"""
+        return {
+            "sentence_count": self.sentence_count,
+            "average_sentence_length": round(self.average_sentence_length, 1),
+            "median_sentence_length": self.sentence_length_percentile(50),
+            "p90_sentence_length": self.sentence_length_percentile(90),
+            "max_sentence_length": max(self.sentence_lengths, default=0),
+            "long_sentence_count": len(self.long_sentences()),
+            "passive_ratio": round(self.passive_ratio, 3),
+            "paragraph_count": self.paragraph_count,
+            "bullet_count": self.bullet_count,
+            "prose_chars": self.prose_chars,
+            "code_chars": self.code_chars
+        }
+
+def _body_start(content: str) -> int:
+    """フロントマターの直後の位置（なければ0）"""
+    if not content.startswith("---\n"):
+        return 0
+    end = content.find("\n---", 3)
+    if end < 0:
+        return 0
+    line_end = content.find("\n", end + 4)
+    return len(content) if line_end < 0 else line_end + 1
+
+def _add_sentences(metrics: ProseMetrics, content: str, start: int, end: int):
+    """[start, end) の地の文を文に分けて指標に加える"""
+    for match in SENTENCE_PATTERN.finditer(content, start, end):
+        text = match.group(0)
+        length = len(text.replace("\n", "").strip())
+        if not length:
+            continue
+        metrics.sentences.append(match.span())
+        metrics.sentence_lengths.append(length)
+        passive = len(PASSIVE_PATTERN.findall(text))
+        metrics.passive_count += passive
+        if passive:
+            metrics.passive_sentences += 1
+
+def analyze_prose(content: str) -> ProseMetrics:
+    """本文を1回の行走査で文・段落に分割して指標を計算"""
+    metrics = ProseMetrics()
+    position = _body_start(content)
+    in_fence = False
+    paragraph_start = None   # 連続する通常行（1つの段落として文に分ける）の開始位置
+    paragraph_length = 0     # 空行までのブロック（箇条書きを含む）の文字数
+
+    def close_text_run(run_end: int):
+        nonlocal paragraph_start
+        if paragraph_start is not None:
+            _add_sentences(metrics, content, paragraph_start, run_end)
+            paragraph_start = None
+
+    def close_paragraph(run_end: int):
+        nonlocal paragraph_length
+        close_text_run(run_end)
+        if paragraph_length:
+            metrics.paragraph_lengths.append(paragraph_length)
+            paragraph_length = 0
+
+    while position < len(content):
+        line_end = content.find("\n", position)
+        if line_end < 0:
+            line_end = len(content)
+        line = content[position:line_end]
+        stripped = line.strip()
+
+        if line.startswith("```"):
+            close_paragraph(position)
+            if not in_fence:
+                metrics.code_block_count += 1
+            in_fence = not in_fence
+        elif in_fence:
+            metrics.code_chars += len(line) + 1
+        elif not stripped:
+            close_paragraph(position)
+        elif HEADING_PATTERN.match(line):
+            close_paragraph(position)
+            metrics.heading_count += 1
+        elif stripped.startswith("|"):
+            close_text_run(position)  # 表の行は文として数えない
+        else:
+            metrics.prose_chars += len(stripped)
+            paragraph_length += len(stripped)
+            item = LIST_ITEM_PATTERN.match(line) or BLOCKQUOTE_PATTERN.match(line)
+            if item:
+                # 箇条書き・引用は1行を1つの単位として文に分ける
+                close_text_run(position)
+                if LIST_ITEM_PATTERN.match(line):
+                    metrics.bullet_count += 1
+                _add_sentences(metrics, content, position + item.end(), line_end)
+            elif paragraph_start is None:
+                paragraph_start = position
+
+        position = line_end + 1
+
+    close_paragraph(len(content))
+    return metrics
+
+def get_prose_metrics(content: str) -> ProseMetrics:
+    """本文の解析結果（同じ本文は1回だけ解析する）"""
+    key = hashlib.sha1(content.encode("utf-8")).hexdigest()
+    metrics = _PROSE_CACHE.get(key)
+    if metrics is not None:
+        prose_cache_stats["hits"] += 1
+        _PROSE_CACHE.move_to_end(key)
+        return metrics
+
+    prose_cache_stats["misses"] += 1
+    metrics = analyze_prose(content)
+    _PROSE_CACHE[key] = metrics
+    if len(_PROSE_CACHE) > PROSE_CACHE_SIZE:
+        _PROSE_CACHE.popitem(last=False)
+    return metrics
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+品質トレンドの逐次集計
+評価・生成の記録を1件ずつ取り込み、カテゴリごとの件数・平均・分散（Welford法）・
+最小/最大・値の度数・直近ウィンドウを保持する。履歴の長さによらず一定時間で
+トレンドを返せるようにし、状態は元のログからいつでも作り直せる
+"""
+
+import json
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Any, Optional
+
+from state_files import save_json_state
+
+STATE_VERSION = 1
+DEFAULT_WINDOW = 20
+
+class RunningStats:
+    """1カテゴリ分の逐次統計"""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.total = 0.0
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+        # スコアは取りうる値が限られるので、度数表から中央値を正確に求められる
+        self.value_counts: Dict[float, int] = {}
+        self.recent = deque(maxlen=window)
+
+    def add(self, value: float):
+        """1件追加（O(1)）"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.total += value
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        self.value_counts[value] = self.value_counts.get(value, 0) + 1
+        self.recent.append(value)
+
+    @property
+    def variance(self) -> float:
+        """標本分散"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def last(self) -> Optional[float]:
+        return self.recent[-1] if self.recent else None
+
+    def median(self) -> Optional[float]:
+        """度数表から中央値を求める（偶数件なら中央2値の平均）"""
+        if not self.count:
+            return None
+        lower_rank = (self.count - 1) // 2
+        upper_rank = self.count // 2
+        lower = upper = None
+        seen = 0
+        for value in sorted(self.value_counts):
+            seen += self.value_counts[value]
+            if lower is None and seen > lower_rank:
+                lower = value
+            if seen > upper_rank:
+                upper = value
+                break
+        return lower if lower == upper else (lower + upper) / 2
+
+    def tail_mean(self, n: int) -> float:
+        """直近n件の平均（nはウィンドウ以下）"""
+        values = list(self.recent)[-n:]
+        return sum(values) / len(values)
+
+    def mean_excluding_tail(self, n: int) -> Optional[float]:
+        """直近n件を除いた全履歴の平均"""
+        if self.count <= n:
+            return None
+        excluded = sum(list(self.recent)[-n:]) if n else 0.0
+        return (self.total - excluded) / (self.count - n)
+
+    def windowed_averages(self, recent_size: int = 10) -> Dict[str, float]:
+        """直近recent_size件と、その前recent_size件（履歴が短ければ前半）の平均"""
+        window = list(self.recent)
+        recent = window[-recent_size:]
+        if self.count >= recent_size * 2:
+            older = window[-recent_size * 2:-recent_size]
+        else:
+            older = window[:self.count // 2]
+        recent_average = sum(recent) / len(recent) if recent else 0.0
+        older_average = sum(older) / len(older) if older else recent_average
+        return {"recent_average": recent_average, "older_average": older_average}
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "variance": self.variance,
+            "min": self.minimum,
+            "max": self.maximum
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "total": self.total,
+            "min": self.minimum,
+            "max": self.maximum,
+            "value_counts": [[value, count] for value, count in sorted(self.value_counts.items())],
+            "recent": list(self.recent)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], window: int = DEFAULT_WINDOW) -> "RunningStats":
+        stats = cls(window)
+        stats.count = data["count"]
+        stats.mean = data["mean"]
+        stats.m2 = data["m2"]
+        stats.total = data["total"]
+        stats.minimum = data["min"]
+        stats.maximum = data["max"]
+        stats.value_counts = {value: count for value, count in data["value_counts"]}
+        stats.recent.extend(data["recent"])
+        return stats
+
+class QualityAggregates:
+    """記録列に対するカテゴリ別の逐次集計（JSONで永続化）"""
+
+    def __init__(self, path, extract: Callable[[Dict[str, Any]], Dict[str, float]],
+                 day_of: Optional[Callable[[Dict[str, Any]], str]] = None, window: int = DEFAULT_WINDOW):
+        self.path = Path(path)
+        self.extract = extract
+        self.day_of = day_of
+        self.window = window
+        self.reset()
+        self.load()
+
+    def reset(self):
+        """空の状態に戻す"""
+        self.source_count = 0
+        self.categories: Dict[str, RunningStats] = {}
+        self.daily: Dict[str, Dict[str, Any]] = {}
+
+    def load(self):
+        """保存済みの状態を読み込む（形式やウィンドウが違えば空から作り直す）"""
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return
+        if state.get("version") != STATE_VERSION or state.get("window") != self.window:
+            return
+        self.source_count = state["source_count"]
+        self.categories = {
+            name: RunningStats.from_dict(data, self.window)
+            for name, data in state["categories"].items()
+        }
+        self.daily = state.get("daily", {})
+
+    def save(self):
+        """状態を保存（一時ファイルに書いてから置き換える）"""
+        state = {
+            "version": STATE_VERSION,
+            "window": self.window,
+            "source_count": self.source_count,
+            "categories": {name: stats.to_dict() for name, stats in self.categories.items()},
+            "daily": self.daily
+        }
+        save_json_state(self.path, state)
+
+    def add(self, record: Dict[str, Any]):
+        """記録を1件取り込む"""
+        values = self.extract(record)
+        for name, value in values.items():
+            if name not in self.categories:
+                self.categories[name] = RunningStats(self.window)
+            self.categories[name].add(float(value))
+
+        if self.day_of:
+            day = self.day_of(record)
+            entry = self.daily.setdefault(day, {"count": 0, "sums": {}, "counts": {}})
+            entry["count"] += 1
+            for name, value in values.items():
+                entry["sums"][name] = entry["sums"].get(name, 0.0) + float(value)
+                entry["counts"][name] = entry["counts"].get(name, 0) + 1
+
+        self.source_count += 1
+
+    def add_many(self, records: Iterable[Dict[str, Any]]):
+        for record in records:
+            self.add(record)
+
+    def sync(self, total: int, read_from: Callable[[int], Iterable[Dict[str, Any]]]) -> bool:
+        """元の記録（total件）に追いつかせる。未取り込み分だけ読み、記録が減っていれば作り直す"""
+        if self.source_count == total:
+            return False
+        if self.source_count > total:
+            self.reset()
+        self.add_many(read_from(self.source_count))
+        return True
+
+    def rebuild(self, records: Iterable[Dict[str, Any]]):
+        """記録全体から作り直す"""
+        self.reset()
+        self.add_many(records)
+
+    def get(self, name: str) -> Optional[RunningStats]:
+        return self.categories.get(name)
+
+    def daily_averages(self, name: str) -> List[Dict[str, Any]]:
+        """日ごとの件数と平均"""
+        return [
+            {
+                "date": day,
+                "count": entry["count"],
+                "average": round(entry["sums"][name] / entry["counts"][name], 2) if name in entry["sums"] else None
+            }
+            for day, entry in sorted(self.daily.items())
+        ]
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+改善レポートの列指向ストア
+improvement_report_*.json を1実行1ファイルで増やす代わりに、日ごとの
+圧縮セグメント（gzip JSON Lines）と集計用の列ファイルにまとめて保存する
+列ファイルはpyarrowがあればParquet、なければNumPyの.npz、どちらもなければJSON。
+正本はセグメントで、列ファイルがこの環境で読めない形式・壊れている・件数が合わないときはセグメントから作り直す
+"""
+
+import argparse
+import gzip
+import json
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+from state_files import save_json_state
+
+# 日本標準時のタイムゾーン
+JST = timezone(timedelta(hours=9))
+
+LEGACY_REPORT_PATTERN = "improvement_report_*.json"
+
+# 集計に使う列（列名, 型）
+COLUMNS = [
+    ("timestamp", "float64"),
+    ("articles_evaluated", "int64"),
+    ("average_score", "float64"),
+    ("rules_updated", "bool"),
+    ("current_effectiveness", "float64"),
+    ("suggested_updates", "int64"),
+    ("improvement_rate", "float64"),
+    ("recent_average", "float64"),
+]
+
+def column_backend() -> str:
+    """利用可能な列ファイル形式"""
+    if pq is not None:
+        return "parquet"
+    if np is not None:
+        return "npz"
+    return "json"
+
+def report_day(report: Dict[str, Any]) -> str:
+    """レポートの日付（JST, YYYY-MM-DD）"""
+    timestamp = report.get("timestamp")
+    if timestamp:
+        return datetime.fromisoformat(timestamp).astimezone(JST).strftime("%Y-%m-%d")
+    return datetime.now(JST).strftime("%Y-%m-%d")
+
+def report_row(report: Dict[str, Any]) -> Dict[str, Any]:
+    """レポートから列の値を取り出す（欠損はNaN）"""
+    rule_evaluation = report.get("rule_evaluation") or {}
+    trends = report.get("improvement_trends") or {}
+    timestamp = report.get("timestamp")
+    return {
+        "timestamp": datetime.fromisoformat(timestamp).timestamp() if timestamp else float("nan"),
+        "articles_evaluated": int(report.get("articles_evaluated", 0)),
+        "average_score": float(report.get("average_score", float("nan"))),
+        "rules_updated": bool(report.get("rules_updated", False)),
+        "current_effectiveness": float(rule_evaluation.get("current_effectiveness", float("nan"))),
+        "suggested_updates": len(rule_evaluation.get("suggested_updates", [])),
+        "improvement_rate": float(trends.get("improvement_rate", float("nan"))),
+        "recent_average": float(trends.get("recent_average", float("nan"))),
+    }
+
+class ReportStore:
+    """日付で分割した改善レポートのストア"""
+
+    def __init__(self, root="data/reports"):
+        self.root = Path(root)
+        self.segments_dir = self.root / "segments"
+        self.columns_dir = self.root / "columns"
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
+        self.columns_dir.mkdir(parents=True, exist_ok=True)
+        self.imported_file = self.root / "imported.json"
+
+    # --- 書き込み ---
+
+    def append(self, report: Dict[str, Any]):
+        """1件追記"""
+        self.append_many([report])
+
+    def append_many(self, reports: List[Dict[str, Any]]):
+        """日ごとにまとめてセグメントと列ファイルへ追記"""
+        by_day = defaultdict(list)
+        for report in reports:
+            by_day[report_day(report)].append(report)
+
+        for day, day_reports in sorted(by_day.items()):
+            # 列を先に更新する（セグメントへの追記が失敗しても、次回は件数の違いから列を作り直せる）
+            columns = self._load_day_columns(day)
+            for report in day_reports:
+                row = report_row(report)
+                for name, _ in COLUMNS:
+                    columns[name].append(row[name])
+            self._save_day_columns(day, columns)
+
+            # gzipは追記すると複数メンバーになるが、そのまま続けて読める
+            with gzip.open(self._segment_path(day), "at", encoding="utf-8") as f:
+                for report in day_reports:
+                    f.write(json.dumps(report, ensure_ascii=False) + "\n")
+
+    def _segment_path(self, day: str) -> Path:
+        return self.segments_dir / f"{day}.jsonl.gz"
+
+    def _column_paths(self, day: str) -> List[Path]:
+        return [self.columns_dir / f"{day}.{extension}" for extension in ("parquet", "npz", "json")]
+
+    def _iter_segment(self, day: str) -> Iterator[Dict[str, Any]]:
+        """1日分のレポート本体"""
+        segment = self._segment_path(day)
+        if not segment.exists():
+            return
+        with gzip.open(segment, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _segment_rows(self, day: str) -> int:
+        """1日分のレポートの件数（行数だけ数え、JSONはパースしない）"""
+        segment = self._segment_path(day)
+        if not segment.exists():
+            return 0
+        with gzip.open(segment, "rt", encoding="utf-8") as f:
+            return sum(1 for line in f if line.strip())
+
+    def _rebuild_day_columns(self, day: str) -> Dict[str, List[Any]]:
+        """セグメントから1日分の列を作り直す"""
+        columns = {name: [] for name, _ in COLUMNS}
+        for report in self._iter_segment(day):
+            row = report_row(report)
+            for name, _ in COLUMNS:
+                columns[name].append(row[name])
+        return columns
+
+    def _read_day_columns(self, day: str) -> Optional[Dict[str, Any]]:
+        """保存済みの列ファイルを読む（ない・この環境で読めない形式・壊れているならNone）"""
+        for path in self._column_paths(day):
+            if path.exists():
+                try:
+                    return self._read_column_file(path)
+                except Exception:
+                    # 列ファイルはセグメントから作り直せるので、読めなければ使わない
+                    return None
+        return None
+
+    def _load_day_columns(self, day: str) -> Dict[str, List[Any]]:
+        """1日分の列をPythonのリストで読む（読めないかセグメントと件数が合わなければ作り直す）"""
+        columns = self._read_day_columns(day)
+        if columns is None or len(columns["timestamp"]) != self._segment_rows(day):
+            return self._rebuild_day_columns(day)
+        return {name: list(values) for name, values in columns.items()}
+
+    def _save_day_columns(self, day: str, columns: Dict[str, List[Any]]):
+        """1日分の列を利用可能な形式で保存（古い形式のファイルは消す）"""
+        backend = column_backend()
+        path = self.columns_dir / f"{day}.{backend}"
+        temp_path = path.with_name(path.name + ".tmp")
+
+        if backend == "parquet":
+            table = pa.table({name: pa.array(columns[name], type=dtype) for name, dtype in COLUMNS})
+            pq.write_table(table, temp_path)
+        elif backend == "npz":
+            with open(temp_path, "wb") as f:
+                np.savez(f, **{name: np.asarray(columns[name], dtype=dtype) for name, dtype in COLUMNS})
+        else:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(columns, f)
+        temp_path.replace(path)
+
+        for other in self._column_paths(day):
+            if other != path and other.exists():
+                other.unlink()
+
+    def _read_column_file(self, path: Path) -> Dict[str, Any]:
+        """列ファイルを読む（NumPyがあれば配列、なければリスト）"""
+        if path.suffix == ".parquet":
+            if pq is None:
+                raise RuntimeError(f"pyarrowがないため読めません: {path}")
+            table = pq.read_table(path)
+            return {name: table.column(name).to_pylist() if np is None else table.column(name).to_numpy()
+                    for name, _ in COLUMNS}
+        if path.suffix == ".npz":
+            if np is None:
+                raise RuntimeError(f"NumPyがないため読めません: {path}")
+            with np.load(path) as data:
+                return {name: data[name] for name, _ in COLUMNS}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    # --- 読み出し ---
+
+    def days(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        """保存済みの日付（ファイル名だけで範囲を絞る）"""
+        days = sorted({path.name.split(".", 1)[0] for path in self.columns_dir.glob("????-??-??.*")
+                       if not path.name.endswith(".tmp")})
+        return [day for day in days if (start is None or day >= start) and (end is None or day <= end)]
+
+    def load_columns(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Any]:
+        """期間内の列を連結して返す（NumPyがあれば配列）"""
+        parts = defaultdict(list)
+        for day in self.days(start, end):
+            columns = self._read_day_columns(day)
+            if columns is None:
+                columns = self._rebuild_day_columns(day)
+            for name, values in columns.items():
+                parts[name].append(values)
+
+        if np is not None:
+            return {
+                name: np.concatenate(parts[name]).astype(dtype) if parts[name] else np.array([], dtype=dtype)
+                for name, dtype in COLUMNS
+            }
+        return {name: [value for values in parts[name] for value in values] for name, _ in COLUMNS}
+
+    def iter_reports(self, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """期間内のレポート本体を古い順に読む"""
+        for day in self.days(start, end):
+            yield from self._iter_segment(day)
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """最新のレポート"""
+        days = self.days()
+        if not days:
+            return None
+        reports = list(self.iter_reports(days[-1], days[-1]))
+        return reports[-1] if reports else None
+
+    def daily_trend(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """日ごとの実行回数・平均スコア・ルール更新回数"""
+        columns = self.load_columns(start, end)
+        timestamps = columns["timestamp"]
+        if len(timestamps) == 0:
+            return []
+
+        if np is not None:
+            # JSTの日番号で束ね、bincountでまとめて集計する
+            day_numbers = np.floor((timestamps + 9 * 3600) / 86400).astype("int64")
+            unique_days, inverse = np.unique(day_numbers, return_inverse=True)
+            counts = np.bincount(inverse)
+            scores = columns["average_score"]
+            valid = ~np.isnan(scores)
+            score_sums = np.bincount(inverse[valid], weights=scores[valid], minlength=len(unique_days))
+            score_counts = np.bincount(inverse[valid], minlength=len(unique_days))
+            updates = np.bincount(inverse, weights=columns["rules_updated"].astype("float64"))
+            articles = np.bincount(inverse, weights=columns["articles_evaluated"].astype("float64"))
+            return [
+                {
+                    "date": datetime.fromtimestamp(int(day) * 86400, timezone.utc).strftime("%Y-%m-%d"),
+                    "runs": int(counts[i]),
+                    "articles_evaluated": int(articles[i]),
+                    "average_score": round(float(score_sums[i] / score_counts[i]), 2) if score_counts[i] else None,
+                    "rules_updated": int(updates[i])
+                }
+                for i, day in enumerate(unique_days)
+            ]
+
+        trend = {}
+        for i, timestamp in enumerate(timestamps):
+            date = datetime.fromtimestamp(timestamp, JST).strftime("%Y-%m-%d")
+            entry = trend.setdefault(date, {"date": date, "runs": 0, "articles_evaluated": 0,
+                                            "score_sum": 0.0, "score_count": 0, "rules_updated": 0})
+            entry["runs"] += 1
+            entry["articles_evaluated"] += columns["articles_evaluated"][i]
+            entry["rules_updated"] += int(columns["rules_updated"][i])
+            score = columns["average_score"][i]
+            if score == score:  # NaNを除く
+                entry["score_sum"] += score
+                entry["score_count"] += 1
+        return [
+            {
+                "date": entry["date"],
+                "runs": entry["runs"],
+                "articles_evaluated": entry["articles_evaluated"],
+                "average_score": round(entry["score_sum"] / entry["score_count"], 2) if entry["score_count"] else None,
+                "rules_updated": entry["rules_updated"]
+            }
+            for entry in trend.values()
+        ]
+
+    # --- 旧形式からの移行 ---
+
+    def _load_imported(self) -> set:
+        if self.imported_file.exists():
+            with open(self.imported_file, "r", encoding="utf-8") as f:
+                return set(json.load(f))
+        return set()
+
+    def import_legacy_reports(self, source_dir=".", remove: bool = False, batch_size: int = 500) -> Dict[str, int]:
+        """improvement_report_*.json を取り込む（取り込み済みのファイルは飛ばす）"""
+        imported = self._load_imported()
+        files = sorted(Path(source_dir).glob(LEGACY_REPORT_PATTERN))
+        result = {"found": len(files), "imported": 0, "skipped": 0, "failed": 0, "removed": 0}
+
+        pending = []
+        pending_names = []
+
+        def flush():
+            self.append_many(pending)
+            imported.update(pending_names)
+            save_json_state(self.imported_file, sorted(imported))
+            pending.clear()
+            pending_names.clear()
+
+        for path in files:
+            if path.name in imported:
+                result["skipped"] += 1
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    pending.append(json.load(f))
+                pending_names.append(path.name)
+                result["imported"] += 1
+            except (json.JSONDecodeError, UnicodeDecodeError, ValueError):
+                result["failed"] += 1
+                continue
+            if len(pending) >= batch_size:
+                flush()
+        if pending:
+            flush()
+
+        if remove:
+            for path in files:
+                if path.name in imported and path.exists():
+                    path.unlink()
+                    result["removed"] += 1
+
+        return result
+
+def main():
+    """レポートストアのコマンドラインツール"""
+    parser = argparse.ArgumentParser(description="改善レポートの列指向ストア")
+    parser.add_argument("--root", default="data/reports", help="ストアのディレクトリ")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate = subparsers.add_parser("migrate", help="improvement_report_*.json を取り込む")
+    migrate.add_argument("--source", default=".", help="旧レポートのあるディレクトリ")
+    migrate.add_argument("--remove", action="store_true", help="取り込んだ旧レポートを削除する")
+
+    trend = subparsers.add_parser("trend", help="日ごとの集計を表示")
+    trend.add_argument("--start", help="開始日（YYYY-MM-DD）")
+    trend.add_argument("--end", help="終了日（YYYY-MM-DD）")
+
+    args = parser.parse_args()
+    store = ReportStore(args.root)
+
+    if args.command == "migrate":
+        print(f"📦 旧レポートを取り込み中（列形式: {column_backend()}）...")
+        result = store.import_legacy_reports(args.source, remove=args.remove)
+        print(f"✅ 取り込み: {result['imported']}件 / スキップ: {result['skipped']}件 / "
+              f"失敗: {result['failed']}件 / 削除: {result['removed']}件")
+    else:
+        print(f"{'date':<12} {'runs':>5} {'articles':>9} {'avg score':>10} {'rule updates':>13}")
+        for row in store.daily_trend(args.start, args.end):
+            score = f"{row['average_score']:.1f}" if row["average_score"] is not None else "-"
+            print(f"{row['date']:<12} {row['runs']:>5} {row['articles_evaluated']:>9} {score:>10} {row['rules_updated']:>13}")
+
+if __name__ == "__main__":
+    main()
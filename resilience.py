@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+モデル呼び出しの回復性レイヤー
+query_with_sdk / stream を、ジッター付き指数バックオフのリトライ（エラーの種類ごとの回数上限）、
+バックエンドが不調な間はすぐに失敗を返すサーキットブレーカー、遅い呼び出しのヘッジ（2本目の並行呼び出し）で包む。
+動作は設定（DEFAULT_RESILIENCE_SETTINGS と resilience_config.json）で決まり、ソースファイルは書き換えない
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Any, AsyncIterator, Optional
+
+from llm_backends import result_text, stream_text
+
+logger = logging.getLogger(__name__)
+
+RESILIENCE_CONFIG_FILE = Path("resilience_config.json")
+RESILIENCE_CONFIG_ENV = "RESILIENCE_CONFIG"
+
+DEFAULT_RESILIENCE_SETTINGS = {
+    "base_delay": 2.0,          # 1回目のリトライまでの待ち時間の上限（秒）
+    "max_delay": 60.0,          # 待ち時間の上限（秒）
+    "multiplier": 2.0,          # リトライごとの倍率
+    # エラーの種類ごとのリトライ回数（1回の呼び出しあたり）
+    "retry_budgets": {
+        "taskgroup": 2,
+        "timeout": 2,
+        "rate_limit": 4,
+        "error_result": 2,
+        "other": 1,
+        "auth": 0
+    },
+    "cli_fallback_on": ["taskgroup"],  # リトライを使い切ったらSDKのCLIフォールバックを有効にして1回だけ再試行
+    "circuit": {
+        "failure_threshold": 5,  # 連続してこの回数失敗したら遮断
+        "reset_timeout": 120.0   # 遮断してから試行を再開するまでの秒数
+    },
+    "hedge": {
+        "enabled": False,
+        "delay": None,           # この秒数で応答がなければ2本目を出す（Noneなら直近の所要時間のp95）
+        "min_samples": 5,        # p95を使うのに必要な成功数
+        "min_delay": 10.0        # p95が短すぎるときの下限（秒）
+    }
+}
+
+def load_resilience_settings(path=None, **overrides) -> Dict[str, Any]:
+    """既定値に設定ファイル（引数 → 環境変数RESILIENCE_CONFIG → resilience_config.json）と引数を重ねる"""
+    settings = json.loads(json.dumps(DEFAULT_RESILIENCE_SETTINGS))
+    config_path = Path(path or os.environ.get(RESILIENCE_CONFIG_ENV) or RESILIENCE_CONFIG_FILE)
+    layers = []
+    if config_path.exists():
+        with open(config_path, "r", encoding="utf-8") as f:
+            layers.append(json.load(f))
+    layers.append(overrides)
+    for layer in layers:
+        for key, value in layer.items():
+            if isinstance(value, dict) and isinstance(settings.get(key), dict):
+                settings[key].update(value)
+            else:
+                settings[key] = value
+    return settings
+
+class ModelCallError(RuntimeError):
+    """モデルが失敗の結果を返した"""
+
+    def __init__(self, message: str, kind: str = "error_result"):
+        super().__init__(message)
+        self.kind = kind
+
+class CircuitOpenError(RuntimeError):
+    """サーキットブレーカーが遮断中のため呼び出さなかった"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"モデルのバックエンドが不調のため呼び出しを止めています（あと{retry_after:.0f}秒）")
+        self.retry_after = retry_after
+
+# メッセージから種類を判断するパターン（"author" や桁の一部の "1429" には一致させない）
+ERROR_KIND_PATTERNS = [
+    ("timeout", re.compile(r"timed? ?out")),
+    ("taskgroup", re.compile(r"\btaskgroup\b")),
+    ("rate_limit", re.compile(r"\brate[ _-]?limit|\boverloaded|\btoo many requests\b|\b429\b")),
+    ("auth", re.compile(r"\bauthenticat|\bunauthori[sz]ed\b|\bforbidden\b|\binvalid[ _]api[ _]key\b"
+                        r"|\bpermission[ _]denied\b|\b40[13]\b")),
+]
+
+STATUS_CODE_KINDS = {401: "auth", 403: "auth", 408: "timeout", 429: "rate_limit", 529: "rate_limit"}
+
+def _status_code(error: Exception) -> Optional[int]:
+    """HTTPクライアントの例外が持つステータスコード（status_code / status / response.status_code）"""
+    for source in (error, getattr(error, "response", None)):
+        for name in ("status_code", "status"):
+            value = getattr(source, name, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+def classify_error(error: Exception) -> str:
+    """リトライの回数上限を決めるためのエラーの種類"""
+    if isinstance(error, ModelCallError):
+        return error.kind
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return "timeout"
+    if isinstance(error, BaseExceptionGroup):
+        return "taskgroup"
+    status = _status_code(error)
+    if status in STATUS_CODE_KINDS:
+        return STATUS_CODE_KINDS[status]
+    message = f"{type(error).__name__} {error}".lower()
+    for kind, pattern in ERROR_KIND_PATTERNS:
+        if pattern.search(message):
+            return kind
+    return "other"
+
+def backoff_delay(attempt: int, settings: Dict[str, Any] = None, rng: random.Random = None) -> float:
+    """attempt回目（1始まり）のリトライ前の待ち時間（フルジッター）"""
+    settings = settings or DEFAULT_RESILIENCE_SETTINGS
+    cap = min(settings["max_delay"], settings["base_delay"] * settings["multiplier"] ** (attempt - 1))
+    return (rng or random).uniform(0, cap)
+
+class CircuitBreaker:
+    """連続失敗で遮断し、一定時間後に1回だけ試して回復を確かめる"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 120.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+
+    def retry_after(self) -> float:
+        """遮断が解けるまでの秒数"""
+        return max(0.0, self.opened_at + self.reset_timeout - self.clock())
+
+    def allow(self):
+        """呼び出してよいか確認する（遮断中ならCircuitOpenError）"""
+        if self.state == "open":
+            if self.retry_after() > 0:
+                raise CircuitOpenError(self.retry_after())
+            self.state = "half_open"
+            self.trial_in_flight = False
+        if self.state == "half_open":
+            if self.trial_in_flight:
+                raise CircuitOpenError(self.reset_timeout)
+            self.trial_in_flight = True
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.trial_in_flight = False
+
+    def abandon_trial(self):
+        """成否が分からないまま終わった試行（取り消し・途中で閉じたストリーム）を取り下げ、次の呼び出しで試せるようにする"""
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(f"サーキットブレーカーを遮断しました（連続失敗 {self.failures}回）")
+            self.state = "open"
+            self.opened_at = self.clock()
+
+def _check_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """成功の結果を含まない応答はModelCallErrorにする"""
+    if result_text(messages) is None:
+        detail = next((m.get("subtype") for m in reversed(messages or []) if isinstance(m, dict) and m.get("type") == "result"), None)
+        raise ModelCallError(f"モデルが失敗の結果を返しました: {detail or '結果なし'}")
+    return messages
+
+class ResilientIntegration:
+    """query_with_sdk / stream をリトライ・サーキットブレーカー・ヘッジで包むラッパー（その他の属性は元のオブジェクトに委譲）"""
+
+    def __init__(self, integration, settings: Dict[str, Any] = None, breaker: CircuitBreaker = None,
+                 sleep=asyncio.sleep, rng: random.Random = None):
+        self.integration = integration
+        self.settings = settings or load_resilience_settings()
+        circuit = self.settings["circuit"]
+        self.breaker = breaker or CircuitBreaker(circuit["failure_threshold"], circuit["reset_timeout"])
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.latencies = deque(maxlen=100)
+        self.stats = {"calls": 0, "attempts": 0, "retries": 0, "failures": 0, "short_circuits": 0,
+                      "hedges": 0, "hedge_wins": 0, "cli_fallbacks": 0, "retry_seconds": 0.0}
+
+    def __getattr__(self, name):
+        integration = self.__dict__.get("integration")
+        if integration is None:
+            raise AttributeError(name)
+        return getattr(integration, name)
+
+    def _allow(self):
+        try:
+            self.breaker.allow()
+        except CircuitOpenError:
+            self.stats["short_circuits"] += 1
+            raise
+
+    async def _retry_or_raise(self, error: Exception, used: Dict[str, int]) -> None:
+        """まだリトライできるなら待ち、できなければ例外を投げ直す"""
+        kind = classify_error(error)
+        used[kind] = used.get(kind, 0) + 1
+        budget = self.settings["retry_budgets"].get(kind, self.settings["retry_budgets"].get("other", 0))
+
+        if used[kind] > budget:
+            if kind in self.settings["cli_fallback_on"] and getattr(self.integration, "use_cli_fallback", True) is False:
+                # ソースを書き換えず、このプロセスの統合オブジェクトだけCLIフォールバックに切り替える
+                self.integration.use_cli_fallback = True
+                self.stats["cli_fallbacks"] += 1
+                logger.warning("リトライを使い切ったため、CLIフォールバックで再試行します")
+                return
+            raise error
+
+        delay = backoff_delay(sum(used.values()), self.settings, self.rng)
+        self.stats["retries"] += 1
+        self.stats["retry_seconds"] += delay
+        logger.warning(f"モデル呼び出しに失敗（{kind}: {error}）。{delay:.1f}秒後に再試行します")
+        await self.sleep(delay)
+
+    def _hedge_delay(self) -> Optional[float]:
+        """2本目を出すまでの秒数（ヘッジしないならNone）"""
+        hedge = self.settings["hedge"]
+        if not hedge["enabled"]:
+            return None
+        if hedge["delay"] is not None:
+            return hedge["delay"]
+        if len(self.latencies) < hedge["min_samples"]:
+            return None
+        ordered = sorted(self.latencies)
+        return max(hedge["min_delay"], ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))])
+
+    async def _attempt(self, prompt: str, max_turns: int, **kwargs) -> List[Dict[str, Any]]:
+        self.stats["attempts"] += 1
+        started = time.monotonic()
+        messages = _check_messages(await self.integration.query_with_sdk(prompt=prompt, max_turns=max_turns, **kwargs))
+        self.latencies.append(time.monotonic() - started)
+        return messages
+
+    async def _hedged_attempt(self, prompt: str, max_turns: int, **kwargs) -> List[Dict[str, Any]]:
+        """遅ければ2本目を並行して出し、先に成功した方を使う"""
+        hedge_delay = self._hedge_delay()
+        primary = asyncio.ensure_future(self._attempt(prompt, max_turns, **kwargs))
+        if hedge_delay is None:
+            return await primary
+
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if done:
+                return primary.result()
+
+            self.stats["hedges"] += 1
+            hedge = asyncio.ensure_future(self._attempt(prompt, max_turns, **kwargs))
+            pending = {primary, hedge}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # 待機中に取り消されても、実行中の呼び出しを残さない
+            for task in pending:
+                task.cancel()
+
+    async def query_with_sdk(self, prompt: str, max_turns: int = 1, **kwargs) -> List[Dict[str, Any]]:
+        """リトライ・遮断・ヘッジを適用してモデルを呼び出す"""
+        self.stats["calls"] += 1
+        used: Dict[str, int] = {}
+        while True:
+            self._allow()
+            try:
+                messages = await self._hedged_attempt(prompt, max_turns, **kwargs)
+            except Exception as e:
+                self.breaker.record_failure()
+                self.stats["failures"] += 1
+                await self._retry_or_raise(e, used)
+                continue
+            except BaseException:
+                # 取り消し（wait_forのタイムアウト・ジョブの中断）では成否を記録せず、半開の試行だけ取り下げる
+                self.breaker.abandon_trial()
+                raise
+            self.breaker.record_success()
+            return messages
+
+    async def stream(self, prompt: str, max_turns: int = 1, **kwargs) -> AsyncIterator[str]:
+        """チャンクを返す前の失敗だけリトライする（途中まで返した出力は取り消せないため）"""
+        self.stats["calls"] += 1
+        used: Dict[str, int] = {}
+        while True:
+            self._allow()
+            self.stats["attempts"] += 1
+            started = time.monotonic()
+            yielded = False
+            try:
+                async for chunk in stream_text(self.integration, prompt, max_turns, **kwargs):
+                    yielded = True
+                    yield chunk
+            except Exception as e:
+                self.breaker.record_failure()
+                self.stats["failures"] += 1
+                if yielded:
+                    raise
+                await self._retry_or_raise(e, used)
+                continue
+            except BaseException:
+                # 取り消しや、受け取り側が途中で閉じた（GeneratorExit）場合も半開の試行を取り下げる
+                self.breaker.abandon_trial()
+                raise
+            self.latencies.append(time.monotonic() - started)
+            self.breaker.record_success()
+            return
+
+def wrap_resilient(integration, settings: Dict[str, Any] = None):
+    """統合オブジェクトを回復性レイヤーで包む（Noneならそのまま返す）"""
+    if integration is None:
+        return None
+    return ResilientIntegration(integration, settings)
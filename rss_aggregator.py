@@ -6,137 +6,297 @@ RSS Aggregator - 実際のRSSフィードから記事を収集
 import feedparser
 import httpx
 import asyncio
+import contextlib
 from datetime import datetime, timezone, timedelta
 import json
 from pathlib import Path
 import hashlib
+import time
+import xml.etree.ElementTree as ET
 
-class RSSAggregator:
+from host_rate_limiter import HostRateLimiter
+from state_files import save_json_state
+
+# 設定ファイルがない場合のフィード
+DEFAULT_FEEDS = [
+    {
+        "name": "Qiita AI", 
+        "url": "https://qiita.com/tags/ai/feed.atom",
+        "type": "tech"
+    },
+    {
+        "name": "Qiita Machine Learning",
+        "url": "https://qiita.com/tags/machinelearning/feed.atom",
+        "type": "tech"
+    },
+    {
+        "name": "Qiita Python",
+        "url": "https://qiita.com/tags/python/feed.atom",
+        "type": "tech"
+    },
+    {
+        "name": "Dev.to AI",
+        "url": "https://dev.to/feed/tag/ai",
+        "type": "tech"
+    },
+    {
+        "name": "Reddit r/artificial",
+        "url": "https://www.reddit.com/r/artificial/.rss",
+        "type": "discussion"
+    }
+]
+
+# 取得処理のデフォルト設定
+DEFAULT_FETCH_SETTINGS = {
+    "max_concurrency": 32,        # 同時に取得するフィード数の上限
+    "per_host_concurrency": 4,    # 同一ホストへの同時接続数の上限
+    "per_host_interval": 0.2,     # 同一ホストへのリクエスト開始間隔（秒）
+    "feed_timeout": 15.0,         # フィード1件あたりの時間予算（秒）
+    "total_timeout": 120.0        # 全フィード取得の時間予算（秒）
+}
+
+def load_feed_config(config_path):
+    """OPMLまたはJSONからフィード一覧と取得設定を読み込む"""
+    config_path = Path(config_path)
+    settings = dict(DEFAULT_FETCH_SETTINGS)
+    
+    if config_path.suffix.lower() in (".opml", ".xml"):
+        feeds = []
+        root = ET.parse(config_path).getroot()
+        for outline in root.iter("outline"):
+            url = outline.get("xmlUrl")
+            if not url:
+                continue
+            # type属性は通常"rss"なので、記事種別はcategory属性から取る
+            feed_type = outline.get("type")
+            if feed_type in (None, "rss", "atom"):
+                feed_type = outline.get("category", "tech")
+            feeds.append({
+                "name": outline.get("title") or outline.get("text") or url,
+                "url": url,
+                "type": feed_type
+            })
+        return feeds, settings
+    
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    
+    settings.update(config.get("settings", {}))
+    feeds = [
+        {"name": feed["name"], "url": feed["url"], "type": feed.get("type", "tech")}
+        for feed in config.get("feeds", [])
+        if feed.get("enabled", True)
+    ]
+    return feeds, settings
+
+class TrendAccumulator:
+    """記事を1件ずつ受け取りながらタグ・単語の出現頻度を集計"""
+    
     def __init__(self):
-        self.feeds = [
-            {
-                "name": "Qiita AI", 
-                "url": "https://qiita.com/tags/ai/feed.atom",
-                "type": "tech"
-            },
-            {
-                "name": "Qiita Machine Learning",
-                "url": "https://qiita.com/tags/machinelearning/feed.atom",
-                "type": "tech"
-            },
-            {
-                "name": "Qiita Python",
-                "url": "https://qiita.com/tags/python/feed.atom",
-                "type": "tech"
-            },
-            {
-                "name": "Dev.to AI",
-                "url": "https://dev.to/feed/tag/ai",
-                "type": "tech"
-            },
-            {
-                "name": "Reddit r/artificial",
-                "url": "https://www.reddit.com/r/artificial/.rss",
-                "type": "discussion"
-            }
-        ]
+        self.tag_counts = {}
+        self.word_counts = {}
+        self.sources = set()
+        self.total_articles = 0
+    
+    def add(self, article):
+        """記事1件分を集計に加える"""
+        self.total_articles += 1
+        self.sources.add(article["source"])
+        
+        # タグ集計
+        for tag in article.get("tags", []):
+            tag_lower = tag.lower()
+            self.tag_counts[tag_lower] = self.tag_counts.get(tag_lower, 0) + 1
+        
+        # タイトルから重要そうな単語を抽出
+        title_words = article["title"].lower().split()
+        for word in title_words:
+            if len(word) > 3:  # 4文字以上の単語
+                self.word_counts[word] = self.word_counts.get(word, 0) + 1
+    
+    def snapshot(self):
+        """現時点のトレンド"""
+        top_tags = sorted(self.tag_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+        top_words = sorted(self.word_counts.items(), key=lambda x: x[1], reverse=True)[:20]
+        
+        return {
+            "top_tags": top_tags,
+            "top_words": top_words,
+            "total_articles": self.total_articles,
+            "sources": list(self.sources)
+        }
+
+class RSSAggregator:
+    def __init__(self, feeds=None, cache_dir="data/rss_cache", config_path="data/feeds.json", **settings):
+        # フィード一覧: 引数 > 設定ファイル（OPML/JSON） > 組み込みのデフォルト
+        self.settings = dict(DEFAULT_FETCH_SETTINGS)
+        config_path = Path(config_path) if config_path else None
+        if feeds is not None:
+            self.feeds = feeds
+        elif config_path and config_path.exists():
+            self.feeds, self.settings = load_feed_config(config_path)
+        else:
+            self.feeds = list(DEFAULT_FEEDS)
+        self.settings.update(settings)
         
         # キャッシュディレクトリ
-        self.cache_dir = Path("data/rss_cache")
+        self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        
+        # 条件付きGET用のETagと、304時に再利用する前回の記事
+        self.etags = {}
+        self.last_articles = {}
+        
+        # フィードごとの取得統計（ベンチマーク用）
+        self.fetch_stats = []
+        
+        # 直近のfetch_all_feedsで集計したトレンド
+        self.latest_trends = None
+        
+        # 常駐プロセスが共有するHTTPクライアント（Noneなら取得のたびに作る）
+        self.http_client = None
     
-    async def fetch_feed(self, feed_info):
+    async def fetch_feed(self, feed_info, client=None):
         """単一のフィードを取得"""
+        url = feed_info["url"]
+        stat = {"name": feed_info["name"], "status": None, "elapsed": 0.0, "bytes": 0, "parse_cpu": 0.0}
+        started = time.perf_counter()
+        
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    feed_info["url"],
-                    headers={
-                        'User-Agent': 'Mozilla/5.0 (compatible; AlicAIBot/1.0)'
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (compatible; AlicAIBot/1.0)'
+            }
+            if url in self.etags:
+                headers['If-None-Match'] = self.etags[url]
+            
+            if client is None:
+                async with httpx.AsyncClient(timeout=30.0) as own_client:
+                    response = await own_client.get(url, headers=headers)
+            else:
+                response = await client.get(url, headers=headers)
+            
+            stat["status"] = response.status_code
+            stat["bytes"] = len(response.content)
+            
+            if response.status_code == 304:
+                # 変更なし: 前回の記事をそのまま使う
+                return self.last_articles.get(url, [])
+            
+            if response.status_code == 200:
+                parse_started = time.thread_time()
+                parsed = feedparser.parse(response.text)
+                articles = []
+                
+                for entry in parsed.entries[:10]:  # 最新10件
+                    article = {
+                        "title": entry.get("title", ""),
+                        "link": entry.get("link", ""),
+                        "summary": entry.get("summary", "")[:500],  # 要約は500文字まで
+                        "source": feed_info["name"],
+                        "type": feed_info["type"],
+                        "published": entry.get("published", ""),
+                        "tags": [tag.term for tag in entry.get("tags", [])][:5],
+                        "id": hashlib.md5(entry.get("link", "").encode()).hexdigest()
                     }
-                )
+                    articles.append(article)
+                stat["parse_cpu"] = time.thread_time() - parse_started
+                
+                if response.headers.get("ETag"):
+                    self.etags[url] = response.headers["ETag"]
+                    self.last_articles[url] = articles
+                
+                return articles
+            else:
+                print(f"❌ Failed to fetch {feed_info['name']}: {response.status_code}")
+                return []
                 
-                if response.status_code == 200:
-                    parsed = feedparser.parse(response.text)
-                    articles = []
-                    
-                    for entry in parsed.entries[:10]:  # 最新10件
-                        article = {
-                            "title": entry.get("title", ""),
-                            "link": entry.get("link", ""),
-                            "summary": entry.get("summary", "")[:500],  # 要約は500文字まで
-                            "source": feed_info["name"],
-                            "type": feed_info["type"],
-                            "published": entry.get("published", ""),
-                            "tags": [tag.term for tag in entry.get("tags", [])][:5],
-                            "id": hashlib.md5(entry.get("link", "").encode()).hexdigest()
-                        }
-                        articles.append(article)
-                    
-                    return articles
-                else:
-                    print(f"❌ Failed to fetch {feed_info['name']}: {response.status_code}")
-                    return []
-                    
         except Exception as e:
             print(f"❌ Error fetching {feed_info['name']}: {str(e)}")
             return []
+        finally:
+            stat["elapsed"] = time.perf_counter() - started
+            self.fetch_stats.append(stat)
+    
+    async def _fetch_with_budget(self, feed_info, client, pool, host_limiter):
+        """同時実行数・ホスト制限・時間予算の範囲でフィードを取得"""
+        async with pool:
+            await host_limiter.acquire(feed_info["url"])
+            try:
+                return feed_info, await asyncio.wait_for(
+                    self.fetch_feed(feed_info, client),
+                    timeout=self.settings["feed_timeout"]
+                )
+            except asyncio.TimeoutError:
+                print(f"⏱️ Timeout fetching {feed_info['name']}")
+                return feed_info, []
+            finally:
+                host_limiter.release(feed_info["url"])
+    
+    async def iter_feed_results(self):
+        """取得が完了したフィードから順に (feed_info, articles) を返す"""
+        pool = asyncio.Semaphore(self.settings["max_concurrency"])
+        host_limiter = HostRateLimiter(
+            self.settings["per_host_concurrency"],
+            self.settings["per_host_interval"]
+        )
+        limits = httpx.Limits(
+            max_connections=self.settings["max_concurrency"],
+            max_keepalive_connections=self.settings["max_concurrency"]
+        )
+        
+        if self.http_client is not None:
+            client_context = contextlib.nullcontext(self.http_client)
+        else:
+            client_context = httpx.AsyncClient(timeout=self.settings["feed_timeout"], limits=limits)
+        async with client_context as client:
+            tasks = [
+                asyncio.ensure_future(self._fetch_with_budget(feed, client, pool, host_limiter))
+                for feed in self.feeds
+            ]
+            try:
+                for next_done in asyncio.as_completed(tasks, timeout=self.settings["total_timeout"]):
+                    yield await next_done
+            except asyncio.TimeoutError:
+                pending = sum(1 for task in tasks if not task.done())
+                print(f"⏱️ 全体の時間予算を超過したため{pending}件のフィードを打ち切りました")
+            finally:
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
     
     async def fetch_all_feeds(self):
         """すべてのフィードを並行して取得"""
-        print("📡 RSSフィードを取得中...")
-        
-        tasks = [self.fetch_feed(feed) for feed in self.feeds]
-        results = await asyncio.gather(*tasks)
-        
-        # 結果をフラット化
-        all_articles = []
-        for articles in results:
-            all_articles.extend(articles)
+        print(f"📡 RSSフィードを取得中... ({len(self.feeds)}件)")
         
-        # IDで重複を排除
+        # 完了したフィードから順に重複排除とトレンド集計を進める
         unique_articles = {}
-        for article in all_articles:
-            unique_articles[article["id"]] = article
+        trends = TrendAccumulator()
+        
+        async for feed_info, articles in self.iter_feed_results():
+            for article in articles:
+                # IDで重複を排除
+                if article["id"] in unique_articles:
+                    continue
+                unique_articles[article["id"]] = article
+                trends.add(article)
         
         articles_list = list(unique_articles.values())
+        self.latest_trends = trends.snapshot()
         
         # キャッシュに保存
         cache_file = self.cache_dir / f"articles_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(cache_file, "w", encoding="utf-8") as f:
-            json.dump(articles_list, f, ensure_ascii=False, indent=2)
+        save_json_state(cache_file, articles_list, index=False, indent=2)
         
         print(f"✅ {len(articles_list)}件の記事を取得しました")
         return articles_list
     
     async def analyze_trends(self, articles):
         """記事からトレンドを分析"""
-        # タグの出現頻度を集計
-        tag_counts = {}
-        word_counts = {}
-        
+        trends = TrendAccumulator()
         for article in articles:
-            # タグ集計
-            for tag in article.get("tags", []):
-                tag_lower = tag.lower()
-                tag_counts[tag_lower] = tag_counts.get(tag_lower, 0) + 1
-            
-            # タイトルから重要そうな単語を抽出
-            title_words = article["title"].lower().split()
-            for word in title_words:
-                if len(word) > 3:  # 4文字以上の単語
-                    word_counts[word] = word_counts.get(word, 0) + 1
-        
-        # トップトレンド
-        top_tags = sorted(tag_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-        top_words = sorted(word_counts.items(), key=lambda x: x[1], reverse=True)[:20]
-        
-        return {
-            "top_tags": top_tags,
-            "top_words": top_words,
-            "total_articles": len(articles),
-            "sources": list(set(article["source"] for article in articles))
-        }
+            trends.add(article)
+        return trends.snapshot()
     
     async def generate_curated_article(self, articles):
         """収集した記事からキュレーション記事を生成"""
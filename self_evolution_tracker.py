@@ -5,12 +5,17 @@
 """
 
 import json
-import os
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 import statistics
 
+from article_evaluator import EVALUATION_SCORE_CATEGORIES, load_evaluation_aggregates, open_evaluation_log
+import evolution_stats
+from evolution_stats import EvaluationArrays
+from prose_analysis import get_prose_metrics
+from state_files import load_json_state, save_json_state
+
 # 日本標準時のタイムゾーン
 JST = timezone(timedelta(hours=9))
 
@@ -27,12 +32,12 @@ class SelfEvolutionTracker:
         
     def _load_evolution_data(self):
         """進化データを読み込み"""
-        if os.path.exists(self.evolution_file):
-            try:
-                with open(self.evolution_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading evolution data: {e}")
+        try:
+            data = load_json_state(self.evolution_file)
+            if data is not None:
+                return data
+        except Exception as e:
+            print(f"Error loading evolution data: {e}")
         
         return {
             "evolution_sessions": [],
@@ -44,8 +49,7 @@ class SelfEvolutionTracker:
     def _save_evolution_data(self):
         """進化データを保存"""
         try:
-            with open(self.evolution_file, 'w', encoding='utf-8') as f:
-                json.dump(self.evolution_data, f, ensure_ascii=False, indent=2)
+            save_json_state(self.evolution_file, self.evolution_data, indent=2)
         except Exception as e:
             print(f"Error saving evolution data: {e}")
     
@@ -80,62 +84,23 @@ class SelfEvolutionTracker:
     def _analyze_evaluations(self):
         """評価履歴を分析"""
         try:
-            with open("evaluation_history.json", 'r', encoding='utf-8') as f:
-                eval_data = json.load(f)
+            evaluation_log = open_evaluation_log()
+            if not evaluation_log.exists():
+                raise FileNotFoundError(str(evaluation_log.path))
             
-            evaluations = eval_data.get("evaluations", [])
-            if not evaluations:
+            if len(evaluation_log) == 0:
                 return {"error": "No evaluation data found"}
             
-            # スコアの推移を分析
-            scores_by_category = {
-                "technical_accuracy": [],
-                "readability": [],
-                "practicality": [],
-                "originality": [],
-                "total_score": []
-            }
-            
-            articles_by_date = {}
-            
-            for eval in evaluations:
-                scores = eval.get("scores", {})
-                date = eval.get("timestamp", "")[:10]  # YYYY-MM-DD
-                
-                if date not in articles_by_date:
-                    articles_by_date[date] = []
-                
-                articles_by_date[date].append({
-                    "title": eval.get("metadata", {}).get("title", ""),
-                    "total_score": eval.get("total_score", 0),
-                    "scores": scores
-                })
-                
-                for category, score in scores.items():
-                    if category in scores_by_category:
-                        scores_by_category[category].append(score)
-                
-                if "total_score" in eval:
-                    scores_by_category["total_score"].append(eval["total_score"])
-            
-            # 統計計算
-            statistics_data = {}
-            for category, scores in scores_by_category.items():
-                if scores:
-                    statistics_data[category] = {
-                        "average": round(statistics.mean(scores), 2),
-                        "median": round(statistics.median(scores), 2),
-                        "max": max(scores),
-                        "min": min(scores),
-                        "count": len(scores),
-                        "trend": self._calculate_trend(scores)
-                    }
+            if evolution_stats.numpy_available():
+                total_evaluations, statistics_data, articles_by_date = self._evaluation_statistics_vectorized(evaluation_log)
+            else:
+                total_evaluations, statistics_data, articles_by_date = self._evaluation_statistics_from_aggregates(evaluation_log)
             
-            # 最近の改善点を特定
-            recent_issues = self._identify_recent_issues(evaluations)
+            # 最近の改善点を特定（最新5件だけを読む）
+            recent_issues = self._identify_recent_issues(evaluation_log.tail(5))
             
             return {
-                "total_evaluations": len(evaluations),
+                "total_evaluations": total_evaluations,
                 "statistics": statistics_data,
                 "articles_by_date": articles_by_date,
                 "recent_issues": recent_issues,
@@ -143,10 +108,49 @@ class SelfEvolutionTracker:
             }
             
         except FileNotFoundError:
-            return {"error": "evaluation_history.json not found"}
+            return {"error": "evaluation_history.jsonl not found"}
         except Exception as e:
             return {"error": str(e)}
     
+    def _evaluation_statistics_vectorized(self, evaluation_log):
+        """評価履歴を配列に読み込み、カテゴリ別の統計を一括計算"""
+        categories = EVALUATION_SCORE_CATEGORIES + ["total_score"]
+        arrays = EvaluationArrays.load(evaluation_log, categories)
+        
+        statistics_data = {}
+        for category in categories:
+            stats = evolution_stats.column_statistics(
+                arrays.scores[category], percent_scale=(category == "total_score")
+            )
+            if stats:
+                statistics_data[category] = stats
+        
+        return len(arrays), statistics_data, arrays.daily_averages("total_score")
+    
+    def _evaluation_statistics_from_aggregates(self, evaluation_log):
+        """NumPyがない場合は逐次集計から統計を組み立てる"""
+        aggregates = load_evaluation_aggregates(evaluation_log)
+        
+        statistics_data = {}
+        for category in EVALUATION_SCORE_CATEGORIES + ["total_score"]:
+            stats = aggregates.get(category)
+            if stats and stats.count:
+                statistics_data[category] = {
+                    "average": round(stats.mean, 2),
+                    "median": round(stats.median(), 2),
+                    "max": stats.maximum,
+                    "min": stats.minimum,
+                    "count": stats.count,
+                    "trend": self._calculate_trend_from_stats(stats)
+                }
+        
+        articles_by_date = {
+            day["date"]: {"count": day["count"], "average_total_score": day["average"]}
+            for day in aggregates.daily_averages("total_score")
+        }
+        
+        return aggregates.source_count, statistics_data, articles_by_date
+    
     def _analyze_rules_changes(self):
         """ルール変更履歴を分析"""
         try:
@@ -258,27 +262,15 @@ class SelfEvolutionTracker:
             "impact_assessment": "高い改善効果を実現"
         }
     
-    def _calculate_trend(self, scores):
-        """スコアのトレンドを計算"""
-        if len(scores) < 2:
-            return "insufficient_data"
-        
-        # 最新の値と過去の平均を比較
-        recent = scores[-3:] if len(scores) >= 3 else scores[-1:]
-        older = scores[:-3] if len(scores) >= 6 else scores[:-1] if len(scores) > 1 else []
-        
-        if not older:
+    def _calculate_trend_from_stats(self, stats):
+        """逐次集計からスコアのトレンドを計算（直近3件の平均と、それより前の平均を比べる。6件未満は直近1件とそれ以前）"""
+        if stats.count < 2:
             return "insufficient_data"
         
-        recent_avg = statistics.mean(recent)
-        older_avg = statistics.mean(older)
+        recent_avg = stats.tail_mean(3 if stats.count >= 3 else 1)
+        older_avg = stats.mean_excluding_tail(3 if stats.count >= 6 else 1)
         
-        if recent_avg > older_avg + 2:
-            return "improving"
-        elif recent_avg < older_avg - 2:
-            return "declining"
-        else:
-            return "stable"
+        return evolution_stats.classify_trend(recent_avg, older_avg)
     
     def _identify_recent_issues(self, evaluations):
         """最近の課題を特定"""
@@ -352,10 +344,12 @@ class SelfEvolutionTracker:
             else:
                 content_body = content
             
-            # 品質指標計算
+            # 品質指標計算（見出しは地の文の解析で数え、コード内の#を含めない）
+            prose = get_prose_metrics(content)
             character_count = len(content_body)
+            # code_blocksは保存済みの履歴と比べられるよう、従来どおりフェンス（```）の数を数える
             code_blocks = content_body.count('```')
-            sections = content_body.count('##')
+            sections = prose.heading_count
             
             # タイムスタンプ抽出
             timestamp = self._extract_timestamp_from_filename(filename)
@@ -368,6 +362,10 @@ class SelfEvolutionTracker:
                 "sections": sections,
                 "has_thought_process": "思考プロセス" in content_body,
                 "has_references": "参考" in content_body or "リンク" in content_body,
+                "sentence_count": prose.sentence_count,
+                "average_sentence_length": round(prose.average_sentence_length, 1),
+                "long_sentence_count": len(prose.long_sentences()),
+                "passive_ratio": round(prose.passive_ratio, 3),
                 "production_time": metadata.get("production_time", "不明"),
                 "reading_time": metadata.get("reading_time", "不明"),
                 "difficulty": metadata.get("difficulty", "不明")
@@ -390,6 +388,13 @@ class SelfEvolutionTracker:
         if len(quality_metrics) < 2:
             return []
         
+        if evolution_stats.numpy_available():
+            np = evolution_stats.np
+            return evolution_stats.quality_improvements(
+                np.fromiter((m['character_count'] for m in quality_metrics), dtype="float64", count=len(quality_metrics)),
+                np.fromiter((m.get('has_thought_process', False) for m in quality_metrics), dtype=bool, count=len(quality_metrics))
+            )
+        
         improvements = []
         
         # 文字数の改善
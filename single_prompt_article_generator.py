@@ -12,8 +12,15 @@ from datetime import datetime, timezone, timedelta
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.claude_code_integration import ClaudeCodeSDKIntegration
+try:
+    from src.claude_code_integration import ClaudeCodeSDKIntegration
+except ImportError:
+    ClaudeCodeSDKIntegration = None
 from writer_avatars import WriterSelector, format_article_with_writer_style
+from article_stream_writer import ArticleStreamWriter
+from llm_backends import backend_from_env, stream_text
+from llm_response_cache import wrap_integration
+from resilience import wrap_resilient
 import logging
 
 # 日本標準時のタイムゾーン
@@ -26,9 +33,19 @@ logger = logging.getLogger(__name__)
 class SinglePromptArticleGenerator:
     """一つのプロンプトで記事生成全体を処理"""
     
-    def __init__(self):
-        self.claude_integration = ClaudeCodeSDKIntegration()
+    def __init__(self, backend=None, streaming: bool = True):
+        # バックエンドの指定（引数 → LLM_BACKEND=mock）がなければ本番のSDKを使う
+        backend = backend or backend_from_env()
+        if backend is None and ClaudeCodeSDKIntegration is not None:
+            backend = ClaudeCodeSDKIntegration()
+        # 失敗はバックオフ付きでリトライし、不調が続けば遮断する（resilience_config.jsonで設定）
+        # LLM_CACHE_MODEを指定したときだけ、同じプロンプトの再実行ではモデルを呼ばない
+        self.claude_integration = wrap_integration(wrap_resilient(backend))
+        if self.claude_integration is None:
+            raise RuntimeError("Claude Code SDKが利用できません（LLM_BACKEND=mockでオフライン実行できます）")
         self.writer_selector = WriterSelector()
+        # ストリーミングなら出力を受け取りながら一時ファイルへ書き、完了時にリネームする
+        self.streaming = streaming
         self.start_time = None
         
     async def generate_article_with_single_prompt(self, topic=None):
@@ -52,6 +69,9 @@ class SinglePromptArticleGenerator:
         # 記事生成プロンプトを作成
         prompt = self._create_comprehensive_prompt(topic, writer)
         
+        if self.streaming:
+            return await self._generate_streaming(prompt, writer)
+
         try:
             # Claude Codeに記事生成を依頼
             print("\n📝 Claude Codeによる記事生成を開始...")
@@ -81,8 +101,39 @@ class SinglePromptArticleGenerator:
                 
         except Exception as e:
             logger.error(f"記事生成エラー: {e}")
-            return {"success": False, "error": str(e)}
+            return {"success": False, "error": str(e), "error_type": type(e).__name__}
     
+    async def _generate_streaming(self, prompt, writer):
+        """モデルの出力を受け取りながら記事ファイルへ書き込む"""
+        article_path = self._new_article_path()
+        print("\n📝 Claude Codeによる記事生成を開始（ストリーミング）...")
+        stream_writer = ArticleStreamWriter(article_path, writer)
+        try:
+            with stream_writer:
+                async for chunk in stream_text(self.claude_integration, prompt, max_turns=1):
+                    stream_writer.write(chunk)
+                stream_writer.finish()
+        except Exception as e:
+            logger.error(f"記事生成エラー: {e}")
+            return {"success": False, "error": str(e), "error_type": type(e).__name__,
+                    "stream": stream_writer.summary()}
+
+        stream = stream_writer.summary()
+        elapsed_time = time.time() - self.start_time
+        print(f"\n✅ 記事生成完了！")
+        print(f"⏱️ 処理時間: {elapsed_time:.1f}秒（{stream['chars']}文字、最初の書き込みまで {stream['time_to_first_byte']}秒）")
+        print(f"📄 保存先: {article_path}")
+        for issue in stream["issues"]:
+            print(f"⚠️ {issue}")
+
+        return {
+            "success": True,
+            "article_path": str(article_path),
+            "writer": writer.name,
+            "elapsed_time": elapsed_time,
+            "stream": stream
+        }
+
     def _get_random_topic(self):
         """ランダムなトピックを選択"""
         import random
@@ -181,21 +232,19 @@ class SinglePromptArticleGenerator:
         # 記事にライターの署名を追加
         content_with_signature = format_article_with_writer_style(content, writer)
         
-        # ファイル名を生成
-        timestamp = int(time.time())
-        filename = f"article_{timestamp}.md"
-        
-        # 保存先ディレクトリ
-        posts_dir = Path("posts")
-        posts_dir.mkdir(exist_ok=True)
-        
         # ファイルパス
-        article_path = posts_dir / filename
+        article_path = self._new_article_path()
         
         # 保存
         article_path.write_text(content_with_signature, encoding='utf-8')
         
         return article_path
+    
+    def _new_article_path(self):
+        """保存先のパス（posts/article_<タイムスタンプ>.md）"""
+        posts_dir = Path("posts")
+        posts_dir.mkdir(exist_ok=True)
+        return posts_dir / f"article_{int(time.time())}.md"
 
 class ArticleQualityChecker:
     """記事の品質を自動チェック"""
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+記事のコード例・本文テンプレートの置き場所
+大きな文字列はモジュールの定数として持たず content_snippets.txt にまとめ、初回アクセスで
+mmapして見出し（@@snippet トピック 言語 名前）の位置だけを索引にする。
+記事を生成しないプロセス（公開・統計など）は読み込みもパースもしない
+"""
+
+import mmap
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SNIPPETS_FILE = Path(__file__).with_name("content_snippets.txt")
+
+HEADER_PATTERN = re.compile(rb"^@@snippet (\S+) (\S+) (\S+)\n", re.MULTILINE)
+
+class SnippetStore:
+    """トピック・言語・名前をキーにしたスニペット（ファイルは最初のgetでmmapする）"""
+
+    def __init__(self, path=SNIPPETS_FILE):
+        self.path = Path(path)
+        self._map: Optional[mmap.mmap] = None
+        self._index: Optional[Dict[Tuple[str, str, str], Tuple[int, int]]] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._index is not None
+
+    def _load(self):
+        """ファイルをmmapし、見出しごとの本文の範囲を索引にする"""
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        headers = list(HEADER_PATTERN.finditer(self._map))
+        index = {}
+        for header, following in zip(headers, headers[1:] + [None]):
+            end = following.start() if following else len(self._map)
+            key = tuple(part.decode("ascii") for part in header.groups())
+            # 本文の後の区切りの改行は含めない
+            index[key] = (header.end(), max(header.end(), end - 1))
+        self._index = index
+
+    def get(self, topic: str, language: str, name: str) -> str:
+        """スニペットの本文"""
+        if self._index is None:
+            self._load()
+        try:
+            start, end = self._index[(topic, language, name)]
+        except KeyError:
+            raise KeyError(f"スニペットがありません: {topic}/{language}/{name}") from None
+        return self._map[start:end].decode("utf-8")
+
+    def keys(self) -> List[Tuple[str, str, str]]:
+        if self._index is None:
+            self._load()
+        return list(self._index)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._map = None
+        self._index = None
+
+_default_store: Optional[SnippetStore] = None
+
+def get_snippet(topic: str, language: str, name: str) -> str:
+    """既定のストア（content_snippets.txt）からスニペットを取得"""
+    global _default_store
+    if _default_store is None:
+        _default_store = SnippetStore()
+    return _default_store.get(topic, language, name)
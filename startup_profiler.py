@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+エントリポイントの起動時間の計測と予算チェック
+`if __name__ == "__main__"` を持つモジュールごとに、一時ディレクトリで新しいインタプリタを起動して
+モジュールを読み込み、エントリ関数（main など）を取り出せた時点を「処理を始められる時点」として計測する（処理は実行しない）。
+-X importtime でモジュールごとの読み込み時間を、別の実行で tracemalloc のピークメモリを記録し、
+予算（DEFAULT_STARTUP_BUDGETS と startup_budgets.json）を超えたら終了コード1で失敗する
+
+    python startup_profiler.py
+    python startup_profiler.py blog_stats convert_articles_v3 --repeat 5
+"""
+
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from append_log import AppendOnlyLog
+
+# 日本標準時のタイムゾーン
+JST = timezone(timedelta(hours=9))
+
+ROOT = Path(__file__).resolve().parent
+STARTUP_BUDGETS_FILE = Path("startup_budgets.json")
+STARTUP_PROFILE_LOG = Path("startup_profile.jsonl")
+
+DEFAULT_STARTUP_BUDGETS = {
+    # すべてのエントリポイントに共通の上限
+    "default": {
+        "wall_seconds": 1.0,          # インタプリタの起動からエントリ関数を取り出すまで
+        "import_seconds": 0.6,        # エントリポイントのモジュールの読み込み（依存モジュールを含む）
+        "peak_memory_mb": 40.0        # 読み込み中のPythonのメモリ確保のピーク（tracemalloc）
+    },
+    # エントリポイントごとの上書き（例: {"generate_article_with_full_review": {"wall_seconds": 2.0}}）
+    "entry_points": {},
+    # リポジトリ内の1モジュールの累積読み込み時間の上限（秒）
+    "module_import_seconds": 0.3
+}
+
+READY_MARKER = "__startup_profiler_ready__ "
+
+# 子プロセスで実行する計測用のコード（引数: モジュール名 エントリ関数名 tracemallocを使うか）
+BOOTSTRAP = f"""
+import json, resource, sys, time
+name, entry, trace = sys.argv[1], sys.argv[2], sys.argv[3] == "1"
+if trace:
+    import tracemalloc
+    tracemalloc.start()
+started = time.perf_counter()
+# importlib.import_module では -X importtime にモジュール自身の行が出ないので __import__ を使う
+module = __import__(name)
+ready = callable(getattr(module, entry, None))
+result = {{
+    "import_seconds": time.perf_counter() - started,
+    "ready": ready,
+    "peak_memory": tracemalloc.get_traced_memory()[1] if trace else None,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+}}
+sys.stdout.flush()
+print({READY_MARKER!r} + json.dumps(result), flush=True)
+"""
+
+def load_startup_budgets(path=None) -> Dict[str, Any]:
+    """既定の予算に設定ファイル（startup_budgets.json）を重ねる"""
+    budgets = json.loads(json.dumps(DEFAULT_STARTUP_BUDGETS))
+    config_path = Path(path or STARTUP_BUDGETS_FILE)
+    if config_path.exists():
+        with open(config_path, "r", encoding="utf-8") as f:
+            for key, value in json.load(f).items():
+                if isinstance(value, dict) and isinstance(budgets.get(key), dict):
+                    budgets[key].update(value)
+                else:
+                    budgets[key] = value
+    return budgets
+
+def _entry_function(path: Path) -> Optional[str]:
+    """`if __name__ == "__main__"` から呼ばれるモジュールの関数名（なければNone）"""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    defined = {node.name for node in tree.body if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))}
+    for node in tree.body:
+        if isinstance(node, ast.If) and "__name__" in ast.unparse(node.test):
+            for sub in ast.walk(node):
+                if isinstance(sub, ast.Call) and isinstance(sub.func, ast.Name) and sub.func.id in defined:
+                    return sub.func.id
+    return None
+
+def discover_entry_points(root: Path = ROOT) -> Dict[str, str]:
+    """リポジトリ直下のエントリポイント（モジュール名 → エントリ関数名）"""
+    entry_points = {}
+    for path in sorted(root.glob("*.py")):
+        if path.stem == Path(__file__).stem:
+            continue
+        entry = _entry_function(path)
+        if entry:
+            entry_points[path.stem] = entry
+    return entry_points
+
+def parse_importtime(text: str) -> List[Dict[str, Any]]:
+    """-X importtime の出力をモジュールごとの読み込み時間（秒）にする"""
+    modules = []
+    for line in text.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_seconds": int(self_us) / 1_000_000,
+            "cumulative_seconds": int(cumulative_us) / 1_000_000,
+            "local": (ROOT / f"{name.strip()}.py").exists()
+        })
+    return modules
+
+def run_entry_point(module: str, entry: str, trace_memory: bool = False, cold: bool = False) -> Dict[str, Any]:
+    """新しいインタプリタでモジュールを読み込み、エントリ関数を取り出せるまでを1回計測"""
+    with tempfile.TemporaryDirectory() as workdir, tempfile.TemporaryFile("w+") as stderr:
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+        if cold:
+            # 空のキャッシュを指定して、バイトコードのコンパイルから計測する
+            env["PYTHONPYCACHEPREFIX"] = str(Path(workdir) / "pycache")
+        command = [sys.executable, "-X", "importtime", "-c", BOOTSTRAP, module, entry, "1" if trace_memory else "0"]
+
+        # 状態ファイルを読み書きするモジュールがあってもリポジトリを汚さないよう、一時ディレクトリで起動する
+        started = time.perf_counter()
+        process = subprocess.Popen(command, cwd=workdir, env=env, stdout=subprocess.PIPE, stderr=stderr, text=True)
+        result = None
+        for line in process.stdout:
+            if line.startswith(READY_MARKER):
+                wall_seconds = time.perf_counter() - started
+                result = json.loads(line[len(READY_MARKER):])
+                result["wall_seconds"] = wall_seconds
+        process.wait()
+        stderr.seek(0)
+        output = stderr.read()
+
+    if result is None:
+        errors = [line for line in output.splitlines() if line.strip() and not line.startswith("import time:")]
+        raise RuntimeError(f"{module}: 読み込みに失敗しました（終了コード {process.returncode}）: {errors[-1] if errors else ''}")
+    result["modules"] = parse_importtime(output)
+    return result
+
+def profile_entry_point(module: str, entry: str, repeat: int = 3, cold: bool = False) -> Dict[str, Any]:
+    """時間の計測をrepeat回（中央値）、tracemallocでのメモリの計測を1回行う"""
+    runs = sorted((run_entry_point(module, entry, cold=cold) for _ in range(repeat)), key=lambda r: r["wall_seconds"])
+    median_run = runs[len(runs) // 2]
+    # tracemallocは読み込みを遅くするので、時間とは別の実行で測る
+    memory_run = run_entry_point(module, entry, trace_memory=True, cold=cold)
+
+    return {
+        "module": module,
+        "entry": entry,
+        "ready": median_run["ready"],
+        "wall_seconds": round(statistics.median(r["wall_seconds"] for r in runs), 4),
+        "import_seconds": round(statistics.median(r["import_seconds"] for r in runs), 4),
+        "peak_memory_mb": round(memory_run["peak_memory"] / 1024 / 1024, 2),
+        "max_rss_mb": round(memory_run["max_rss_kb"] / 1024, 1),
+        "modules_imported": len(median_run["modules"]),
+        "module_costs": sorted(median_run["modules"], key=lambda m: -m["cumulative_seconds"])
+    }
+
+def check_budgets(results: List[Dict[str, Any]], budgets: Dict[str, Any]) -> List[str]:
+    """予算を超えた項目の説明"""
+    violations = []
+    for result in results:
+        budget = dict(budgets["default"])
+        budget.update(budgets["entry_points"].get(result["module"], {}))
+        for key in ["wall_seconds", "import_seconds", "peak_memory_mb"]:
+            if key in budget and result[key] > budget[key]:
+                violations.append(f"{result['module']}: {key} {result[key]} > {budget[key]}")
+        if not result["ready"]:
+            violations.append(f"{result['module']}: エントリ関数 {result['entry']} を取り出せません")
+        limit = budgets.get("module_import_seconds")
+        for item in result["module_costs"]:
+            if limit is not None and item["local"] and item["module"] != result["module"] and item["cumulative_seconds"] > limit:
+                violations.append(f"{result['module']}: {item['module']} の読み込み "
+                                  f"{item['cumulative_seconds']:.3f}秒 > {limit}秒")
+    return violations
+
+def print_report(results: List[Dict[str, Any]], violations: List[str], top: int):
+    print("\n🚀 エントリポイントの起動時間")
+    print("=" * 78)
+    print(f"{'entry point':<36} {'wall(s)':>8} {'import(s)':>10} {'peak(MB)':>9} {'rss(MB)':>8} {'modules':>8}")
+    for result in sorted(results, key=lambda r: -r["wall_seconds"]):
+        print(f"{result['module']:<36} {result['wall_seconds']:>8.3f} {result['import_seconds']:>10.3f} "
+              f"{result['peak_memory_mb']:>9.1f} {result['max_rss_mb']:>8.1f} {result['modules_imported']:>8}")
+
+    # エントリポイントをまたいで、累積の読み込み時間が長いパッケージ・モジュール（*はリポジトリ内）
+    slowest = {}
+    for result in results:
+        for item in result["module_costs"]:
+            if "." in item["module"]:
+                continue
+            if item["cumulative_seconds"] > slowest.get(item["module"], {}).get("cumulative_seconds", -1):
+                slowest[item["module"]] = item
+    print("-" * 78)
+    print(f"読み込みに時間のかかるモジュール（上位{top}件、*はリポジトリ内）")
+    for item in sorted(slowest.values(), key=lambda m: -m["cumulative_seconds"])[:top]:
+        mark = "*" if item["local"] else " "
+        print(f"  {mark} {item['module']:<40} {item['cumulative_seconds']:>8.3f}秒（自身 {item['self_seconds']:.3f}秒）")
+
+    print("-" * 78)
+    if violations:
+        for violation in violations:
+            print(f"❌ {violation}")
+    else:
+        print("✅ すべてのエントリポイントが予算内です")
+
+def main():
+    parser = argparse.ArgumentParser(description="エントリポイントの起動時間の計測と予算チェック")
+    parser.add_argument("entry_points", nargs="*", help="計測するモジュール名（省略時はすべて）")
+    parser.add_argument("--repeat", type=int, default=3, help="時間の計測回数（中央値を使う）")
+    parser.add_argument("--cold", action="store_true", help="バイトコードのキャッシュなしで計測")
+    parser.add_argument("--budgets", default=None, help="予算の設定ファイル（既定: startup_budgets.json）")
+    parser.add_argument("--top", type=int, default=10, help="表示する遅いモジュールの数")
+    parser.add_argument("--record", action="store_true", help="結果をstartup_profile.jsonlに追記")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args()
+
+    entry_points = discover_entry_points()
+    unknown = [name for name in args.entry_points if name not in entry_points]
+    if unknown:
+        parser.error(f"エントリポイントではありません: {', '.join(unknown)}")
+    targets = {name: entry_points[name] for name in args.entry_points} if args.entry_points else entry_points
+
+    budgets = load_startup_budgets(args.budgets)
+    results = []
+    failures = []
+    for module, entry in targets.items():
+        print(f"⏱️  {module} を計測中...", file=sys.stderr)
+        try:
+            results.append(profile_entry_point(module, entry, args.repeat, args.cold))
+        except RuntimeError as e:
+            # 読み込めないエントリポイント（依存パッケージがないなど）も予算違反として扱う
+            failures.append(str(e))
+    violations = failures + check_budgets(results, budgets)
+
+    report = {
+        "timestamp": datetime.now(JST).isoformat(),
+        "python": sys.version.split()[0],
+        "cold": args.cold,
+        "repeat": args.repeat,
+        "results": results,
+        "violations": violations
+    }
+    if args.record:
+        # 推移を追えるよう、モジュールごとの内訳はリポジトリ内のものだけ残す
+        AppendOnlyLog(STARTUP_PROFILE_LOG).append({
+            **report,
+            "results": [{**r, "module_costs": [m for m in r["module_costs"] if m["local"]]} for r in results]
+        })
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(results, violations, args.top)
+    sys.exit(1 if violations else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+JSON状態ファイルの保存・読み込みと検証インデックス
+保存は一時ファイルに書いてからリネームするので、書き込み途中で止まっても壊れたファイルは残らない。
+保存のたびにサイズ・チェックサム・更新時刻を同じディレクトリの state_index.json に記録し、
+健全性チェックはサイズと更新時刻が記録どおりのファイルを読まずに済ませる。
+同時に保存しても、一時ファイルは書き込みごとに別名で、インデックスの更新はスレッド・プロセス間で排他する
+"""
+
+import argparse
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # fcntlのない環境ではプロセス間の排他はしない（同じプロセス内のスレッドだけ排他する）
+    fcntl = None
+
+# 日本標準時のタイムゾーン
+JST = timezone(timedelta(hours=9))
+
+STATE_INDEX_NAME = "state_index.json"
+STATE_INDEX_LOCK_NAME = "state_index.json.lock"
+# 状態ファイルを置くディレクトリ（健全性チェックの既定の対象）
+DEFAULT_STATE_DIRS = [".", "data"]
+
+class CorruptStateFileError(json.JSONDecodeError):
+    """状態ファイルがJSONとして読めない（pathに壊れたファイルを持つ）"""
+
+    def __init__(self, path, error: json.JSONDecodeError):
+        super().__init__(f"{path}: {error.msg}", error.doc, error.pos)
+        self.path = Path(path)
+
+def checksum(data: bytes) -> str:
+    """状態ファイルのチェックサム（CRC32）"""
+    return f"{zlib.crc32(data):08x}"
+
+def atomic_write_bytes(path, data: bytes):
+    """一時ファイルに書いてfsyncしてから置き換える"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # 同じファイルを同時に保存しても互いの一時ファイルを上書きしないよう、書き込みごとに別名にする
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            # mkstempは0600で作るので、これまでどおり読めるようにする
+            os.fchmod(f.fileno(), 0o644)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_name, path)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+def save_json_state(path, data: Any, index: bool = True, **dump_kwargs):
+    """JSONを原子的に保存し、検証インデックスを更新する"""
+    dump_kwargs.setdefault("ensure_ascii", False)
+    encoded = json.dumps(data, **dump_kwargs).encode("utf-8")
+    atomic_write_bytes(path, encoded)
+    if index:
+        StateIndex.for_file(path).record(path, encoded)
+
+def load_json_state(path, default: Any = None) -> Any:
+    """JSONを読み込む（なければdefault、壊れていればCorruptStateFileError）"""
+    path = Path(path)
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return default
+    try:
+        return json.loads(data.decode("utf-8"))
+    except UnicodeDecodeError as e:
+        raise CorruptStateFileError(path, json.JSONDecodeError(f"UTF-8として読めません（{e.reason}）", "", e.start))
+    except json.JSONDecodeError as e:
+        raise CorruptStateFileError(path, e)
+
+def corrupt_file_from_error(error: Exception) -> Optional[Path]:
+    """例外を起こしたJSONファイル（CorruptStateFileErrorのpath、なければ例外発生時に開いていた.jsonファイル）"""
+    path = getattr(error, "path", None)
+    if path:
+        return Path(path)
+
+    frames = []
+    tb = error.__traceback__
+    while tb is not None:
+        frames.append(tb.tb_frame)
+        tb = tb.tb_next
+    # json.load(f) の f のように、最も内側のフレームで開いていたファイルを探す
+    for frame in reversed(frames):
+        for value in frame.f_locals.values():
+            name = getattr(value, "name", None) if isinstance(value, io.IOBase) else None
+            if isinstance(name, str) and name.endswith(".json"):
+                return Path(name)
+    return None
+
+def quarantine_corrupt_file(path) -> Optional[Path]:
+    """壊れたファイルを .corrupt_<時刻> に退避する（読み込み側は既定値から始め直す）"""
+    path = Path(path)
+    if not path.exists():
+        return None
+    quarantined = path.with_name(f"{path.name}.corrupt_{datetime.now(JST).strftime('%Y%m%d_%H%M%S_%f')}")
+    path.replace(quarantined)
+    StateIndex.for_file(path).forget(path)
+    return quarantined
+
+# インデックスの読み込み〜保存を同じプロセス内のスレッド間で排他する（プロセス間はfcntl.flock）
+_index_lock = threading.Lock()
+
+class StateIndex:
+    """ディレクトリ内の状態ファイルごとのサイズ・チェックサム・更新時刻（キーはファイル名）"""
+
+    def __init__(self, directory="."):
+        self.directory = Path(directory)
+        self.path = self.directory / STATE_INDEX_NAME
+        self.entries: Dict[str, Dict[str, Any]] = self._read_entries()
+
+    def _read_entries(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            # インデックスは作り直せるので、読めなければ空から始める
+            return {}
+
+    @contextmanager
+    def _update(self) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """排他したうえでインデックスを読み直し、変更を保存する（他の保存の記録を消さない）"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with _index_lock, open(self.directory / STATE_INDEX_LOCK_NAME, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            self.entries = self._read_entries()
+            yield self.entries
+            self.save()
+
+    @classmethod
+    def for_file(cls, path) -> "StateIndex":
+        """状態ファイルと同じディレクトリのインデックス"""
+        return cls(Path(path).parent)
+
+    def save(self):
+        atomic_write_bytes(self.path, json.dumps(self.entries, ensure_ascii=False, indent=2).encode("utf-8"))
+
+    def _entry(self, path: Path, data: bytes) -> Dict[str, Any]:
+        stat = path.stat()
+        return {"size": len(data), "checksum": checksum(data), "mtime_ns": stat.st_mtime_ns}
+
+    def record(self, path, data: bytes):
+        """保存した内容を記録"""
+        path = Path(path)
+        entry = self._entry(path, data)
+        with self._update() as entries:
+            entries[path.name] = entry
+
+    def forget(self, path):
+        name = Path(path).name
+        if name in self.entries:
+            with self._update() as entries:
+                entries.pop(name, None)
+
+    def verify(self, deep: bool = False) -> Dict[str, str]:
+        """状態ファイルごとの状態（ok / modified / corrupt / missing）
+
+        サイズと更新時刻が記録どおりならファイルを読まない（deep=Trueなら全件のチェックサムを確かめる）。
+        記録と違うファイルは読み直し、JSONとして読めれば modified として記録を更新する
+        """
+        results = {}
+        updates = {}
+        for name, entry in list(self.entries.items()):
+            path = self.directory / name
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                results[name] = "missing"
+                continue
+            if not deep and stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]:
+                results[name] = "ok"
+                continue
+
+            data = path.read_bytes()
+            if len(data) == entry["size"] and checksum(data) == entry["checksum"]:
+                results[name] = "ok"
+            else:
+                try:
+                    json.loads(data.decode("utf-8"))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    results[name] = "corrupt"
+                    continue
+                results[name] = "modified"
+            if stat.st_mtime_ns != entry["mtime_ns"] or results[name] == "modified":
+                updates[name] = self._entry(path, data)
+        if updates:
+            with self._update() as entries:
+                entries.update(updates)
+        return results
+
+    def corrupt_files(self) -> List[Path]:
+        """読めなくなっている状態ファイル"""
+        return [self.directory / name for name, status in self.verify().items() if status == "corrupt"]
+
+def find_corrupt_state_files(directories: List = None) -> List[Path]:
+    """検証インデックスにある状態ファイルのうち、読めなくなっているもの"""
+    corrupt = []
+    for directory in directories or DEFAULT_STATE_DIRS:
+        corrupt.extend(StateIndex(directory).corrupt_files())
+    return corrupt
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON状態ファイルの健全性チェック")
+    parser.add_argument("directories", nargs="*", default=DEFAULT_STATE_DIRS, help="確認するディレクトリ")
+    parser.add_argument("--deep", action="store_true", help="全ファイルのチェックサムを確かめる")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = {}
+    for directory in args.directories:
+        for name, status in StateIndex(directory).verify(deep=args.deep).items():
+            results[str(Path(directory) / name)] = status
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    icons = {"ok": "✅", "modified": "📝", "corrupt": "❌", "missing": "❔"}
+    for name, status in sorted(results.items()):
+        print(f"{icons[status]} {status:<9} {name}")
+    print(f"🩺 {len(results)}ファイルを{elapsed_ms:.1f}ミリ秒で確認しました")
+
+if __name__ == "__main__":
+    main()
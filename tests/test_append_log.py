@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+追記専用ログのテスト
+オフセット索引を使った読み出し（tail・iter_from・since）と、書き込み途中で止まった後の復旧を確認する
+"""
+
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from append_log import INDEX_ENTRY, AppendOnlyLog
+
+JST = timezone(timedelta(hours=9))
+START = datetime(2026, 10, 1, 9, 0, tzinfo=JST)
+
+def make_records(count: int, offset: int = 0):
+    """1時間おきのタイムスタンプを持つレコード"""
+    return [
+        {"id": offset + i, "timestamp": (START + timedelta(hours=offset + i)).isoformat()}
+        for i in range(count)
+    ]
+
+def ids(records):
+    return [record["id"] for record in records]
+
+def test_reads():
+    """索引を使った読み出しをテスト"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log = AppendOnlyLog(Path(temp_dir) / "log.jsonl")
+        assert len(log) == 0 and log.tail(3) == [] and log.last() is None
+
+        log.append_many(make_records(8))
+        log.append(make_records(1, offset=8)[0])
+        assert len(log) == 9
+        assert ids(log.tail(3)) == [6, 7, 8]
+        assert ids(log.tail(100)) == list(range(9))
+        assert log.tail(0) == []
+        assert ids(log.iter_from(5)) == [5, 6, 7, 8]
+        assert list(log.iter_from(9)) == []
+        assert log.last()["id"] == 8
+        assert ids(log) == list(range(9))
+
+        # 境界の時刻ちょうどのレコードを含む
+        assert ids(log.since(START + timedelta(hours=6))) == [6, 7, 8]
+        assert ids(log.since((START + timedelta(hours=5, minutes=30)).timestamp())) == [6, 7, 8]
+        assert ids(log.since(START - timedelta(days=1))) == list(range(9))
+        assert log.since(START + timedelta(days=1)) == []
+
+        # 開き直しても索引をそのまま使う
+        assert ids(AppendOnlyLog(log.path).tail(2)) == [7, 8]
+    print("✅ 追記専用ログ: tail・iter_from・since")
+
+def test_recover_partial_write():
+    """書きかけの行と索引エントリが残った場合の復旧をテスト"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "log.jsonl"
+        AppendOnlyLog(path).append_many(make_records(5))
+
+        # データの書きかけの行と、中途半端な索引エントリ
+        with open(path, "ab") as f:
+            f.write(b'{"id": 5, "timest')
+        with open(path.with_suffix(".jsonl.idx"), "ab") as f:
+            f.write(INDEX_ENTRY.pack(0, 0.0)[:5])
+
+        log = AppendOnlyLog(path)
+        assert len(log) == 5
+        assert path.read_bytes().endswith(b"}\n")
+        assert log.path.with_suffix(".jsonl.idx").stat().st_size == 5 * INDEX_ENTRY.size
+
+        log.append_many(make_records(2, offset=5))
+        assert ids(log.tail(3)) == [4, 5, 6]
+        assert ids(log) == list(range(7))
+    print("✅ 追記専用ログ: 書きかけの行の切り捨て")
+
+def test_recover_index():
+    """索引がデータより遅れている・進んでいる・ない場合の復旧をテスト"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "log.jsonl"
+        index_path = path.with_suffix(".jsonl.idx")
+        AppendOnlyLog(path).append_many(make_records(6))
+
+        # データだけ書けて索引が書けなかった
+        with open(path, "ab") as f:
+            f.write(b"".join(
+                (f'{{"id": {r["id"]}, "timestamp": "{r["timestamp"]}"}}\n').encode("utf-8")
+                for r in make_records(2, offset=6)
+            ))
+        log = AppendOnlyLog(path)
+        assert len(log) == 8
+        assert ids(log.since(START + timedelta(hours=7))) == [7]
+
+        # 索引が消えても作り直せる
+        index_path.unlink()
+        log = AppendOnlyLog(path)
+        assert len(log) == 8 and ids(log.tail(2)) == [6, 7]
+
+        # データが切り詰められ、索引が先に進んでいる
+        lines = path.read_bytes().splitlines(keepends=True)
+        path.write_bytes(b"".join(lines[:4]))
+        log = AppendOnlyLog(path)
+        assert len(log) == 4 and ids(log.tail(10)) == [0, 1, 2, 3]
+
+        # データがなければ索引も消す
+        path.unlink()
+        log = AppendOnlyLog(path)
+        assert len(log) == 0 and not index_path.exists()
+    print("✅ 追記専用ログ: 索引の作り直し")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+リンクチェッカーのテスト
+ローカルのフィードサーバーに対してHEAD/GETの切り替え・リンク切れ検出・キャッシュを確認する
+"""
+
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from feed_fixture_server import FeedFixtureServer
+from link_checker import LinkChecker, extract_urls
+
+def test_link_checker():
+    """リンクチェッカーをテスト"""
+    with FeedFixtureServer(num_feeds=2) as server, tempfile.TemporaryDirectory() as cache_dir:
+        base = server.base_url
+        content = """# テスト記事
+
+公式ドキュメント: https://docs.python.org/3/library/asyncio.html。
+リポジトリ（https://github.com/encode/httpx）も参照
+ローカル環境: http://localhost:8000/ と https://example.com/demo
+
+```python
+httpx.get("https://pypi.org/simple/")  # コード内のURLは確認しない
+```
+"""
+        assert extract_urls(content) == [
+            "https://docs.python.org/3/library/asyncio.html",
+            "https://github.com/encode/httpx",
+        ]
+        print("✅ URL抽出: コード・例示用ホストを除外")
+
+        # ローカルサーバーのURLは抽出対象外なので、明示的に渡して確認する
+        urls = [
+            f"{base}/feeds/0.atom",
+            f"{base}/status/404",
+            f"{base}/no-head/200",
+            f"{base}/redirect/200",
+        ]
+
+        cache_file = Path(cache_dir) / "link_check_cache.json"
+        checker = LinkChecker(cache_file=cache_file, per_host_concurrency=4)
+
+        results = asyncio.run(checker.check_urls(urls))
+        assert results[f"{base}/feeds/0.atom"]["status"] == 200
+        assert results[f"{base}/status/404"]["status"] == 404
+        assert results[f"{base}/no-head/200"]["status"] == 200
+        assert results[f"{base}/no-head/200"]["method"] == "GET"
+        assert results[f"{base}/redirect/200"]["status"] == 200
+        print(f"✅ 初回チェック: {checker.check_stats}")
+
+        # 2回目はキャッシュから返り、サーバーにはリクエストが飛ばない
+        requests_before = server.stats["requests"]
+        checker = LinkChecker(cache_file=cache_file)
+        asyncio.run(checker.check_urls(urls))
+        assert checker.check_stats["cached"] == len(urls)
+        assert server.stats["requests"] == requests_before
+        print(f"✅ キャッシュ利用: {checker.check_stats}")
+
+if __name__ == "__main__":
+    test_link_checker()
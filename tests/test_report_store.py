@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+改善レポートストアのテスト
+別の環境（NumPy・pyarrowの有無が違う）で書かれた列ファイルや、追記の途中失敗から回復できることを確認する
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from report_store import ReportStore, column_backend
+
+DAY = "2026-10-19"
+
+def make_report(minute: int, score: float) -> dict:
+    return {
+        "timestamp": f"{DAY}T10:{minute:02d}:00+09:00",
+        "articles_evaluated": 3,
+        "average_score": score,
+        "rules_updated": minute % 2 == 0,
+    }
+
+def test_append_and_trend():
+    """追記と日ごとの集計をテスト"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = ReportStore(temp_dir)
+        store.append_many([make_report(0, 70.0), make_report(1, 80.0)])
+        store.append(make_report(2, 90.0))
+
+        assert store.days() == [DAY]
+        assert (store.columns_dir / f"{DAY}.{column_backend()}").exists()
+        assert [r["average_score"] for r in store.iter_reports()] == [70.0, 80.0, 90.0]
+        assert store.latest()["average_score"] == 90.0
+        trend = store.daily_trend()
+        assert trend == [{"date": DAY, "runs": 3, "articles_evaluated": 9,
+                          "average_score": 80.0, "rules_updated": 2}]
+    print("✅ レポートストア: 追記と集計")
+
+def test_unreadable_column_file():
+    """この環境で読めない形式の列ファイルがあっても、セグメントから作り直して追記できることをテスト"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = ReportStore(temp_dir)
+        store.append(make_report(0, 70.0))
+
+        # 別の環境（NumPyあり）で書かれた列ファイルに置き換える。中身はこの環境でもNumPyでも読めない
+        for path in store._column_paths(DAY):
+            if path.exists():
+                path.unlink()
+        foreign = store.columns_dir / f"{DAY}.npz"
+        foreign.write_bytes(b"written elsewhere")
+
+        # 読み出しは列ファイルを使わずに集計する
+        assert store.daily_trend()[0]["runs"] == 1
+
+        store.append(make_report(1, 80.0))
+        assert [r["average_score"] for r in store.iter_reports()] == [70.0, 80.0]
+        assert store.daily_trend()[0]["runs"] == 2
+        assert store.daily_trend()[0]["average_score"] == 75.0
+        assert (store.columns_dir / f"{DAY}.{column_backend()}").exists()
+    print("✅ レポートストア: 読めない列ファイルの作り直し")
+
+def test_columns_out_of_sync():
+    """列ファイルとセグメントの件数が合わない場合（追記の途中失敗）に重複しないことをテスト"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = ReportStore(temp_dir)
+        store.append(make_report(0, 70.0))
+
+        # 列だけ更新されてセグメントへの追記が失敗した状態
+        columns = store._load_day_columns(DAY)
+        for name in columns:
+            columns[name].append(columns[name][0])
+        store._save_day_columns(DAY, columns)
+        assert len(store.load_columns()["timestamp"]) == 2
+
+        # 再試行しても1件ずつ
+        store.append(make_report(1, 80.0))
+        assert len(list(store.iter_reports())) == 2
+        assert len(store.load_columns()["timestamp"]) == 2
+        assert store.daily_trend()[0]["runs"] == 2
+    print("✅ レポートストア: 件数の不一致からの回復")
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+回復性レイヤーのテスト
+エラーの分類、エラーの種類ごとのリトライ回数、サーキットブレーカーの状態遷移、
+取り消し（wait_forのタイムアウト・ストリームの途中終了）後に遮断が解けることを確認する
+"""
+
+import asyncio
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from resilience import (
+    CircuitBreaker, CircuitOpenError, ModelCallError, ResilientIntegration, backoff_delay, classify_error,
+    load_resilience_settings
+)
+
+SUCCESS = [{"type": "result", "subtype": "success", "result": "本文"}]
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class FakeBackend:
+    """決めた順に失敗・成功・待機を返すバックエンド（"slow"は取り消されるまで待つ）"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def _next(self):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else "ok"
+        if outcome == "slow":
+            await asyncio.sleep(3600)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return SUCCESS
+
+    async def query_with_sdk(self, prompt, max_turns=1, **kwargs):
+        return await self._next()
+
+class FakeStreamBackend(FakeBackend):
+    async def stream(self, prompt, max_turns=1, **kwargs):
+        await self._next()
+        for chunk in ["## 見出し\n", "本文\n", "まとめ\n"]:
+            yield chunk
+
+def make_integration(backend, failure_threshold: int = 100, clock=None):
+    """待たずにリトライする統合オブジェクト（設定ファイルは読まない）"""
+    settings = load_resilience_settings(path=Path(__file__).with_name("no_such_config.json"))
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+
+    breaker = CircuitBreaker(failure_threshold, 60.0, clock=clock or FakeClock())
+    integration = ResilientIntegration(backend, settings, breaker=breaker, sleep=sleep, rng=random.Random(0))
+    return integration, sleeps
+
+def test_classify_error():
+    """エラーの分類をテスト"""
+    assert classify_error(asyncio.TimeoutError()) == "timeout"
+    assert classify_error(RuntimeError("Request timed out")) == "timeout"
+    assert classify_error(RuntimeError("rate_limit_error: 429 Too Many Requests")) == "rate_limit"
+    assert classify_error(RuntimeError("authentication_error: invalid x-api-key")) == "auth"
+    assert classify_error(ModelCallError("失敗")) == "error_result"
+    # 部分一致では判定しない
+    assert classify_error(RuntimeError("invalid author field")) == "other"
+    assert classify_error(RuntimeError("request 14290 failed")) == "other"
+    print("✅ エラーの分類")
+
+def test_backoff_delay():
+    """バックオフの待ち時間が上限の範囲に収まることをテスト"""
+    settings = {"base_delay": 2.0, "max_delay": 10.0, "multiplier": 2.0}
+    rng = random.Random(1)
+    for attempt, cap in [(1, 2.0), (2, 4.0), (3, 8.0), (4, 10.0), (10, 10.0)]:
+        delays = [backoff_delay(attempt, settings, rng) for _ in range(50)]
+        assert all(0 <= delay <= cap for delay in delays)
+    print("✅ バックオフの待ち時間")
+
+def test_retry_budgets():
+    """エラーの種類ごとのリトライ回数をテスト"""
+    # timeoutは2回までリトライして3回目の失敗で諦める
+    backend = FakeBackend([asyncio.TimeoutError()] * 5)
+    integration, sleeps = make_integration(backend)
+    try:
+        asyncio.run(integration.query_with_sdk("p"))
+        assert False, "リトライを使い切っても例外にならない"
+    except asyncio.TimeoutError:
+        pass
+    assert backend.calls == 3 and len(sleeps) == 2
+    assert integration.stats["retries"] == 2 and integration.stats["failures"] == 3
+
+    # authはリトライしない
+    backend = FakeBackend([RuntimeError("401 Unauthorized")])
+    integration, sleeps = make_integration(backend)
+    try:
+        asyncio.run(integration.query_with_sdk("p"))
+        assert False, "認証エラーがリトライされた"
+    except RuntimeError:
+        pass
+    assert backend.calls == 1 and sleeps == []
+
+    # 失敗の結果もリトライし、成功すればそれを返す
+    backend = FakeBackend([RuntimeError("429"), ModelCallError("失敗の結果"), "ok"])
+    integration, sleeps = make_integration(backend)
+    assert asyncio.run(integration.query_with_sdk("p")) == SUCCESS
+    assert backend.calls == 3 and len(sleeps) == 2
+    print("✅ リトライ回数の上限")
+
+def test_circuit_transitions():
+    """遮断・半開・復旧の状態遷移をテスト"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60.0, clock=clock)
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    try:
+        breaker.allow()
+        assert False, "遮断中に呼び出せた"
+    except CircuitOpenError as e:
+        assert e.retry_after == 60.0
+
+    # 時間が経つと1回だけ試せる
+    clock.now += 60
+    breaker.allow()
+    assert breaker.state == "half_open" and breaker.trial_in_flight
+    try:
+        breaker.allow()
+        assert False, "半開で2本目の試行が通った"
+    except CircuitOpenError:
+        pass
+
+    # 試行が失敗すればすぐに遮断し直す
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.trial_in_flight
+    clock.now += 60
+    breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+    print("✅ サーキットブレーカーの状態遷移")
+
+def trip(integration, clock):
+    """遮断させてから、半開で試せる時刻まで進める"""
+    breaker = integration.breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now += breaker.reset_timeout
+
+def test_cancelled_trial():
+    """半開の試行が取り消されても、次の呼び出しで試し直せることをテスト"""
+    clock = FakeClock()
+    backend = FakeBackend(["slow", "ok"])
+    integration, _ = make_integration(backend, failure_threshold=2, clock=clock)
+    trip(integration, clock)
+
+    async def run():
+        try:
+            await asyncio.wait_for(integration.query_with_sdk("p"), 0.01)
+            assert False, "タイムアウトしない"
+        except asyncio.TimeoutError:
+            pass
+        assert integration.breaker.state == "half_open"
+        assert not integration.breaker.trial_in_flight
+        return await integration.query_with_sdk("p")
+
+    assert asyncio.run(run()) == SUCCESS
+    assert integration.breaker.state == "closed"
+    print("✅ 取り消された試行の取り下げ")
+
+def test_closed_stream_trial():
+    """半開の試行のストリームを途中で閉じても、次の呼び出しで試し直せることをテスト"""
+    clock = FakeClock()
+    backend = FakeStreamBackend(["ok", "ok"])
+    integration, _ = make_integration(backend, failure_threshold=2, clock=clock)
+    trip(integration, clock)
+
+    async def run():
+        stream = integration.stream("p")
+        assert await stream.__anext__() == "## 見出し\n"
+        await stream.aclose()
+        assert not integration.breaker.trial_in_flight
+        return [chunk async for chunk in integration.stream("p")]
+
+    assert "".join(asyncio.run(run())) == "## 見出し\n本文\nまとめ\n"
+    assert integration.breaker.state == "closed"
+    print("✅ 途中で閉じたストリームの試行の取り下げ")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+スニペットストアと遅延読み込みのテスト
+-X importtime で、記事を生成しない入口がコード例や生成モジュールを読み込まないことを確認する
+"""
+
+import ast
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from snippet_store import SnippetStore, SNIPPETS_FILE
+
+# 生成モジュールに残してよい文字列定数の長さ（コード例・本文テンプレートはスニペットに置く）
+MAX_INLINE_STRING = 4000
+
+def imported_modules(code: str) -> set:
+    """-X importtime の出力から、codeの実行中に読み込まれたモジュール名を集める"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    )
+    assert result.returncode == 0, result.stderr
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            modules.add(line.rsplit("|", 1)[1].strip())
+    return modules
+
+def test_snippet_store():
+    """スニペットの索引と取得をテスト"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "snippets.txt"
+        path.write_text(
+            "@@snippet security go gateway\n```go\npackage main\n```\n"
+            "@@snippet security markdown article\n## {keywords[0]}\n\n{{literal}}\n\n"
+            "@@snippet general markdown empty\n\n",
+            encoding="utf-8"
+        )
+        store = SnippetStore(path)
+        assert not store.loaded
+        assert store.get("security", "go", "gateway") == "```go\npackage main\n```"
+        # 本文の末尾の空行は保ち、区切りの改行だけを除く
+        assert store.get("security", "markdown", "article") == "## {keywords[0]}\n\n{{literal}}\n"
+        assert store.get("general", "markdown", "empty") == ""
+        assert store.loaded
+        assert len(store.keys()) == 3
+        try:
+            store.get("security", "rust", "gateway")
+            assert False, "存在しないキーでKeyErrorにならない"
+        except KeyError:
+            pass
+        store.close()
+        assert not store.loaded
+    print("✅ スニペットストア: 索引と取得")
+
+def test_generator_templates_in_snippets():
+    """コード例・本文テンプレートが生成モジュールの定数に戻っていないかをテスト"""
+    for name in ["generate_detailed_article_v4.py", "content_parts.py"]:
+        tree = ast.parse((ROOT / name).read_text(encoding="utf-8"))
+        long_strings = [
+            node.lineno for node in ast.walk(tree)
+            if isinstance(node, ast.Constant) and isinstance(node.value, str) and len(node.value) > MAX_INLINE_STRING
+        ]
+        assert not long_strings, f"{name}: 長い文字列定数（{long_strings}行目）はcontent_snippets.txtへ"
+
+    # 生成モジュールが参照するスニペットがすべてある
+    store = SnippetStore(SNIPPETS_FILE)
+    for topic in ["security", "nextjs", "kubernetes", "general"]:
+        assert store.get(topic, "markdown", "article")
+    store.close()
+    print("✅ コード例はスニペットストアにある")
+
+def test_import_time():
+    """記事を生成しない入口が生成モジュールとコード例を読み込まないことをテスト"""
+    modules = imported_modules(
+        "from generate_article_with_full_review import FullReviewArticleSystem, publish_site"
+    )
+    assert "generate_article_with_full_review" in modules
+    for lazy in ["generate_detailed_article_v4", "content_parts", "snippet_store", "llm_backends"]:
+        assert lazy not in modules, f"{lazy} が起動時に読み込まれています"
+
+    # 生成モジュールを読み込んでも、スニペットファイルは最初の記事生成まで開かない
+    modules = imported_modules(
+        "import generate_detailed_article_v4, snippet_store\n"
+        "assert snippet_store._default_store is None"
+    )
+    assert "generate_detailed_article_v4" in modules
+    assert "content_parts" not in modules
+    print("✅ 起動時の読み込み: 生成モジュールとコード例は遅延読み込み")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+起動時間の計測ハーネスのテスト
+エントリポイントの検出・-X importtime の解析・予算チェックを確認する
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from startup_profiler import check_budgets, discover_entry_points, parse_importtime, profile_entry_point
+
+IMPORTTIME_SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _json
+import time:       900 |       1020 | json
+import time:      2100 |       2100 |   state_files
+import time:      1500 |       3600 | append_log
+"""
+
+def test_discover_entry_points():
+    """エントリポイントとエントリ関数の検出をテスト"""
+    entry_points = discover_entry_points()
+    assert entry_points["blog_stats"] == "generate_blog_stats"
+    assert entry_points["generate_article_with_full_review"] == "main"
+    assert entry_points["update_to_modern_ui_v3"] == "update_to_modern_ui"
+    assert "startup_profiler" not in entry_points
+    assert "content_parts" not in entry_points
+    print(f"✅ エントリポイント検出: {len(entry_points)}件")
+
+def test_parse_importtime():
+    """-X importtime の解析をテスト"""
+    modules = {m["module"]: m for m in parse_importtime(IMPORTTIME_SAMPLE)}
+    assert set(modules) == {"_json", "json", "state_files", "append_log"}
+    assert modules["append_log"]["cumulative_seconds"] == 0.0036
+    assert modules["state_files"]["depth"] == 1 and modules["append_log"]["depth"] == 0
+    assert modules["state_files"]["local"] and not modules["json"]["local"]
+    print("✅ importtimeの解析")
+
+def test_profile_entry_point():
+    """エントリポイントの計測をテスト（実際の予算との比較は startup_profiler.py で行う）"""
+    result = profile_entry_point("report_store", "main", repeat=1)
+    assert result["ready"]
+    assert result["wall_seconds"] >= result["import_seconds"] > 0
+    assert result["peak_memory_mb"] > 0
+    costs = {m["module"]: m for m in result["module_costs"]}
+    assert costs["report_store"]["local"] and costs["report_store"]["depth"] == 0
+    print("✅ エントリポイントの計測")
+
+def test_budgets():
+    """予算チェックをテスト（計測結果は作ったものを使い、環境の速さに左右されない）"""
+    result = {
+        "module": "append_log", "entry": "main", "ready": True,
+        "wall_seconds": 0.2, "import_seconds": 0.05, "peak_memory_mb": 12.0,
+        "module_costs": parse_importtime(IMPORTTIME_SAMPLE)
+    }
+    generous = {
+        "default": {"wall_seconds": 60.0, "import_seconds": 60.0, "peak_memory_mb": 4096.0},
+        "entry_points": {},
+        "module_import_seconds": 10.0
+    }
+    assert check_budgets([result], generous) == []
+
+    tight = {
+        "default": {"wall_seconds": 0.1, "import_seconds": 10.0, "peak_memory_mb": 1000.0},
+        "entry_points": {"append_log": {"peak_memory_mb": 10.0}},
+        "module_import_seconds": 0.001
+    }
+    violations = check_budgets([result], tight)
+    assert any("wall_seconds" in v for v in violations)
+    assert any("peak_memory_mb" in v for v in violations)
+    # 依存するリポジトリ内のモジュール（state_files）は1モジュールの上限で確認する
+    assert any("state_files の読み込み" in v for v in violations)
+    # エントリポイント自身とリポジトリ外のモジュール（json）は対象にしない
+    assert not any("append_log の読み込み" in v or "json の読み込み" in v for v in violations)
+    assert not any("import_seconds" in v for v in violations)
+
+    assert any("エントリ関数" in v for v in check_budgets([dict(result, ready=False)], generous))
+    print("✅ 予算チェック")
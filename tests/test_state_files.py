@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+JSON状態ファイルのテスト
+書き込みが失敗しても元のファイルが残ること、検証インデックスによる破損の検出、
+壊れたファイルの退避、例外から壊れたファイルを特定できることを確認する
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from state_files import (
+    STATE_INDEX_NAME, CorruptStateFileError, StateIndex, corrupt_file_from_error, find_corrupt_state_files,
+    load_json_state, quarantine_corrupt_file, save_json_state
+)
+
+def test_failed_write_keeps_old_file():
+    """書き込みの途中で失敗しても元のファイルが残り、一時ファイルも残らないことをテスト"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "state.json"
+        save_json_state(path, {"version": 1})
+
+        with mock.patch("state_files.os.fsync", side_effect=OSError("ディスクがいっぱいです")):
+            try:
+                save_json_state(path, {"version": 2})
+                assert False, "書き込みの失敗が伝わらない"
+            except OSError:
+                pass
+
+        assert load_json_state(path) == {"version": 1}
+        assert sorted(p.name for p in Path(temp_dir).iterdir()) == sorted([
+            "state.json", STATE_INDEX_NAME, STATE_INDEX_NAME + ".lock"
+        ])
+        assert StateIndex(temp_dir).verify(deep=True) == {"state.json": "ok"}
+    print("✅ 状態ファイル: 失敗した書き込み")
+
+def test_verify():
+    """検証インデックスによる状態の判定をテスト"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        directory = Path(temp_dir)
+        for name in ["ok.json", "modified.json", "corrupt.json", "missing.json"]:
+            save_json_state(directory / name, {"name": name})
+        assert load_json_state(directory / "nothing.json", default=[]) == []
+
+        (directory / "modified.json").write_text(json.dumps({"name": "changed by hand"}), encoding="utf-8")
+        (directory / "corrupt.json").write_text('{"name": "corrupt', encoding="utf-8")
+        (directory / "missing.json").unlink()
+
+        assert StateIndex(directory).verify() == {
+            "ok.json": "ok", "modified.json": "modified", "corrupt.json": "corrupt", "missing.json": "missing"
+        }
+        # 手で直したファイルは記録を更新するので、次の確認ではokになる
+        assert StateIndex(directory).verify()["modified.json"] == "ok"
+        assert find_corrupt_state_files([directory]) == [directory / "corrupt.json"]
+    print("✅ 状態ファイル: 検証インデックス")
+
+def test_quarantine():
+    """壊れたファイルの検出と退避をテスト"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "history.json"
+        save_json_state(path, {"versions": []})
+        path.write_bytes(b'{"versions": [')
+
+        try:
+            load_json_state(path)
+            assert False, "壊れたファイルを読めてしまう"
+        except CorruptStateFileError as e:
+            assert e.path == path
+            assert corrupt_file_from_error(e) == path
+
+        quarantined = quarantine_corrupt_file(path)
+        assert quarantined.name.startswith("history.json.corrupt_")
+        assert quarantined.read_bytes() == b'{"versions": ['
+        assert not path.exists()
+        assert load_json_state(path, default={"versions": []}) == {"versions": []}
+        assert "history.json" not in StateIndex(temp_dir).entries
+        assert quarantine_corrupt_file(path) is None
+    print("✅ 状態ファイル: 壊れたファイルの退避")
+
+def test_corrupt_file_from_error():
+    """json.loadの例外から、開いていたファイルを特定できることをテスト"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "rules_history.json"
+        path.write_text("{", encoding="utf-8")
+
+        def load_rules():
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        try:
+            load_rules()
+            assert False, "壊れたファイルを読めてしまう"
+        except json.JSONDecodeError as e:
+            assert corrupt_file_from_error(e) == path
+
+        assert corrupt_file_from_error(ValueError("JSONとは関係のないエラー")) is None
+    print("✅ 状態ファイル: 例外からのファイルの特定")